@@ -0,0 +1,175 @@
+# backend/chroma_ingest.py
+"""
+Chroma Bulk Ingest - Batched, pipelined upserts/deletes for the file indexer
+Records are accumulated into batches of `batch_size`, up to `max_in_flight` batches
+are sent concurrently (the Chroma HTTP client is blocking, so a thread pool), and a
+failed batch is retried with exponential backoff before its groups are failed.
+
+A group is one caller-defined unit (the indexer uses one per directory). Its
+on_commit callback runs - on the caller's thread, from poll()/flush() - only once
+every batch holding its records has been written, so checkpoints never run ahead
+of the data.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (id, document, metadata)
+Record = Tuple[str, str, Dict[str, Any]]
+
+class _Group:
+    __slots__ = ("pending", "error", "on_commit", "on_fail", "size")
+
+    def __init__(self, on_commit: Optional[Callable[[], None]], on_fail: Optional[Callable[[Exception], None]]):
+        self.pending = 0
+        self.error: Optional[Exception] = None
+        self.on_commit = on_commit
+        self.on_fail = on_fail
+        self.size = 0
+
+class BulkIngestor:
+    """add(records, delete_ids, on_commit, on_fail) ... poll() ... flush()"""
+
+    def __init__(self, collection, batch_size: int = 2000, max_in_flight: int = 4,
+                 max_retries: int = 3, backoff: float = 0.5):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="chroma-ingest")
+        # op -> (items of the batch being filled, groups with items in it)
+        self._buffers: Dict[str, Tuple[List, List[_Group]]] = {"upsert": ([], []), "delete": ([], [])}
+        self._in_flight: Deque[Tuple[Future, List[_Group], int]] = deque()
+        self._ready: Deque[_Group] = deque()
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+        self.stats = {"upserted": 0, "deleted": 0, "batches": 0, "retries": 0, "failed_batches": 0,
+                      "failed_records": 0, "send_seconds": 0.0}
+
+    # ========================================================================
+    # SUBMISSION
+    # ========================================================================
+    def add(self, records: List[Record], delete_ids: List[str] = (),
+            on_commit: Optional[Callable[[], None]] = None, on_fail: Optional[Callable[[Exception], None]] = None):
+        if self._started is None:
+            self._started = time.perf_counter()
+        group = _Group(on_commit, on_fail)
+        group.size = len(records) + len(delete_ids)
+        if not group.size:
+            self._ready.append(group)
+            return
+        self._buffer("upsert", list(records), group)
+        self._buffer("delete", list(delete_ids), group)
+
+    def _buffer(self, op: str, items: List, group: _Group):
+        """Fill the current `op` batch exactly to batch_size, sending each one as it fills"""
+        while items:
+            buffer, groups = self._buffers[op]
+            room = self.batch_size - len(buffer)
+            buffer.extend(items[:room])
+            items = items[room:]
+            if not groups or groups[-1] is not group:
+                groups.append(group)
+                group.pending += 1
+            if len(buffer) >= self.batch_size:
+                self._send(op)
+
+    def _send(self, op: str):
+        items, groups = self._buffers[op]
+        self._buffers[op] = ([], [])
+        if items:
+            self._submit(self._upsert if op == "upsert" else self._delete, items, groups, len(items))
+
+    def _submit(self, fn: Callable, payload: List, groups: List[_Group], size: int):
+        # Backpressure: never more than max_in_flight batches outstanding
+        while len(self._in_flight) >= self.max_in_flight:
+            self._reap(block=True)
+        self._in_flight.append((self._pool.submit(self._with_retries, fn, payload), groups, size))
+
+    # ========================================================================
+    # WORKER THREADS
+    # ========================================================================
+    def _upsert(self, records: List[Record]):
+        self.collection.upsert(ids=[r[0] for r in records], documents=[r[1] for r in records],
+                               metadatas=[r[2] for r in records])
+        with self._lock:
+            self.stats["upserted"] += len(records)
+
+    def _delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+        with self._lock:
+            self.stats["deleted"] += len(ids)
+
+    def _with_retries(self, fn: Callable, payload: List):
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return fn(payload)
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        raise
+                    with self._lock:
+                        self.stats["retries"] += 1
+                    logger.warning(f"Chroma batch of {len(payload)} failed ({e}); retry {attempt + 1}/{self.max_retries}")
+                    time.sleep(self.backoff * (2 ** attempt))
+        finally:
+            with self._lock:
+                self.stats["batches"] += 1
+                self.stats["send_seconds"] += time.perf_counter() - started
+
+    # ========================================================================
+    # COMPLETION (caller's thread)
+    # ========================================================================
+    def _reap(self, block: bool = False):
+        while self._in_flight and (block or self._in_flight[0][0].done()):
+            future, groups, size = self._in_flight.popleft()
+            error = future.exception()
+            if error is not None:
+                self.stats["failed_batches"] += 1
+                self.stats["failed_records"] += size
+            for group in groups:
+                if error is not None and group.error is None:
+                    group.error = error
+                group.pending -= 1
+                if group.pending == 0:
+                    self._ready.append(group)
+            block = False
+
+    def poll(self):
+        """Run callbacks for groups whose batches have all finished"""
+        self._reap()
+        while self._ready:
+            group = self._ready.popleft()
+            if group.error is None:
+                if group.on_commit: group.on_commit()
+            elif group.on_fail:
+                group.on_fail(group.error)
+
+    def flush(self):
+        """Send partial batches, wait for everything in flight, then run callbacks"""
+        self._send("upsert")
+        self._send("delete")
+        while self._in_flight:
+            self._reap(block=True)
+        self.poll()
+
+    def close(self):
+        self.flush()
+        self._pool.shutdown(wait=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            **self.stats,
+            "send_seconds": round(self.stats["send_seconds"], 2),
+            "in_flight": len(self._in_flight),
+            "elapsed_seconds": round(elapsed, 2),
+            "files_per_second": round(self.stats["upserted"] / elapsed, 1) if elapsed else 0.0,
+        }
@@ -14,4 +14,84 @@ WORKER_MODELS = {
     "eyes": os.getenv("EYES_MODEL", "llama3.2-vision:11b"),  # Vision model
     "hands": os.getenv("HANDS_MODEL", "phi3.5:3.8b"),        # Fast execution model
     "memory": os.getenv("MEMORY_MODEL", "smollm2:360m"),     # Lightweight embedding
-}
\ No newline at end of file
+}
+# Constitutional ledger writer
+LEDGER_FSYNC_POLICY = os.getenv("LEDGER_FSYNC_POLICY", "interval")  # none | interval | batch
+LEDGER_FSYNC_INTERVAL = float(os.getenv("LEDGER_FSYNC_INTERVAL", "1.0"))
+LEDGER_BATCH_SIZE = int(os.getenv("LEDGER_BATCH_SIZE", "256"))
+LEDGER_MAX_QUEUE = int(os.getenv("LEDGER_MAX_QUEUE", "10000"))
+LEDGER_MAX_SPILL = int(os.getenv("LEDGER_MAX_SPILL", "50000"))  # past this, new tasks get 429
+
+# Constitutional ruling store
+RULING_BUFFER_SIZE = int(os.getenv("RULING_BUFFER_SIZE", "10000"))
+RULING_SESSION_HISTORY = int(os.getenv("RULING_SESSION_HISTORY", "200"))
+
+# Constitutional verdict cache
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "4096"))
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", "300"))
+
+# Spreadsheet uploads
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "500"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", "2"))
+
+# Kernel admission control: "worker=limit,..." (e.g. "code=1,brain=2")
+WORKER_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, limit in (pair.split("=") for pair in os.getenv("WORKER_CONCURRENCY", "code=1").split(",") if "=" in pair)
+}
+WORKER_DEFAULT_CONCURRENCY = int(os.getenv("WORKER_DEFAULT_CONCURRENCY", "2"))
+KERNEL_MAX_ACTIVE = int(os.getenv("KERNEL_MAX_ACTIVE", "4"))
+KERNEL_MAX_QUEUE = int(os.getenv("KERNEL_MAX_QUEUE", "32"))
+KERNEL_MAX_WAIT = float(os.getenv("KERNEL_MAX_WAIT", "10"))  # seconds before a request may force a model switch
+
+# Model residency: memory budget for loaded Ollama models and optional size overrides ("model=GB,...")
+VRAM_BUDGET_GB = float(os.getenv("VRAM_BUDGET_GB", "8"))
+MODEL_FOOTPRINTS = {
+    name.strip(): float(size)
+    for name, size in (pair.rsplit("=", 1) for pair in os.getenv("MODEL_FOOTPRINTS", "").split(",") if "=" in pair)
+}
+
+# Predictive prewarming: load a session's likely next model while the GPU is idle
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+PREWARM_MIN_PROBABILITY = float(os.getenv("PREWARM_MIN_PROBABILITY", "0.5"))
+PREWARM_MIN_SAMPLES = int(os.getenv("PREWARM_MIN_SAMPLES", "3"))
+PREWARM_MAX_GB_PER_HOUR = float(os.getenv("PREWARM_MAX_GB_PER_HOUR", "40"))
+
+# Auto-router: route cache, local classifier (trained on routed history) and its confidence gate
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", "2048"))
+ROUTER_CACHE_TTL = float(os.getenv("ROUTER_CACHE_TTL", "3600"))
+ROUTER_CONFIDENCE = float(os.getenv("ROUTER_CONFIDENCE", "0.75"))
+ROUTER_HISTORY_PATH = os.getenv("ROUTER_HISTORY_PATH", "logs/router_history.jsonl")
+ROUTER_HISTORY_SIZE = int(os.getenv("ROUTER_HISTORY_SIZE", "5000"))
+ROUTER_MIN_EXAMPLES = int(os.getenv("ROUTER_MIN_EXAMPLES", "40"))
+ROUTER_RETRAIN_EVERY = int(os.getenv("ROUTER_RETRAIN_EVERY", "25"))
+
+# Semantic routing tier (MiniLM nearest-centroid); needs sentence-transformers.
+# Off by default until the threshold/margin are measured with router_benchmark.py
+ROUTER_SEMANTIC = os.getenv("ROUTER_SEMANTIC", "false").lower() == "true"
+ROUTER_SEMANTIC_THRESHOLD = float(os.getenv("ROUTER_SEMANTIC_THRESHOLD", "0.45"))
+ROUTER_SEMANTIC_MARGIN = float(os.getenv("ROUTER_SEMANTIC_MARGIN", "0.05"))
+
+# Shared embedding service (sentence-transformers, micro-batched)
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "10000"))
+
+# Filesystem crawler (indexer + live PC search): worker threads and low IO priority
+CRAWL_THREADS = int(os.getenv("CRAWL_THREADS", str(min(8, os.cpu_count() or 4))))
+CRAWL_LOW_PRIORITY = os.getenv("CRAWL_LOW_PRIORITY", "true").lower() == "true"
+
+# Local trigram filename index (memory-mapped; built by system_indexer.py or file_index.py build)
+FILE_INDEX_PATH = os.getenv("FILE_INDEX_PATH", "index_data/file_index")
+
+# File watcher: keeps the filename index live (inotify on Linux, else polling)
+FS_WATCH_ENABLED = os.getenv("FS_WATCH_ENABLED", "true").lower() == "true"
+FS_WATCH_ROOTS = [r for r in os.getenv("FS_WATCH_ROOTS", os.path.expanduser("~")).split(os.pathsep) if r]
+FS_WATCH_BACKEND = os.getenv("FS_WATCH_BACKEND", "auto")  # auto | inotify | poll
+FS_WATCH_DEBOUNCE = float(os.getenv("FS_WATCH_DEBOUNCE", "0.5"))
+FS_WATCH_MAX_DELAY = float(os.getenv("FS_WATCH_MAX_DELAY", "5"))
+FS_WATCH_POLL_INTERVAL = float(os.getenv("FS_WATCH_POLL_INTERVAL", "60"))
+FS_WATCH_MAX_QUEUE = int(os.getenv("FS_WATCH_MAX_QUEUE", "256"))
+FS_WATCH_COMPACT_EVERY = int(os.getenv("FS_WATCH_COMPACT_EVERY", "20000"))
@@ -0,0 +1,149 @@
+# backend/constitution_reference.py
+"""
+Constitution Reference - Frozen copy of the keyword articles as they were before the
+RuleEngine (zero_drift_core.py, verbatim apart from dropping `self`). Not used at run
+time: `python rule_engine.py` checks the live articles against these, so a misreading
+shared by the engine and its tests cannot hide. Do not edit to follow later changes.
+"""
+from typing import Any, Dict
+
+def article_1_sovereignty(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    All data must stay within the sovereign system.
+    No external API calls, no data leakage to cloud services.
+    """
+    violations = []
+
+    # Check for external URLs
+    external_indicators = [
+        "http://", "https://", "api.", ".com", ".org", ".io",
+        "fetch(", "axios.", "requests.", "urllib", "aiohttp"
+    ]
+
+    for indicator in external_indicators:
+        if indicator in task.lower():
+            violations.append(f"External reference detected: {indicator}")
+
+    # Check for cloud model names
+    cloud_models = ["gpt-", "claude", "gemini-", "bedrock", "sagemaker"]
+    for model in cloud_models:
+        if model in task.lower():
+            violations.append(f"Cloud model reference: {model}")
+
+    if violations:
+        return False, "Data sovereignty violation", violations
+    return True, "Sovereignty maintained", []
+
+def article_4_determinism(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    Same input + same context must produce same output.
+    Non-deterministic elements must be logged.
+    """
+    # Check for non-deterministic indicators
+    non_deterministic = [
+        "random", "randint", "shuffle", "time(", "datetime",
+        "uuid", "nanoseconds", "timestamp"
+    ]
+
+    violations = []
+    for item in non_deterministic:
+        if item in task.lower():
+            violations.append(f"Potential non-deterministic element: {item}")
+
+    if violations:
+        return False, "Non-deterministic elements detected", violations
+    return True, "Deterministic operation", []
+
+def article_5_safety(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    No harmful operations that could damage system or data.
+    """
+    harmful_patterns = [
+        # File system destruction
+        "rm -rf", "del /f", "format ", "dd if=", "mkfs",
+        "remove-recursive", "unlink --recursive",
+
+        # Database destruction
+        "DROP TABLE", "DROP DATABASE", "DELETE FROM", "TRUNCATE",
+
+        # System commands
+        "shutdown", "reboot", "halt", "poweroff",
+        "taskkill /F", "kill -9", "pkill -f",
+
+        # Privilege escalation
+        "sudo", "su ", "chmod 777", "chown root"
+    ]
+
+    violations = []
+    for pattern in harmful_patterns:
+        if pattern in task.upper() or pattern in task.lower():
+            violations.append(f"Harmful pattern detected: {pattern}")
+
+    if violations:
+        return False, "Safety violation", violations
+    return True, "Operation is safe", []
+
+def article_6_privacy(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    No PII (Personally Identifiable Information) collection or storage.
+    """
+    pii_patterns = [
+        "email", "phone", "address", "ssn", "credit card", "passport",
+        "driver license", "bank account", "routing number", "dob",
+        "birth date", "social security", "medicare"
+    ]
+
+    violations = []
+    for pattern in pii_patterns:
+        if pattern in task.lower():
+            violations.append(f"Potential PII detected: {pattern}")
+
+    if violations:
+        return False, "Privacy violation - PII detected", violations
+    return True, "No PII detected", []
+
+def article_8_recoverability(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    System must be able to rollback to known state.
+    Operations should be idempotent or have rollback plans.
+    """
+    worker = context.get("worker")
+
+    # Different workers have different recoverability requirements
+    if worker == "files":
+        # File operations should be idempotent or have backups
+        if "delete" in task.lower() and "backup" not in task.lower():
+            return False, "File deletion without backup", ["Non-recoverable delete"]
+
+    elif worker == "code":
+        # Code generation should be revertible
+        if "overwrite" in task.lower() and "backup" not in task.lower():
+            return False, "Code overwrite without backup", ["Non-recoverable overwrite"]
+
+    return True, "Operation is recoverable", []
+
+def article_9_boundedness(task: str, context: Dict[str, Any]) -> tuple:
+    """
+    Operations must stay within defined scope/worker boundaries.
+    """
+    worker = context.get("worker")
+
+    # Brain worker - general reasoning, should stay in its lane
+    if worker == "brain":
+        # Check if trying to do file operations
+        file_ops = ["list files", "read file", "write file", "delete file"]
+        for op in file_ops:
+            if op in task.lower():
+                return False, "Brain worker attempting file operation", ["Use files worker instead"]
+
+    # Files worker - must stay within project directory
+    elif worker == "files":
+        if ".." in task or task.startswith("/") or ":" in task:
+            return False, "Files worker attempting to escape sandbox", ["Path traversal detected"]
+
+    # Code worker - should only generate code, not execute it
+    elif worker == "code":
+        if "execute" in task.lower() or "run" in task.lower():
+            return False, "Code worker attempting execution", ["Use hands worker for execution"]
+
+    return True, "Operation within bounds", []
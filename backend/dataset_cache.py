@@ -0,0 +1,256 @@
+# backend/dataset_cache.py
+"""
+Dataset Cache - Converts each spreadsheet upload to Parquet exactly once
+Cache files are named by the SHA-256 of the uploaded bytes, so re-uploading the
+same file is a dedupe hit; analysis memory-maps only the columns it needs
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+    logger.warning("⚠️ pyarrow not installed - uploads will be re-parsed on every analysis (pip install pyarrow)")
+
+HASH_CHUNK = 1024 * 1024
+
+def file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def read_source(path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Parse a raw .csv/.xlsx/.xls upload"""
+    if path.suffix.lower() == ".csv":
+        return pd.read_csv(path, usecols=columns, low_memory=False)
+    return pd.read_excel(path, usecols=columns)
+
+def _promote(a: "pa.DataType", b: "pa.DataType") -> "pa.DataType":
+    """Widen a column type seen in one CSV chunk to cover another chunk"""
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    numeric = lambda t: pa.types.is_integer(t) or pa.types.is_floating(t)
+    if numeric(a) and numeric(b):
+        return pa.float64()
+    return pa.string()
+
+def _chunk_table(chunk: pd.DataFrame, schema: "pa.Schema") -> "pa.Table":
+    for field in schema:
+        if pa.types.is_string(field.type) and chunk[field.name].dtype != object:
+            chunk[field.name] = chunk[field.name].astype("string")
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False, safe=False)
+
+def convert_upload(path: str, target: Optional[str], row_group_size: int, chunksize: int) -> Dict[str, Any]:
+    """
+    Parse an upload and (when target is given) write it as Parquet.
+    Runs in the dataset process pool. CSVs are read in `chunksize` row chunks twice:
+    once to count rows and infer a schema wide enough for every chunk, then to write,
+    so memory stays bounded by one chunk.
+    """
+    source = Path(path)
+    if source.suffix.lower() != ".csv":
+        df = read_source(source)
+        df.columns = [str(c) for c in df.columns]
+        if target:
+            try:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Mixed-type object columns (common in Excel) are stored as text
+                objects = df.select_dtypes(include="object").columns
+                df[objects] = df[objects].astype("string")
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            pq.write_table(table, target, row_group_size=row_group_size)
+        return {"rows": len(df), "columns": list(df.columns),
+                "dtypes": {c: str(t) for c, t in df.dtypes.items()}}
+
+    rows, dtypes, schema = 0, {}, None
+    for chunk in pd.read_csv(source, chunksize=chunksize, low_memory=False):
+        rows += len(chunk)
+        for name, dtype in chunk.dtypes.items():
+            seen = dtypes.get(name)
+            dtypes[name] = str(dtype) if seen in (None, str(dtype)) else \
+                "float64" if {seen, str(dtype)} <= {"int64", "float64"} else "object"
+        if target:
+            chunk.columns = [str(c) for c in chunk.columns]
+            try:
+                chunk_schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                chunk_schema = pa.schema([(c, pa.string()) for c in chunk.columns])
+            schema = chunk_schema if schema is None else pa.schema(
+                [pa.field(f.name, _promote(f.type, chunk_schema.field(f.name).type)) for f in schema])
+    columns = [str(c) for c in dtypes]
+
+    if target:
+        if schema is None:  # header only
+            pq.write_table(pa.table({c: pa.array([], pa.string()) for c in columns}), target)
+        else:
+            schema = pa.schema([pa.field(f.name, pa.string() if pa.types.is_null(f.type) else f.type) for f in schema])
+            # Re-read text columns as text so values keep their original spelling ("4", not "4.0")
+            text = {f.name: str for f in schema if pa.types.is_string(f.type)}
+            with pq.ParquetWriter(target, schema) as writer:
+                for chunk in pd.read_csv(source, chunksize=chunksize, low_memory=False, dtype=text):
+                    chunk.columns = [str(c) for c in chunk.columns]
+                    writer.write_table(_chunk_table(chunk, schema), row_group_size=row_group_size)
+    return {"rows": rows, "columns": columns, "dtypes": {str(c): t for c, t in dtypes.items()}}
+
+class DatasetCache:
+    """
+    Content-addressed Parquet cache for uploads.
+        <root>/<sha256>.parquet   columnar copy (row groups of `row_group_size`)
+        <root>/<sha256>.json      rows / columns / dtypes / source metadata
+        <root>/names.json         upload filename -> sha256
+    """
+
+    def __init__(self, upload_dir: Path, row_group_size: int = 131072, parse_workers: int = 2,
+                 chunksize: int = 200000):
+        self.upload_dir = Path(upload_dir)
+        self.root = self.upload_dir / ".cache"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.parse_workers = parse_workers
+        self.chunksize = chunksize
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._names_path = self.root / "names.json"
+        self._lock = threading.Lock()
+        self._names: Dict[str, str] = {}
+        if self._names_path.exists():
+            try:
+                self._names = json.loads(self._names_path.read_text())
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"⚠️ Dataset name index unreadable, starting empty: {e}")
+        self.stats = {"ingested": 0, "dedupe_hits": 0, "loads": 0}
+
+    def _parquet_path(self, digest: str) -> Path:
+        return self.root / f"{digest}.parquet"
+
+    def _meta_path(self, digest: str) -> Path:
+        return self.root / f"{digest}.json"
+
+    def _save_names(self):
+        tmp = self._names_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._names))
+        os.replace(tmp, self._names_path)
+
+    # ========================================================================
+    # INGEST
+    # ========================================================================
+    def ingest(self, path: Path, filename: Optional[str] = None, digest: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Register an uploaded file under `filename` and make sure its Parquet copy exists.
+        Blocking (hashing + waiting on the parse pool) - call via asyncio.to_thread.
+        Pass `digest` when the hash was already computed while receiving the upload.
+        """
+        path = Path(path)
+        filename = filename or path.name
+        digest = digest or file_digest(path)
+
+        meta = self.metadata(digest)
+        cached = meta is not None and (not PARQUET_AVAILABLE or self._parquet_path(digest).exists())
+        if cached:
+            self.stats["dedupe_hits"] += 1
+        else:
+            started = time.perf_counter()
+            target = self._parquet_path(digest)
+            tmp = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp") if PARQUET_AVAILABLE else None
+            try:
+                parsed = self._executor().submit(
+                    convert_upload, str(path), str(tmp) if tmp else None, self.row_group_size, self.chunksize
+                ).result()
+                if tmp:
+                    os.replace(tmp, target)
+            finally:
+                if tmp and tmp.exists():
+                    tmp.unlink()
+            meta = {
+                "hash": digest,
+                "source": filename,
+                "size": path.stat().st_size,
+                **parsed,
+                "created": time.time(),
+            }
+            tmp = self._meta_path(digest).with_suffix(".tmp")
+            tmp.write_text(json.dumps(meta))
+            os.replace(tmp, self._meta_path(digest))
+            self.stats["ingested"] += 1
+            logger.info(f"📦 Cached {filename} ({meta['rows']} rows) in {time.perf_counter() - started:.2f}s")
+
+        with self._lock:
+            if self._names.get(filename) != digest:
+                self._names[filename] = digest
+                self._save_names()
+        return {**meta, "cached": cached}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Parsing is CPU-bound pandas work; a process pool keeps it off the kernel's GIL
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ========================================================================
+    # LOOKUP
+    # ========================================================================
+    def resolve(self, filename: str) -> Optional[str]:
+        """Content hash for an uploaded filename, ingesting pre-cache uploads lazily"""
+        digest = self._names.get(filename)
+        if digest is not None and self.metadata(digest) is not None:
+            return digest
+        raw = self.upload_dir / filename
+        if raw.exists():
+            return self.ingest(raw, filename)["hash"]
+        return None
+
+    def metadata(self, digest: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._meta_path(digest).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def load(self, filename: str, columns: Optional[List[str]] = None, filters: Optional[List] = None) -> pd.DataFrame:
+        """
+        DataFrame for an upload, reading only `columns` from the memory-mapped Parquet.
+        `filters` (pyarrow DNF) are pushed into the reader; they are ignored without pyarrow.
+        """
+        digest = self.resolve(filename)
+        if digest is None:
+            raise FileNotFoundError(f"File {filename} not found. Please upload it first.")
+        if columns:
+            known = set(self.metadata(digest)["columns"])
+            missing = [c for c in columns if c not in known]
+            if missing:
+                raise ValueError(f"Unknown column(s): {', '.join(missing)}")
+        self.stats["loads"] += 1
+        if not PARQUET_AVAILABLE:
+            return read_source(self.upload_dir / filename, columns)
+        table = pq.read_table(self._parquet_path(digest), columns=columns, filters=filters, memory_map=True)
+        return table.to_pandas()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "datasets": len(set(self._names.values())),
+            "names": len(self._names),
+            "parquet": PARQUET_AVAILABLE,
+        }
@@ -1,15 +1,87 @@
-﻿# src/workers/embed.py
-from sentence_transformers import SentenceTransformer
-import sys
+﻿# backend/embed.py
+"""
+Embedding CLI on top of the shared EmbeddingService (model loaded once per run)
+    python embed.py "some text"                         one embedding as a JSON list
+    python embed.py --batch texts.txt --out emb.npy     one text per line ("-" = stdin),
+                                                        written as an (n, d) float32 .npy
+Without --out, batch mode prints one JSON list per line.
+"""
+import argparse
 import json
+import shutil
+import sys
+import tempfile
+from typing import Iterable, Iterator, List, TextIO, Tuple
+
+import numpy as np
 
-# Load model once (this is cached)
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from embedding_service import embedding_service
 
 def generate_embedding(text):
-    embedding = model.encode(text).tolist()
-    print(json.dumps(embedding))
+    embedding = embedding_service.encode_batch([text])[0]
+    print(json.dumps(embedding.tolist()))
+
+def _batches(source: Iterable[str], chunk: int) -> Iterator[List[str]]:
+    """Non-blank lines of `source`, `chunk` at a time"""
+    batch = []
+    for line in source:
+        if line.strip():
+            batch.append(line.rstrip("\n"))
+            if len(batch) == chunk:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def _embed_to_npy(source: TextIO, out: str, chunk: int) -> Tuple[int, Tuple[int, ...]]:
+    """Count the lines, then encode chunk by chunk straight into a memory-mapped .npy"""
+    count = sum(1 for line in source if line.strip())
+    source.seek(0)
+    matrix, row = None, 0
+    for batch in _batches(source, chunk):
+        vectors = embedding_service.encode_batch(batch)
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=(count, vectors.shape[1]))
+        matrix[row:row + len(vectors)] = vectors
+        row += len(vectors)
+    if matrix is None:
+        np.save(out, np.empty((0, embedding_service.dim or 0), dtype=np.float32))
+        return 0, (0, embedding_service.dim or 0)
+    matrix.flush()
+    shape = matrix.shape
+    del matrix
+    return count, shape
+
+def embed_file(path: str, out: str = None, chunk: int = 4096):
+    """Encode a text file in chunks, streaming both the input and the output, so memory
+    stays bounded for large inputs (stdin is spooled to a temp file when --out needs a count)"""
+    if not out:
+        with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as source:
+            for batch in _batches(source, chunk):
+                for vector in embedding_service.encode_batch(batch):
+                    print(json.dumps(vector.tolist()))
+        return
+    if path == "-":
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            shutil.copyfileobj(sys.stdin, spool)
+            spool.seek(0)
+            count, shape = _embed_to_npy(spool, out, chunk)
+    else:
+        with open(path, encoding="utf-8") as source:
+            count, shape = _embed_to_npy(source, out, chunk)
+    stats = embedding_service.get_stats()
+    print(f"✅ {count} texts -> {out} {shape} ({stats['encoded']} encoded, "
+          f"{count - stats['encoded']} duplicates, {stats['encode_seconds']}s)", file=sys.stderr)
 
 if __name__ == "__main__":
-    text = sys.argv[1]
-    generate_embedding(text)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("text", nargs="?", help="text to embed")
+    parser.add_argument("--batch", metavar="FILE", help="embed every line of FILE")
+    parser.add_argument("--out", metavar="NPY", help="write batch embeddings to a .npy file")
+    args = parser.parse_args()
+    if args.batch:
+        embed_file(args.batch, args.out)
+    elif args.text is not None:
+        generate_embedding(args.text)
+    else:
+        parser.error("give a text or --batch FILE")
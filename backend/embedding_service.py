@@ -0,0 +1,185 @@
+# backend/embedding_service.py
+"""
+Embedding Service - One long-lived sentence-transformer shared by the whole process
+Concurrent embed() calls are collected for up to `max_wait_ms` (or until `max_batch`
+texts are waiting) and encoded as one batch; results are float32 numpy arrays and are
+memoized in an LRU keyed by a hash of the text.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import EMBED_MODEL, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS, EMBED_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Checked without importing: sentence-transformers pulls in torch, which is only
+# loaded once something actually needs the model (see _load)
+EMBEDDINGS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+class EmbeddingService:
+    """
+    encode_batch(texts) -> (n, d) float32 (blocking, cache-aware) for threads and CLIs;
+    await embed(text) / embed_many(texts) from async code to join the micro-batch.
+    `encoder` replaces the SentenceTransformer (texts -> array), e.g. in tests.
+    """
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", max_batch: int = 64, max_wait_ms: float = 5.0,
+                 cache_size: int = 10000, normalize: bool = False,
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+        self.normalize = normalize
+        self._encoder = encoder
+        self.dim: Optional[int] = None
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()          # cache + stats
+        self._model_lock = threading.Lock()    # one encode at a time on the shared model
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "batched_texts": 0, "encoded": 0,
+                      "cache_hits": 0, "cache_misses": 0, "encode_seconds": 0.0, "load_seconds": 0.0}
+
+    # ========================================================================
+    # MODEL
+    # ========================================================================
+    def _load(self) -> Callable[[List[str]], np.ndarray]:
+        if self._encoder is None:
+            if not EMBEDDINGS_AVAILABLE:
+                raise RuntimeError("sentence-transformers is not installed (pip install sentence-transformers)")
+            started = time.perf_counter()
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name)
+            self._encoder = lambda texts: model.encode(texts, batch_size=self.max_batch, convert_to_numpy=True,
+                                                       normalize_embeddings=self.normalize)
+            self.stats["load_seconds"] = round(time.perf_counter() - started, 2)
+            logger.info(f"🧠 Embedding model {self.model_name} loaded in {self.stats['load_seconds']}s")
+        return self._encoder
+
+    def load(self) -> "EmbeddingService":
+        with self._model_lock:
+            self._load()
+        return self
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with self._model_lock:
+            started = time.perf_counter()
+            vectors = np.asarray(self._load()(texts), dtype=np.float32)
+            self.stats["encode_seconds"] += time.perf_counter() - started
+        self.stats["encoded"] += len(texts)
+        self.dim = vectors.shape[1]
+        return vectors
+
+    # ========================================================================
+    # BLOCKING API
+    # ========================================================================
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings for `texts` as one (n, d) float32 array; only uncached, distinct texts are encoded"""
+        texts = list(texts)
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: "OrderedDict[bytes, Tuple[str, List[int]]]" = OrderedDict()
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = text_key(text)
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    rows[i] = vector
+                    self.stats["cache_hits"] += 1
+                else:
+                    missing.setdefault(key, (text, []))[1].append(i)
+                    self.stats["cache_misses"] += 1
+        if missing:
+            vectors = self._encode([text for text, _ in missing.values()])
+            with self._lock:
+                for (key, (_, positions)), vector in zip(missing.items(), vectors):
+                    vector = vector.copy()
+                    vector.flags.writeable = False  # shared with the cache
+                    for i in positions:
+                        rows[i] = vector
+                    if self.cache_size > 0:
+                        self._cache[key] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.vstack(rows)
+
+    # ========================================================================
+    # ASYNC MICRO-BATCHING
+    # ========================================================================
+    async def embed(self, text: str) -> np.ndarray:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        self.stats["requests"] += 1
+        self.stats["texts"] += len(texts)
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        texts = [text for group, _ in batch for text in group]
+        self.stats["batches"] += 1
+        self.stats["batched_texts"] += len(texts)
+        try:
+            vectors = await asyncio.to_thread(self.encode_batch, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for group, future in batch:
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(group)])
+            offset += len(group)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            **self.stats,
+            "encode_seconds": round(self.stats["encode_seconds"], 3),
+            "mean_batch": round(self.stats["batched_texts"] / self.stats["batches"], 2) if self.stats["batches"] else 0.0,
+            "cache_hit_rate": round(self.stats["cache_hits"] / lookups, 4) if lookups else 0.0,
+            "cache_size": len(self._cache),
+            "model": self.model_name,
+            "dim": self.dim,
+            "loaded": self._encoder is not None,
+        }
+
+# Global service (the model loads on first use)
+embedding_service = EmbeddingService(EMBED_MODEL, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS, EMBED_CACHE_SIZE)
@@ -0,0 +1,586 @@
+# backend/file_index.py
+"""
+File Index - Local trigram filename index for instant substring / glob / prefix search
+Layout (a gen-NNNNNN directory of .npy files + meta.json, named by the CURRENT file and
+opened with mmap - nothing is parsed):
+    names, lnames      UTF-8 blobs of file names (as-is / lowercased), NUL-separated
+    name_starts, lname_starts, dirs, dir_starts
+    dir_id, size, mtime_ns, ext    per-file columns (ext indexes meta["extensions"])
+    tri_keys, tri_starts, postings byte-trigram -> sorted file ids over lowercased names
+A query intersects the posting lists of its literal trigrams, then verifies candidates
+newest-first until `limit` hits, so cost tracks the answer rather than the index size.
+
+Live changes (fs_watcher.py) go into a small in-memory overlay - changed/new entries
+plus tombstones over the mapped base - which compaction folds into a new generation.
+
+    python file_index.py build [ROOT ...]       crawl and (re)write the index
+    python file_index.py search "*.xlsx"        query it
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from config import FILE_INDEX_PATH
+from fs_crawler import CRAWL_THREADS, DEFAULT_SKIP, FileEntry, FsCrawler
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+ARRAYS = ("names", "name_starts", "lnames", "lname_starts", "dirs", "dir_starts",
+          "dir_id", "size", "mtime_ns", "ext", "tri_keys", "tri_starts", "postings")
+WILDCARDS = re.compile(r"[*?\[]")
+EXTENSION_GLOB = re.compile(r"^\*(\.[^*?\[\]/\\]+)$")
+
+# (base-row candidates or None for all, per-row check or None if exact, overlay entry check)
+Plan = Tuple[Optional[np.ndarray], Optional[Callable[[int], bool]], Callable[[FileEntry], bool]]
+# (overlay entries, tombstone mask) handed to compacted()
+Snapshot = Tuple[Dict[str, FileEntry], Optional[np.ndarray]]
+
+def _encode(text: str) -> bytes:
+    return text.encode("utf-8", "surrogatepass")  # keeps undecodable (surrogateescape) names round-trippable
+
+def _blob(strings: List[str]):
+    """NUL-joined UTF-8 blob + start offset of each string (plus the end)"""
+    encoded = [_encode(s) for s in strings]
+    lengths = np.fromiter((len(b) + 1 for b in encoded), dtype=np.int64, count=len(encoded))
+    starts = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+    return np.frombuffer(b"\0".join(encoded) + b"\0", dtype=np.uint8) if encoded else np.zeros(0, np.uint8), starts
+
+def _current_generation(root: Path) -> Optional[str]:
+    try:
+        return (root / "CURRENT").read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+def _record(name: str, path: str, size: int, mtime_ns: int) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'path': path,
+        'size': size,
+        'size_mb': size / (1024 * 1024),
+        'modified': datetime.fromtimestamp(mtime_ns / 1e9).isoformat()[:10],
+    }
+
+def _trigram_key(b: bytes, i: int) -> int:
+    return (b[i] << 16) | (b[i + 1] << 8) | b[i + 2]
+
+def _postings(lnames: np.ndarray, starts: np.ndarray):
+    """Vectorized: every in-name byte trigram -> sorted unique file ids"""
+    if len(lnames) < 3:
+        return np.zeros(0, np.uint32), np.zeros(1, np.int64), np.zeros(0, np.uint32)
+    b = lnames.astype(np.uint32)
+    keys = (b[:-2] << 16) | (b[1:-1] << 8) | b[2:]
+    valid = (lnames[:-2] != 0) & (lnames[1:-1] != 0) & (lnames[2:] != 0)
+    positions = np.nonzero(valid)[0]
+    file_ids = np.searchsorted(starts, positions, side="right") - 1
+    # (trigram << 32 | file id): one sort orders by trigram, then file id; adjacent repeats are dupes
+    pairs = (keys[positions].astype(np.uint64) << np.uint64(32)) | file_ids.astype(np.uint64)
+    pairs.sort()
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    tri = (pairs >> np.uint64(32)).astype(np.uint32)
+    firsts = np.flatnonzero(np.concatenate(([True], tri[1:] != tri[:-1])))
+    tri_starts = np.append(firsts, len(tri)).astype(np.int64)
+    return tri[firsts], tri_starts, (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+class FileIndexBuilder:
+    """add(directory, files) per crawled directory, then build() -> FileIndex"""
+
+    def __init__(self):
+        self.dirs: List[str] = []
+        self.names: List[str] = []
+        self.dir_ids: List[int] = []
+        self.sizes: List[int] = []
+        self.mtimes: List[int] = []
+        self._dir_lookup: Dict[str, int] = {}
+
+    def add(self, directory: str, files: Iterable[FileEntry]):
+        for entry in files:
+            self.add_file(directory, entry.name, entry.size, entry.mtime_ns)
+        self._dir_id(directory)
+
+    def add_file(self, directory: str, name: str, size: int, mtime_ns: int):
+        self.names.append(name)
+        self.dir_ids.append(self._dir_id(directory))
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+
+    def _dir_id(self, directory: str) -> int:
+        dir_id = self._dir_lookup.get(directory)
+        if dir_id is None:
+            dir_id = self._dir_lookup[directory] = len(self.dirs)
+            self.dirs.append(directory)
+        return dir_id
+
+    def build(self, roots: List[str] = ()) -> "FileIndex":
+        started = time.perf_counter()
+        # Rows grouped by directory, so one directory's files are a contiguous dir_id range
+        order = np.argsort(np.array(self.dir_ids, dtype=np.uint32), kind="stable")
+        if len(order) and np.any(np.diff(order) != 1):
+            self.names = [self.names[i] for i in order]
+            self.dir_ids = [self.dir_ids[i] for i in order]
+            self.sizes = [self.sizes[i] for i in order]
+            self.mtimes = [self.mtimes[i] for i in order]
+        ext_ids = {"": 0}
+        ext = np.fromiter((ext_ids.setdefault(os.path.splitext(n)[1].lower(), len(ext_ids)) for n in self.names),
+                          dtype=np.uint32, count=len(self.names))
+        extensions = sorted(ext_ids, key=ext_ids.get)
+        names, name_starts = _blob(self.names)
+        lnames, lname_starts = _blob([n.lower() for n in self.names])
+        dirs, dir_starts = _blob(self.dirs)
+        tri_keys, tri_starts, postings = _postings(lnames, lname_starts)
+        arrays = {
+            "names": names, "name_starts": name_starts, "lnames": lnames, "lname_starts": lname_starts,
+            "dirs": dirs, "dir_starts": dir_starts,
+            "dir_id": np.array(self.dir_ids, dtype=np.uint32), "size": np.array(self.sizes, dtype=np.int64),
+            "mtime_ns": np.array(self.mtimes, dtype=np.int64), "ext": ext,
+            "tri_keys": tri_keys, "tri_starts": tri_starts, "postings": postings,
+        }
+        meta = {"version": FORMAT_VERSION, "files": len(self.names), "dirs": len(self.dirs),
+                "extensions": extensions, "roots": list(roots), "built": time.time(),
+                "build_seconds": round(time.perf_counter() - started, 2)}
+        return FileIndex(arrays, meta)
+
+class FileIndex:
+    """FileIndex.open(path) (memory-mapped) or FileIndexBuilder().build(); then search(query, limit)"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], path: Optional[Path] = None):
+        self._set_base(arrays, meta, path)
+        self.stats = {"queries": 0, "query_ms": 0.0, "candidates": 0, "verified": 0,
+                      "applied_upserts": 0, "applied_deletes": 0, "compactions": 0}
+
+    def _set_base(self, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], path: Optional[Path]):
+        self.arrays = arrays
+        self.meta = meta
+        self.path = path
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self._ext_ids = {e: i for i, e in enumerate(meta["extensions"])}
+        self._dir_prefixes: Optional[List[str]] = None  # lowercased "dir/" strings, built on first path query
+        self._dir_lookup: Optional[Dict[str, int]] = None  # dir string -> dir id, built on first update
+        self._dir_bounds: Optional[np.ndarray] = None  # first row of each dir id (+ end), built on first update
+        # Overlay: live entries by path (and by directory), tombstones over base rows
+        self._delta: Dict[str, FileEntry] = {}
+        self._delta_dirs: Dict[str, Set[str]] = {}
+        self._dead: Optional[np.ndarray] = None
+        self._dead_count = 0
+        self._journal: Optional[List[Tuple[List[FileEntry], List[str], List[str]]]] = None
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    # ========================================================================
+    # STORAGE
+    # ========================================================================
+    def save(self, path=FILE_INDEX_PATH) -> Path:
+        """Write a new generation, then repoint CURRENT at it, so readers never see a partial
+        index; older generations are removed unless still mapped (Windows), then next time"""
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        current = _current_generation(root)
+        generation = f"gen-{int(current[4:]) + 1 if current else 1:06d}"
+        target = root / generation
+        shutil.rmtree(target, ignore_errors=True)
+        target.mkdir()
+        for name in ARRAYS:
+            np.save(target / f"{name}.npy", np.ascontiguousarray(self.arrays[name]))
+        (target / "meta.json").write_text(json.dumps(self.meta), encoding="utf-8")
+        (root / "CURRENT.tmp").write_text(generation, encoding="utf-8")
+        os.replace(root / "CURRENT.tmp", root / "CURRENT")
+        for old in root.glob("gen-*"):
+            if old.name != generation:
+                shutil.rmtree(old, ignore_errors=True)
+        return root
+
+    @classmethod
+    def open(cls, path=FILE_INDEX_PATH) -> "FileIndex":
+        root = Path(path)
+        generation = _current_generation(root)
+        if generation is None:
+            raise FileNotFoundError(f"No file index at {root}")
+        directory = root / generation
+        meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"File index {directory} has format {meta.get('version')}, expected {FORMAT_VERSION}")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        return cls(arrays, meta, directory)
+
+    @classmethod
+    def load(cls, path=FILE_INDEX_PATH) -> Optional["FileIndex"]:
+        """open() if an index has been built at `path`, else None"""
+        if _current_generation(Path(path)) is None:
+            return None
+        try:
+            index = cls.open(path)
+            logger.info(f"🗂️ File index loaded: {len(index):,} files from {path}")
+            return index
+        except Exception as e:
+            logger.warning(f"⚠️ Could not open file index {path}: {e}")
+            return None
+
+    # ========================================================================
+    # ROWS
+    # ========================================================================
+    def _string(self, blob: np.ndarray, starts: np.ndarray, i: int) -> str:
+        return bytes(blob[starts[i]:starts[i + 1] - 1]).decode("utf-8", "surrogatepass")
+
+    def name(self, i: int) -> str:
+        return self._string(self.names, self.name_starts, i)
+
+    def lname(self, i: int) -> str:
+        return self._string(self.lnames, self.lname_starts, i)
+
+    def dir_string(self, d: int) -> str:
+        return self._string(self.dirs, self.dir_starts, d)
+
+    def path_of(self, i: int) -> str:
+        return os.path.join(self.dir_string(int(self.dir_id[i])), self.name(i))
+
+    def record(self, i: int) -> Dict[str, Any]:
+        return _record(self.name(i), self.path_of(i), int(self.size[i]), int(self.mtime_ns[i]))
+
+    # ========================================================================
+    # CANDIDATES
+    # ========================================================================
+    def _posting(self, key: int) -> np.ndarray:
+        j = int(np.searchsorted(self.tri_keys, key))
+        if j == len(self.tri_keys) or self.tri_keys[j] != key:
+            return np.zeros(0, np.uint32)
+        return self.postings[self.tri_starts[j]:self.tri_starts[j + 1]]
+
+    def _scan(self, literal: bytes) -> np.ndarray:
+        """Files whose lowercased name contains a 1-2 byte literal (vectorized blob scan)"""
+        hits = self.lnames[:len(self.lnames) - len(literal) + 1] == literal[0]
+        for k in range(1, len(literal)):
+            hits &= self.lnames[k:len(self.lnames) - len(literal) + k + 1] == literal[k]
+        positions = np.nonzero(hits)[0]
+        return np.unique(np.searchsorted(self.lname_starts, positions, side="right") - 1)
+
+    def candidates(self, literals: List[str]) -> Optional[np.ndarray]:
+        """File ids whose names may contain every literal; None = no filter (all files)"""
+        encoded = [_encode(lit) for lit in literals if lit]
+        keys = {_trigram_key(b, i) for b in encoded for i in range(len(b) - 2)}
+        if keys:
+            lists = sorted((self._posting(k) for k in keys), key=len)
+            result = lists[0]
+            for other in lists[1:]:
+                if not len(result):
+                    break
+                result = np.intersect1d(result, other, assume_unique=True)
+            return result
+        if encoded:
+            return self._scan(max(encoded, key=len))
+        return None
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+    def _collect(self, ids: Optional[np.ndarray], accept, limit: int) -> List[int]:
+        """Verify candidates newest-first until `limit` accepted; accept=None means exact"""
+        if ids is None:
+            ids = np.arange(len(self), dtype=np.int64)
+        if self._dead_count:
+            ids = ids[~self._dead[ids]]
+        self.stats["candidates"] += len(ids)
+        if not len(ids):
+            return []
+        mtimes = np.asarray(self.mtime_ns[ids])
+        if accept is None and len(ids) > limit:
+            top = np.argpartition(-mtimes, limit - 1)[:limit]
+            ordered = ids[top[np.argsort(-mtimes[top], kind="stable")]]
+            return [int(i) for i in ordered]
+        ordered = ids[np.argsort(-mtimes, kind="stable")]
+        if accept is None:
+            return [int(i) for i in ordered]
+        found = []
+        for i in ordered:
+            self.stats["verified"] += 1
+            if accept(int(i)):
+                found.append(int(i))
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _path_candidates(self, text: str) -> np.ndarray:
+        """Files whose "dir/name" may contain `text` (which has a "/"): it lies inside the
+        directory part, or the directory ends with its head and the name starts with its tail"""
+        if self._dir_prefixes is None:
+            self._dir_prefixes = []
+            for d in range(len(self.dir_starts) - 1):
+                prefix = self.dir_string(d).lower().replace("\\", "/")
+                self._dir_prefixes.append(prefix if prefix.endswith("/") else prefix + "/")
+        head = text.rpartition("/")[0] + "/"
+        dirs = [d for d, prefix in enumerate(self._dir_prefixes) if text in prefix or prefix.endswith(head)]
+        return np.nonzero(np.isin(np.asarray(self.dir_id), dirs))[0]
+
+    def substring(self, text: str) -> Plan:
+        text = text.lower()
+        if "/" in text or "\\" in text:
+            text = text.replace("\\", "/")
+            on_path = lambda path: text in path.lower().replace("\\", "/")
+            return self._path_candidates(text), lambda i: on_path(self.path_of(i)), lambda e: on_path(e.path)
+        exact = len(_encode(text)) == 3  # a trigram's posting list is exactly its matches
+        return (self.candidates([text]), None if exact else (lambda i: text in self.lname(i)),
+                lambda e: text in e.name.lower())
+
+    def glob(self, pattern: str) -> Plan:
+        pattern = pattern.lower()
+        on_path = "/" in pattern or "\\" in pattern
+        if on_path:
+            pattern = pattern.replace("\\", "/")
+        regex = re.compile(fnmatch.translate(pattern))
+        if on_path:
+            matches = lambda path: regex.match(path.lower().replace("\\", "/"))
+            # "*" also matches "/", so only the trailing literal run is known to be in the name
+            trailing = re.split(r"[*?\]]", pattern)[-1].rpartition("/")[2]
+            return self.candidates([trailing]), lambda i: matches(self.path_of(i)), lambda e: matches(e.path)
+        extension = EXTENSION_GLOB.match(pattern)
+        if extension and extension.group(1) in self._ext_ids:
+            return (np.nonzero(np.asarray(self.ext) == self._ext_ids[extension.group(1)])[0], None,
+                    lambda e: regex.match(e.name.lower()))
+        # Literal runs (brackets and wildcards removed) feed the trigram filter
+        literals = re.split(r"[*?\0]", re.sub(r"\[[^\]]*\]", "\0", pattern))
+        return self.candidates(literals), lambda i: regex.match(self.lname(i)), lambda e: regex.match(e.name.lower())
+
+    def prefix(self, text: str) -> Plan:
+        return self.glob(glob.escape(text) + "*")
+
+    def search(self, query: str, limit: int = 50, kind: str = "auto") -> List[Dict[str, Any]]:
+        """kind: auto (glob if the query has * ? [, else substring) | substring | glob | prefix"""
+        started = time.perf_counter()
+        if kind == "auto":
+            kind = "glob" if WILDCARDS.search(query) else "substring"
+        ids, accept, matches = {"substring": self.substring, "glob": self.glob, "prefix": self.prefix}[kind](query)
+        hits = [(int(self.mtime_ns[i]), self.record(i)) for i in self._collect(ids, accept, limit)]
+        if self._delta:
+            hits.extend((e.mtime_ns, _record(e.name, e.path, e.size, e.mtime_ns))
+                        for e in self._delta.values() if matches(e))
+            hits.sort(key=lambda hit: -hit[0])
+        self.stats["queries"] += 1
+        self.stats["query_ms"] += (time.perf_counter() - started) * 1000
+        return [record for _, record in hits[:limit]]
+
+    # ========================================================================
+    # LIVE UPDATES
+    # ========================================================================
+    def _base_dirs(self) -> Dict[str, int]:
+        if self._dir_lookup is None:
+            self._dir_lookup = {self.dir_string(d): d for d in range(len(self.dir_starts) - 1)}
+        return self._dir_lookup
+
+    def _dir_id(self, directory: str) -> Optional[int]:
+        return self._base_dirs().get(directory)
+
+    def _rows(self, directory: str) -> range:
+        """Base rows of one directory (rows are grouped by directory)"""
+        d = self._dir_id(directory)
+        if d is None:
+            return range(0)
+        if self._dir_bounds is None:
+            # One pass over the mapped column (a per-call searchsorted with a Python int
+            # would convert the whole uint32 column each time)
+            ids = np.arange(len(self.dir_starts), dtype=np.uint32)
+            self._dir_bounds = np.searchsorted(self.dir_id, ids, side="left")
+        return range(int(self._dir_bounds[d]), int(self._dir_bounds[d + 1]))
+
+    def _row_map(self, directory: str) -> Dict[str, int]:
+        """{name: base row} for one directory, decoded from the blob in one slice
+        (tombstoned rows included - callers check the mask)"""
+        span = self._rows(directory)
+        if not span:
+            return {}
+        blob = bytes(self.names[self.name_starts[span.start]:self.name_starts[span.stop]])
+        return {name.decode("utf-8", "surrogatepass"): span.start + k for k, name in enumerate(blob.split(b"\0")[:-1])}
+
+    def locate(self, path: str, maps: Optional[Dict[str, Dict[str, int]]] = None) -> Optional[int]:
+        """Live base row for `path`, if any; `maps` caches row maps across a batch"""
+        directory, name = os.path.split(path)
+        if maps is None:
+            rows = self._row_map(directory)
+        else:
+            rows = maps.get(directory)
+            if rows is None:
+                rows = maps[directory] = self._row_map(directory)
+        i = rows.get(name)
+        if i is None or (self._dead is not None and self._dead[i]):
+            return None
+        return i
+
+    def _kill(self, i: Optional[int]):
+        if i is None:
+            return
+        if self._dead is None:
+            self._dead = np.zeros(len(self), dtype=bool)
+        if not self._dead[i]:
+            self._dead[i] = True
+            self._dead_count += 1
+
+    def _kill_rows(self, rows: range):
+        if not rows:
+            return
+        if self._dead is None:
+            self._dead = np.zeros(len(self), dtype=bool)
+        span = self._dead[rows.start:rows.stop]
+        self._dead_count += int(len(span) - np.count_nonzero(span))
+        span[:] = True
+
+    def _forget(self, path: str):
+        if self._delta.pop(path, None) is not None:
+            siblings = self._delta_dirs.get(os.path.dirname(path))
+            if siblings is not None:
+                siblings.discard(path)
+                if not siblings:
+                    del self._delta_dirs[os.path.dirname(path)]
+
+    def entries_in(self, directory: str) -> Dict[str, Tuple[int, int]]:
+        """Files currently indexed directly in `directory`: path -> (size, mtime_ns)"""
+        known = {}
+        for name, i in self._row_map(directory).items():
+            if self._dead is None or not self._dead[i]:
+                known[os.path.join(directory, name)] = (int(self.size[i]), int(self.mtime_ns[i]))
+        for path in self._delta_dirs.get(directory, ()):
+            entry = self._delta[path]
+            known[path] = (entry.size, entry.mtime_ns)
+        return known
+
+    def diff_dir(self, directory: str, files: Iterable[FileEntry]) -> Tuple[List[FileEntry], List[str]]:
+        """(upserts, deletes) that bring `directory` in line with a fresh listing"""
+        known = self.entries_in(directory)
+        upserts = []
+        for entry in files:
+            if known.pop(entry.path, None) != (entry.size, entry.mtime_ns):
+                upserts.append(entry)
+        return upserts, list(known)
+
+    def indexed_dirs(self, roots: Sequence[str]) -> List[str]:
+        """Indexed directories at or below any of `roots` (one pass over the directory table)"""
+        exact = set(roots)
+        prefixes = tuple(root.rstrip("\\/") + os.sep for root in roots)
+        return [d for d in set(self._base_dirs()) | set(self._delta_dirs) if d in exact or d.startswith(prefixes)]
+
+    def apply(self, upserts: Iterable[FileEntry] = (), deletes: Iterable[str] = (), deleted_dirs: Iterable[str] = ()):
+        """Record changes in the overlay; deleted_dirs drop every file at or below each directory"""
+        upserts, deletes, deleted_dirs = list(upserts), list(deletes), list(deleted_dirs)
+        if self._journal is not None:
+            self._journal.append((upserts, deletes, deleted_dirs))
+        for d in self.indexed_dirs(deleted_dirs) if deleted_dirs else ():
+            self._kill_rows(self._rows(d))
+            for path in list(self._delta_dirs.get(d, ())):
+                self._forget(path)
+        maps: Dict[str, Dict[str, int]] = {}  # one decode per directory per batch
+        for path in deletes:
+            self._forget(path)
+            self._kill(self.locate(path, maps))
+        for entry in upserts:
+            if entry.path not in self._delta:
+                self._kill(self.locate(entry.path, maps))
+            self._delta[entry.path] = entry
+            self._delta_dirs.setdefault(os.path.dirname(entry.path), set()).add(entry.path)
+        self.stats["applied_upserts"] += len(upserts)
+        self.stats["applied_deletes"] += len(deletes)
+
+    @property
+    def pending_changes(self) -> int:
+        """Overlay size: live entries plus tombstoned base rows"""
+        return len(self._delta) + self._dead_count
+
+    # ========================================================================
+    # COMPACTION
+    # ========================================================================
+    def snapshot(self) -> Snapshot:
+        """Copy the overlay for compacted() and journal changes made from here on"""
+        self._journal = []
+        return dict(self._delta), None if self._dead is None else self._dead.copy()
+
+    def compacted(self, snapshot: Snapshot) -> "FileIndex":
+        """New in-memory index = live base rows + snapshot overlay (safe to run in a thread)"""
+        delta, dead = snapshot
+        builder = FileIndexBuilder()
+        alive = np.arange(len(self)) if dead is None else np.flatnonzero(~dead)
+        dir_cache: Dict[int, str] = {}
+        for i in alive:
+            d = int(self.dir_id[i])
+            directory = dir_cache.get(d)
+            if directory is None:
+                directory = dir_cache[d] = self.dir_string(d)
+            builder.add_file(directory, self.name(int(i)), int(self.size[i]), int(self.mtime_ns[i]))
+        for entry in delta.values():
+            builder.add_file(os.path.dirname(entry.path), entry.name, entry.size, entry.mtime_ns)
+        return builder.build(self.meta.get("roots", []))
+
+    def adopt(self, other: "FileIndex"):
+        """Swap in a compacted base and replay the changes journaled since snapshot()"""
+        journal = self._journal or []
+        self._set_base(other.arrays, other.meta, other.path)
+        for changes in journal:
+            self.apply(*changes)
+        self.stats["compactions"] += 1
+
+    def abandon_snapshot(self):
+        self._journal = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        queries = self.stats["queries"]
+        return {
+            **self.stats,
+            "query_ms": round(self.stats["query_ms"], 2),
+            "mean_query_ms": round(self.stats["query_ms"] / queries, 3) if queries else 0.0,
+            "files": len(self) - self._dead_count + len(self._delta),
+            "overlay_entries": len(self._delta),
+            "tombstones": self._dead_count,
+            "trigrams": len(self.tri_keys),
+            "postings": len(self.postings),
+            "built": self.meta.get("built"),
+            "roots": self.meta.get("roots", []),
+            "mapped": self.path is not None,
+        }
+
+def build(roots: List[str], skip=DEFAULT_SKIP, threads: int = CRAWL_THREADS) -> FileIndex:
+    builder = FileIndexBuilder()
+    crawler = FsCrawler(roots, skip=skip, threads=threads)
+    for listing in crawler.crawl():
+        if listing.error is None:
+            builder.add(listing.path, listing.files)
+    return builder.build(roots)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="crawl ROOTs (default: all drives) into the index")
+    build_cmd.add_argument("roots", nargs="*")
+    build_cmd.add_argument("--threads", type=int, default=CRAWL_THREADS)
+    search_cmd = sub.add_parser("search", help="query the index")
+    search_cmd.add_argument("query")
+    search_cmd.add_argument("--kind", choices=("auto", "substring", "glob", "prefix"), default="auto")
+    search_cmd.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--index", default=str(FILE_INDEX_PATH))
+    args = parser.parse_args()
+
+    if args.command == "build":
+        roots = args.roots or ([f"{d}:\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(f"{d}:\\")]
+                               if os.name == 'nt' else ['/'])
+        started = time.perf_counter()
+        index = build(roots, threads=args.threads)
+        index.save(args.index)
+        print(f"Indexed {len(index):,} files ({index.meta['dirs']:,} dirs, {len(index.tri_keys):,} trigrams) "
+              f"into {args.index} in {time.perf_counter() - started:.1f}s")
+        return
+    index = FileIndex.open(args.index)
+    for record in index.search(args.query, args.limit, args.kind):
+        print(f"{record['modified']}  {record['size']:>12,}  {record['path']}")
+    print(f"({index.get_stats()['mean_query_ms']} ms)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# backend/fs_crawler.py
+"""
+Filesystem Crawler - Parallel os.scandir walk shared by the indexer and live PC search
+Directories are work items on per-thread deques: a thread takes its own newest
+directory (depth-first, small frontier) and steals the oldest from another thread
+when it runs dry (shallow directories = big subtrees). File sizes and mtimes come
+from the DirEntry (free on Windows, one lstat on POSIX), never a second os.stat.
+
+Skip-list patterns are matched once per directory name as it is discovered; files
+are never checked. Results stream out one DirListing per directory through a
+bounded queue, so a slow consumer throttles the crawl instead of buffering a drive.
+"""
+import asyncio
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from config import CRAWL_THREADS, CRAWL_LOW_PRIORITY
+
+logger = logging.getLogger(__name__)
+
+# Directory names the indexers never descend into
+DEFAULT_SKIP = (
+    'windows', 'program files', '$recycle', 'system32',
+    'node_modules', '.git', 'cache', 'temp', 'tmp',
+    'appdata', 'winnt', 'msocache', 'config.msi',
+    'programdata', 'perflogs', 'recovery'
+)
+
+class FileEntry(NamedTuple):
+    path: str
+    name: str
+    size: int
+    mtime_ns: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+class DirListing(NamedTuple):
+    path: str
+    root: str                     # crawl root this directory was reached from
+    files: List[FileEntry]
+    error: Optional[OSError]      # set when the directory could not be listed
+
+_DONE = object()
+
+def lower_io_priority() -> bool:
+    """Best effort: make the calling thread yield disk (and CPU) to interactive work"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000  # low IO + memory priority
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+        tid = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, tid, 10)  # per-thread on Linux
+        try:
+            import psutil
+            if hasattr(psutil, "IOPRIO_CLASS_IDLE"):
+                psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE)
+        except ImportError:
+            pass
+        return True
+    except Exception:
+        return False
+
+class _WorkQueues:
+    """Per-thread deques of (root, directory) with stealing and termination detection"""
+
+    def __init__(self, threads: int):
+        self.deques: List[Deque[Tuple[str, str]]] = [deque() for _ in range(threads)]
+        self.cond = threading.Condition()
+        self.outstanding = 0
+        self.stopped = False
+        self.steals = 0
+
+    def push(self, owner: int, items: List[Tuple[str, str]]):
+        if not items:
+            return
+        with self.cond:
+            self.outstanding += len(items)
+            self.deques[owner].extend(items)
+            self.cond.notify(len(items))
+
+    def take(self, owner: int) -> Optional[Tuple[str, str]]:
+        with self.cond:
+            while not self.stopped:
+                if self.deques[owner]:
+                    return self.deques[owner].pop()
+                for i in range(1, len(self.deques)):
+                    victim = self.deques[(owner + i) % len(self.deques)]
+                    if victim:
+                        self.steals += 1
+                        return victim.popleft()
+                if self.outstanding == 0:
+                    return None
+                self.cond.wait()
+            return None
+
+    def done(self):
+        with self.cond:
+            self.outstanding -= 1
+            if self.outstanding == 0:
+                self.cond.notify_all()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+class FsCrawler:
+    """
+    Single-use: iterate crawl() from a thread, or `async for listing in stream()`.
+    `match(name)` keeps only matching files (and only those are stat'ed); directories
+    with no kept files are then not reported. stop() ends the crawl early.
+    """
+
+    def __init__(self, roots: Sequence[str], skip: Sequence[str] = (), threads: int = CRAWL_THREADS,
+                 match: Optional[Callable[[str], bool]] = None, low_priority: bool = CRAWL_LOW_PRIORITY,
+                 max_pending: int = 1024):
+        self.roots = list(roots)
+        self.threads = max(1, threads)
+        self.match = match
+        self.low_priority = low_priority
+        self._skip = re.compile("|".join(re.escape(s.lower()) for s in skip)) if skip else None
+        self._work = _WorkQueues(self.threads)
+        self._out: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._workers: List[threading.Thread] = []
+        self._finished = 0
+        self._started: Optional[float] = None
+        self._ended: Optional[float] = None
+        self._counts = [{"dirs": 0, "files": 0, "errors": 0, "skipped": 0} for _ in range(self.threads)]
+        self.prioritized = 0
+
+    def skipped(self, path: str) -> bool:
+        return bool(self._skip and self._skip.search(path.lower()))
+
+    # ========================================================================
+    # WORKER THREADS
+    # ========================================================================
+    def _start(self):
+        if self._started is not None:
+            raise RuntimeError("FsCrawler is single-use")
+        self._started = time.perf_counter()
+        roots = [(root, root) for root in self.roots if not self.skipped(root)]
+        self._work.push(0, roots)
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._run, args=(i,), name=f"fs-crawl-{i}", daemon=True)
+            self._workers.append(thread)
+            thread.start()
+
+    def _run(self, owner: int):
+        if self.low_priority and lower_io_priority():
+            self.prioritized += 1
+        try:
+            while True:
+                item = self._work.take(owner)
+                if item is None:
+                    break
+                try:
+                    listing = self._scan(owner, *item)
+                    if listing is not None:
+                        self._put(listing)
+                finally:
+                    self._work.done()
+        finally:
+            self._put(_DONE, force=True)
+
+    def _put(self, item, force: bool = False):
+        while True:
+            if self._work.stopped and not force:
+                return
+            try:
+                self._out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self._work.stopped and force:
+                    return  # consumer is gone; nobody will count this _DONE
+
+    def _scan(self, owner: int, root: str, directory: str) -> Optional[DirListing]:
+        counts = self._counts[owner]
+        files: List[FileEntry] = []
+        subdirs: List[Tuple[str, str]] = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            # Like os.walk: symlinked directories are neither descended nor files
+                            if entry.is_symlink():
+                                continue
+                            if self._skip and self._skip.search(entry.name.lower()):
+                                counts["skipped"] += 1
+                            else:
+                                subdirs.append((root, entry.path))
+                        elif self.match is None or self.match(entry.name):
+                            stat = entry.stat(follow_symlinks=False)
+                            files.append(FileEntry(entry.path, entry.name, stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue  # Vanished or unreadable entry
+        except OSError as e:
+            counts["errors"] += 1
+            return DirListing(directory, root, [], e)
+        self._work.push(owner, subdirs)
+        counts["dirs"] += 1
+        counts["files"] += len(files)
+        if not files and self.match is not None:
+            return None
+        return DirListing(directory, root, files, None)
+
+    # ========================================================================
+    # CONSUMER
+    # ========================================================================
+    def _take(self, limit: int) -> List[DirListing]:
+        """Block for the next listing, then drain up to `limit`; [] once the crawl is over"""
+        items: List[DirListing] = []
+        while self._finished < self.threads and len(items) < limit:
+            try:
+                item = self._out.get() if not items else self._out.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                self._finished += 1
+            else:
+                items.append(item)
+        if self._finished >= self.threads and self._ended is None:
+            self._ended = time.perf_counter()
+        return items
+
+    def crawl(self) -> Iterator[DirListing]:
+        self._start()
+        try:
+            while True:
+                items = self._take(256)
+                if not items:
+                    return
+                yield from items
+        finally:
+            self.stop()
+
+    async def stream(self, chunk: int = 256) -> AsyncIterator[DirListing]:
+        self._start()
+        try:
+            while True:
+                items = await asyncio.to_thread(self._take, chunk)
+                if not items:
+                    return
+                for item in items:
+                    yield item
+        finally:
+            self.stop()
+
+    def stop(self):
+        if not self._work.stopped:
+            self._work.stop()
+            if self._ended is None and self._started is not None:
+                self._ended = time.perf_counter()
+
+    def get_stats(self) -> Dict[str, Any]:
+        totals = {key: sum(c[key] for c in self._counts) for key in self._counts[0]}
+        elapsed = ((self._ended or time.perf_counter()) - self._started) if self._started else 0.0
+        return {
+            **totals,
+            "steals": self._work.steals,
+            "threads": self.threads,
+            "low_priority_threads": self.prioritized,
+            "elapsed_seconds": round(elapsed, 2),
+            "dirs_per_second": round(totals["dirs"] / elapsed, 1) if elapsed else 0.0,
+        }
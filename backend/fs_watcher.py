@@ -0,0 +1,502 @@
+# backend/fs_watcher.py
+"""
+FS Watcher - Keeps the local file index live between full indexer runs
+A backend (inotify on Linux, otherwise a polling crawler) reads raw change events on
+a thread and hands them to the event loop through a bounded queue - when the queue is
+full the reader blocks and the kernel's own event queue absorbs the burst. Events are
+coalesced per path and flushed once the burst goes quiet (`debounce`) or has waited
+`max_delay`; each flush stats the changed paths and applies one batch of upserts and
+deletes to the FileIndex overlay, which is compacted to disk every `compact_every`
+changes and on shutdown. A full resync (crawl + diff) runs at start-up and whenever
+inotify reports a queue overflow.
+"""
+import asyncio
+import concurrent.futures
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import stat as stat_module
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from file_index import FileIndex, FILE_INDEX_PATH
+from fs_crawler import DEFAULT_SKIP, FileEntry, FsCrawler
+
+logger = logging.getLogger(__name__)
+
+# Raw event kinds: "changed" (stat it), "deleted", "dir_deleted", "overflow" (resync)
+Event = Tuple[str, str]
+
+class WatchBackend:
+    """start(roots) once, then read(timeout) -> [(kind, path)] from one thread, then close()"""
+
+    name = "base"
+
+    def __init__(self, skip: Sequence[str] = DEFAULT_SKIP):
+        self.skip = skip
+
+    def start(self, roots: List[str]):
+        raise NotImplementedError
+
+    def read(self, timeout: float) -> List[Event]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+# ============================================================================
+# INOTIFY (Linux)
+# ============================================================================
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x002, 0x004, 0x008
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x040, 0x080, 0x100, 0x200
+IN_Q_OVERFLOW, IN_IGNORED, IN_ONLYDIR, IN_ISDIR = 0x4000, 0x8000, 0x01000000, 0x40000000
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+class InotifyBackend(WatchBackend):
+    """One inotify watch per directory; new directories are watched (and their files reported) as they appear"""
+
+    name = "inotify"
+    MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+    def __init__(self, skip: Sequence[str] = DEFAULT_SKIP):
+        super().__init__(skip)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = -1
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        self.stats = {"watches": 0, "watch_errors": 0, "overflows": 0}
+        self._warned = False
+
+    @staticmethod
+    def available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6"), "inotify_init1")
+        except OSError:
+            return False
+
+    def start(self, roots: List[str]):
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Parallel crawl; anything that changes before a directory's watch lands is caught by the resync
+        for root in roots:
+            for listing in FsCrawler([root], skip=self.skip).crawl():
+                if listing.error is None:
+                    self._watch(listing.path)
+
+    def _watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            self.stats["watch_errors"] += 1
+            if not self._warned:
+                self._warned = True
+                logger.warning(f"⚠️ inotify watch failed for {directory} ({os.strerror(ctypes.get_errno())}); "
+                               f"raise fs.inotify.max_user_watches or set FS_WATCH_BACKEND=poll")
+            return
+        self._paths[wd] = directory
+        self._wds[directory] = wd
+        self.stats["watches"] = len(self._wds)
+
+    def _watch_tree(self, root: str) -> List[Event]:
+        """Watch a new directory tree and report its files as "changed" events. Each directory
+        is watched before it is listed, so files created meanwhile are seen at least once."""
+        events: List[Event] = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            self._watch(directory)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not any(skip in entry.name.lower() for skip in self.skip):
+                                stack.append(entry.path)
+                        else:
+                            events.append(("changed", entry.path))
+            except OSError:
+                continue
+        return events
+
+    def _unwatch_tree(self, root: str):
+        prefix = root.rstrip(os.sep) + os.sep
+        for directory in [d for d in self._wds if d == root or d.startswith(prefix)]:
+            wd = self._wds.pop(directory)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self.stats["watches"] = len(self._wds)
+
+    def read(self, timeout: float) -> List[Event]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events: List[Event] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0"))
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                self.stats["overflows"] += 1
+                events.append(("overflow", ""))
+                continue
+            if mask & IN_IGNORED:
+                directory = self._paths.pop(wd, None)
+                if directory is not None and self._wds.get(directory) == wd:
+                    del self._wds[directory]
+                continue
+            parent = self._paths.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    if not any(skip in name.lower() for skip in self.skip) and path not in self._wds:
+                        events.extend(self._watch_tree(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._unwatch_tree(path)
+                    events.append(("dir_deleted", path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(("deleted", path))
+            else:
+                events.append(("changed", path))
+        return events
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.stats}
+
+# ============================================================================
+# POLLING (any OS)
+# ============================================================================
+class PollingBackend(WatchBackend):
+    """Re-crawls the roots every `interval` seconds and diffs (size, mtime) per file"""
+
+    name = "poll"
+
+    def __init__(self, skip: Sequence[str] = DEFAULT_SKIP, interval: float = 60.0):
+        super().__init__(skip)
+        self.interval = interval
+        self.roots: List[str] = []
+        self._files: Dict[str, Tuple[int, int]] = {}
+        self._next = 0.0
+        self._closed = threading.Event()
+        self.stats = {"scans": 0, "files": 0, "last_scan_seconds": 0.0}
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        started = time.perf_counter()
+        files = {}
+        for listing in FsCrawler(self.roots, skip=self.skip).crawl():
+            for entry in listing.files:
+                files[entry.path] = (entry.size, entry.mtime_ns)
+        self.stats["scans"] += 1
+        self.stats["files"] = len(files)
+        self.stats["last_scan_seconds"] = round(time.perf_counter() - started, 2)
+        return files
+
+    def start(self, roots: List[str]):
+        self.roots = list(roots)
+        self._files = self._scan()
+        self._next = time.monotonic() + self.interval
+
+    def read(self, timeout: float) -> List[Event]:
+        wait = self._next - time.monotonic()
+        if wait > 0:
+            self._closed.wait(min(wait, timeout))
+            return []
+        current = self._scan()
+        self._next = time.monotonic() + self.interval
+        events = [("changed", path) for path, state in current.items() if self._files.get(path) != state]
+        events.extend(("deleted", path) for path in self._files.keys() - current.keys())
+        self._files = current
+        return events
+
+    def close(self):
+        self._closed.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "interval": self.interval, **self.stats}
+
+def make_backend(kind: str = "auto", skip: Sequence[str] = DEFAULT_SKIP, poll_interval: float = 60.0) -> WatchBackend:
+    if kind == "inotify" or (kind == "auto" and InotifyBackend.available()):
+        return InotifyBackend(skip)
+    return PollingBackend(skip, poll_interval)
+
+# ============================================================================
+# WATCHER
+# ============================================================================
+class FsWatcher:
+    """
+    run() as a background task; close() flushes, compacts and stops.
+    Coalesces events per path, applies them to `index` in batches of up to `max_batch`.
+    """
+
+    APPLY_CHUNK = 1000  # paths (or listed files, in a resync) between yields to the event loop
+
+    def __init__(self, index: FileIndex, roots: Sequence[str], backend: Optional[WatchBackend] = None,
+                 debounce: float = 0.5, max_delay: float = 5.0, max_batch: int = 2000, max_queue: int = 256,
+                 compact_every: int = 20000, resync_on_start: bool = True, index_path=FILE_INDEX_PATH):
+        self.index = index
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.backend = backend or make_backend()
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.compact_every = compact_every
+        self.resync_on_start = resync_on_start
+        self.index_path = index_path
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[str, Tuple[str, float]] = {}   # path -> (latest kind, first seen)
+        self._last_event = 0.0
+        self._stopping = threading.Event()
+        self._ready = threading.Event()   # backend started (watches in place)
+        self._reader: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._resync_requested = resync_on_start
+        self._compaction: Optional[asyncio.Task] = None
+        self._lags: Deque[float] = deque(maxlen=2000)
+        self.started_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.stats = {"events": 0, "coalesced": 0, "batches": 0, "upserts": 0, "deletes": 0, "dirs_removed": 0,
+                      "resyncs": 0, "compactions": 0, "last_flush": None, "last_compact_seconds": 0.0}
+
+    # ========================================================================
+    # READER THREAD
+    # ========================================================================
+    def _read_loop(self, loop: asyncio.AbstractEventLoop):
+        try:
+            self.backend.start(self.roots)
+            self._ready.set()
+            asyncio.run_coroutine_threadsafe(self._queue.put((time.monotonic(), [])), loop)  # wake run() to resync
+            logger.info(f"👁️ File watcher on {', '.join(self.roots)} ({self.backend.name})")
+        except Exception as e:
+            self.error = f"{self.backend.name} backend failed to start: {e}"
+            logger.warning(f"⚠️ {self.error}")
+            return
+        while not self._stopping.is_set():
+            try:
+                events = self.backend.read(0.5)
+            except Exception as e:
+                self.error = f"{self.backend.name} read failed: {e}"
+                logger.warning(f"⚠️ {self.error}")
+                return
+            if not events:
+                continue
+            future = asyncio.run_coroutine_threadsafe(self._queue.put((time.monotonic(), events)), loop)
+            while True:  # Blocks while the queue is full (backpressure), but never past close()
+                try:
+                    future.result(timeout=0.5)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if self._stopping.is_set():
+                        future.cancel()
+                        return
+
+    # ========================================================================
+    # EVENT LOOP
+    # ========================================================================
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.started_at = time.time()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._reader = threading.Thread(target=self._read_loop, args=(loop,), name="fs-watch", daemon=True)
+        self._reader.start()
+        while not self._stopping.is_set():
+            try:
+                stamp, events = await asyncio.wait_for(self._queue.get(), timeout=self._wait_time())
+                self._coalesce(stamp, events)
+            except asyncio.TimeoutError:
+                pass
+            if self._resync_requested and self._ready.is_set():
+                await self.resync()
+            if self._pending and self._due():
+                await self.flush()
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def _coalesce(self, stamp: float, events: List[Event]):
+        self._last_event = time.monotonic()
+        for kind, path in events:
+            self.stats["events"] += 1
+            if kind == "overflow":
+                self._resync_requested = True
+                continue
+            previous = self._pending.get(path)
+            if previous is not None:
+                self.stats["coalesced"] += 1
+            self._pending[path] = (kind, previous[1] if previous else stamp)
+
+    def _wait_time(self) -> float:
+        if not self._pending:
+            return 1.0
+        return max(0.01, min(self.debounce - (time.monotonic() - self._last_event), self.max_delay))
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        oldest = min(first for _, first in self._pending.values())
+        return (len(self._pending) >= self.max_batch or now - self._last_event >= self.debounce
+                or now - oldest >= self.max_delay)
+
+    @staticmethod
+    def _stat(paths: List[str]) -> Tuple[List[FileEntry], List[str]]:
+        upserts, missing = [], []
+        for path in paths:
+            try:
+                st = os.lstat(path)
+            except OSError:
+                missing.append(path)
+                continue
+            if stat_module.S_ISDIR(st.st_mode):
+                continue
+            upserts.append(FileEntry(path, os.path.basename(path), st.st_size, st.st_mtime_ns))
+        return upserts, missing
+
+    async def flush(self):
+        """Apply everything pending as one batch"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        changed = [path for path, (kind, _) in pending.items() if kind == "changed"]
+        deletes = [path for path, (kind, _) in pending.items() if kind == "deleted"]
+        dirs = [path for path, (kind, _) in pending.items() if kind == "dir_deleted"]
+        upserts, missing = await asyncio.to_thread(self._stat, changed)
+        await self._apply(upserts, deletes + missing, dirs)
+        now = time.monotonic()
+        self._lags.extend(now - first for _, first in pending.values())
+        self.stats["batches"] += 1
+        self.stats["upserts"] += len(upserts)
+        self.stats["deletes"] += len(deletes) + len(missing)
+        self.stats["dirs_removed"] += len(dirs)
+        self.stats["last_flush"] = time.time()
+        if self.index.pending_changes >= self.compact_every:
+            await self.compact()
+
+    async def resync(self):
+        """Crawl the roots and diff every directory against the index (start-up, lost events)"""
+        self._resync_requested = False
+        started = time.perf_counter()
+        listings = await asyncio.to_thread(lambda: list(FsCrawler(self.roots, skip=self.backend.skip).crawl()))
+        seen = {listing.path for listing in listings}  # unreadable directories count as seen, not gone
+        upserts, deletes = [], []
+        work = 0
+        for listing in listings:
+            if listing.error is not None:
+                continue
+            changed, removed = self.index.diff_dir(listing.path, listing.files)
+            upserts.extend(changed)
+            deletes.extend(removed)
+            work += len(listing.files) + 1
+            if work >= self.APPLY_CHUNK:
+                work = 0
+                await asyncio.sleep(0)
+        gone = [d for d in self.index.indexed_dirs(self.roots) if d not in seen]
+        # Only directories whose parent was listed are known to be gone (not merely skipped)
+        gone = [d for d in gone if os.path.dirname(d) in seen]
+        await self._apply(upserts, deletes, gone)
+        self.stats["resyncs"] += 1
+        self.stats["upserts"] += len(upserts)
+        self.stats["deletes"] += len(deletes)
+        self.stats["dirs_removed"] += len(gone)
+        logger.info(f"👁️ File index resync: {len(upserts):,} changed, {len(deletes):,} deleted, "
+                    f"{len(gone):,} directories gone ({time.perf_counter() - started:.1f}s)")
+        if self.index.pending_changes >= self.compact_every:
+            await self.compact()
+
+    async def _apply(self, upserts: List[FileEntry], deletes: List[str], dirs: List[str]):
+        """index.apply() in slices, yielding between them so queries are never held up by a big batch
+        (same order as one apply: directories, then deletes, then upserts)"""
+        if dirs:
+            self.index.apply((), (), dirs)
+        for start in range(0, len(deletes), self.APPLY_CHUNK):
+            self.index.apply((), deletes[start:start + self.APPLY_CHUNK])
+            await asyncio.sleep(0)
+        upserts = sorted(upserts)  # by path, so a directory's rows are decoded once per slice at most
+        for start in range(0, len(upserts), self.APPLY_CHUNK):
+            self.index.apply(upserts[start:start + self.APPLY_CHUNK])
+            await asyncio.sleep(0)
+
+    async def compact(self):
+        """Fold the overlay into a new on-disk generation without blocking queries.
+        An in-flight compaction (possibly orphaned by a cancelled run()) is awaited first,
+        so two never write the same generation."""
+        if self._compaction is not None:
+            await asyncio.shield(self._compaction)
+        if not self.index.pending_changes:
+            return
+        self._compaction = asyncio.ensure_future(self._compact())
+        await asyncio.shield(self._compaction)
+
+    async def _compact(self):
+        started = time.perf_counter()
+        try:
+            snapshot = self.index.snapshot()
+            rebuilt = await asyncio.to_thread(
+                lambda: FileIndex.open(self.index.compacted(snapshot).save(self.index_path)))
+            self.index.adopt(rebuilt)
+            self.stats["compactions"] += 1
+            self.stats["last_compact_seconds"] = round(time.perf_counter() - started, 2)
+        except Exception as e:
+            self.index.abandon_snapshot()
+            logger.warning(f"⚠️ File index compaction failed: {e}")
+        finally:
+            self._compaction = None
+
+    async def close(self):
+        self._stopping.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, timeout=5.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+        while self._queue is not None and not self._queue.empty():
+            self._coalesce(*self._queue.get_nowait())
+        await self.flush()
+        await self.compact()
+        if self._reader is not None:
+            await asyncio.to_thread(self._reader.join, 2.0)
+        self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lags = np.array(self._lags) * 1000 if self._lags else None
+        return {
+            **self.stats,
+            "roots": self.roots,
+            "running": self._task is not None and not self._task.done(),
+            "error": self.error,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "pending_paths": len(self._pending),
+            "overlay_changes": self.index.pending_changes,
+            "lag_ms": {
+                "samples": 0 if lags is None else len(lags),
+                "mean": 0.0 if lags is None else round(float(lags.mean()), 1),
+                "p50": 0.0 if lags is None else round(float(np.percentile(lags, 50)), 1),
+                "p95": 0.0 if lags is None else round(float(np.percentile(lags, 95)), 1),
+                "max": 0.0 if lags is None else round(float(lags.max()), 1),
+            },
+            **self.backend.get_stats(),
+        }
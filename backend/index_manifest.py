@@ -0,0 +1,125 @@
+# backend/index_manifest.py
+"""
+Index Manifest - SQLite record of what the SystemIndexer has pushed into ChromaDB
+path -> (size, mtime_ns, chroma id, last run that saw it), plus per-run checkpoints
+of directories whose files are fully written, so an interrupted run can resume.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    parent   TEXT NOT NULL,
+    root     TEXT NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    id       TEXT NOT NULL,
+    run      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_parent ON files(parent);
+CREATE INDEX IF NOT EXISTS files_root_run ON files(root, run);
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    roots    TEXT NOT NULL,
+    started  REAL NOT NULL,
+    finished REAL,
+    status   TEXT NOT NULL,
+    stats    TEXT
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run INTEGER NOT NULL,
+    dir TEXT NOT NULL,
+    PRIMARY KEY (run, dir)
+);
+"""
+
+# (path, size, mtime_ns, id)
+Entry = Tuple[str, int, int, str]
+
+class IndexManifest:
+    """One directory = one transaction: its file rows and its checkpoint commit together"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    # ========================================================================
+    # RUNS / CHECKPOINTS
+    # ========================================================================
+    def start_run(self, roots: List[str], resume: bool = True) -> Tuple[int, bool]:
+        """Resume the last unfinished run over the same roots, or start a new one"""
+        row = self.db.execute("SELECT id, roots FROM runs WHERE status = 'running' ORDER BY id DESC LIMIT 1").fetchone()
+        if row and resume and json.loads(row[1]) == roots:
+            return row[0], True
+        with self.db:
+            if row:
+                self.db.execute("UPDATE runs SET status = 'abandoned' WHERE status = 'running'")
+                self.db.execute("DELETE FROM checkpoints")
+            cur = self.db.execute("INSERT INTO runs (roots, started, status) VALUES (?, ?, 'running')",
+                                  (json.dumps(roots), time.time()))
+        return cur.lastrowid, False
+
+    def completed_dirs(self, run: int) -> Set[str]:
+        return {d for (d,) in self.db.execute("SELECT dir FROM checkpoints WHERE run = ?", (run,))}
+
+    def finish_run(self, run: int, stats: Dict):
+        with self.db:
+            self.db.execute("UPDATE runs SET status = 'complete', finished = ?, stats = ? WHERE id = ?",
+                            (time.time(), json.dumps(stats), run))
+            self.db.execute("DELETE FROM checkpoints WHERE run = ?", (run,))
+
+    def last_run(self) -> Optional[Dict]:
+        row = self.db.execute("SELECT id, roots, started, finished, status, stats FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "roots": json.loads(row[1]), "started": row[2], "finished": row[3],
+                "status": row[4], "stats": json.loads(row[5]) if row[5] else None}
+
+    # ========================================================================
+    # FILES
+    # ========================================================================
+    def entries(self, parent: str) -> Dict[str, Tuple[int, int, str]]:
+        """Known files directly inside `parent`: path -> (size, mtime_ns, id)"""
+        return {path: (size, mtime_ns, file_id) for path, size, mtime_ns, file_id in self.db.execute(
+            "SELECT path, size, mtime_ns, id FROM files WHERE parent = ?", (parent,))}
+
+    def commit_dir(self, run: int, root: str, parent: str, unchanged: Iterable[str],
+                   written: Iterable[Entry], removed: Iterable[str]):
+        with self.db:
+            self.db.executemany("UPDATE files SET run = ? WHERE path = ?", ((run, p) for p in unchanged))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO files (path, parent, root, size, mtime_ns, id, run) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((path, parent, root, size, mtime_ns, file_id, run) for path, size, mtime_ns, file_id in written))
+            self.db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in removed))
+            self.db.execute("INSERT OR IGNORE INTO checkpoints (run, dir) VALUES (?, ?)", (run, parent))
+
+    def stale(self, run: int, roots: List[str]) -> List[Tuple[str, str, str]]:
+        """(path, id, parent) under `roots` not seen by `run` - vanished since the last run"""
+        rows = []
+        for root in roots:
+            rows.extend(self.db.execute("SELECT path, id, parent FROM files WHERE root = ? AND run < ?", (root, run)))
+        return rows
+
+    def forget(self, paths: Iterable[str]):
+        with self.db:
+            self.db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in paths))
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def reset(self):
+        with self.db:
+            self.db.execute("DELETE FROM files")
+            self.db.execute("DELETE FROM checkpoints")
+            self.db.execute("UPDATE runs SET status = 'abandoned' WHERE status = 'running'")
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,130 @@
+# backend/inference_client.py
+"""
+Async Inference Client - One pooled, non-blocking connection to Ollama
+Shared by every worker and the router so no generation ever blocks the event loop
+"""
+import asyncio
+import json
+import logging
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+import aiohttp
+
+from config import OLLAMA_BASE
+
+logger = logging.getLogger(__name__)
+
+class InferenceError(Exception):
+    """Raised when Ollama returns an error or an unreadable response"""
+
+class InferenceClient:
+    """
+    Thin async client for the Ollama REST API.
+    Connections are pooled and kept alive between calls; every call takes its own
+    timeout, and cancelling the awaiting task drops the HTTP connection so Ollama
+    aborts the generation server-side.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_BASE, pool_size: int = 16,
+                 keepalive_timeout: float = 60.0, default_timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.default_timeout = default_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily open the pooled session on the running loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close pooled connections (called from the kernel lifespan)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _post(self, path: str, payload: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.default_timeout)
+        resp = await session.post(f"{self.base_url}{path}", json=payload, timeout=client_timeout)
+        try:
+            if resp.status != 200:
+                raise InferenceError(f"Ollama {path} returned {resp.status}: {await resp.text()}")
+            return await resp.json(content_type=None)
+        except asyncio.CancelledError:
+            # Drop the socket instead of returning it to the pool: Ollama stops generating
+            resp.close()
+            raise
+        finally:
+            resp.release()
+
+    async def _get(self, path: str, timeout: Optional[float]) -> Dict[str, Any]:
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.default_timeout)
+        async with session.get(f"{self.base_url}{path}", timeout=client_timeout) as resp:
+            if resp.status != 200:
+                raise InferenceError(f"Ollama {path} returned {resp.status}: {await resp.text()}")
+            return await resp.json(content_type=None)
+
+    async def ps(self, timeout: Optional[float] = 5.0) -> List[Dict[str, Any]]:
+        """Models currently loaded by Ollama (name, size, size_vram, expires_at)"""
+        return (await self._get("/api/ps", timeout)).get("models", [])
+
+    async def chat(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+                   timeout: Optional[float] = None, keep_alive: Optional[Any] = None) -> Dict[str, Any]:
+        """Non-streaming chat; returns the Ollama response dict (response['message']['content'])"""
+        payload = {"model": model, "messages": messages, "stream": False}
+        if options: payload["options"] = options
+        if keep_alive is not None: payload["keep_alive"] = keep_alive
+        return await self._post("/api/chat", payload, timeout)
+
+    async def generate(self, model: str, prompt: str = "", options: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None, keep_alive: Optional[Any] = None) -> Dict[str, Any]:
+        """Non-streaming generate; an empty prompt just loads/unloads the model"""
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options: payload["options"] = options
+        if keep_alive is not None: payload["keep_alive"] = keep_alive
+        return await self._post("/api/generate", payload, timeout)
+
+    async def chat_stream(self, model: str, messages: List[Dict[str, Any]], options: Optional[Dict[str, Any]] = None,
+                          timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Streaming chat; yields content chunks as Ollama produces them.
+        `timeout` bounds the silence between two chunks, not the whole answer.
+        """
+        payload = {"model": model, "messages": messages, "stream": True}
+        if options: payload["options"] = options
+
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_read=timeout or self.default_timeout)
+        resp = await session.post(f"{self.base_url}/api/chat", json=payload, timeout=client_timeout)
+        finished = False
+        try:
+            if resp.status != 200:
+                raise InferenceError(f"Ollama /api/chat returned {resp.status}: {await resp.text()}")
+            async for line in resp.content:
+                if not line.strip():
+                    continue
+                try: part = json.loads(line)
+                except json.JSONDecodeError:
+                    raise InferenceError("Invalid JSON chunk from Ollama")
+                if "error" in part:
+                    raise InferenceError(part["error"])
+                chunk = part.get("message", {}).get("content", "")
+                if chunk:
+                    yield chunk
+                if part.get("done"):
+                    finished = True
+                    break
+        finally:
+            # Consumer went away (client disconnect, timeout, cancel): close the socket
+            # so the generation is aborted rather than left running on the GPU
+            if not finished:
+                resp.close()
+            resp.release()
+
+# Global client instance
+inference = InferenceClient()
@@ -0,0 +1,109 @@
+# backend/ingest_benchmark.py
+"""
+Ingest Benchmark - Per-file collection.add (the old SystemIndexer path) vs BulkIngestor
+    python ingest_benchmark.py                      simulated Chroma server (round-trip latency)
+    python ingest_benchmark.py --rtt-ms 5 --files 50000
+    python ingest_benchmark.py --chroma             in-process chromadb.EphemeralClient instead
+The stand-in charges `rtt_ms` per request plus `per_record_us` per record, and serves
+concurrent requests in parallel like the HTTP server does.
+"""
+import argparse
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List
+
+from chroma_ingest import BulkIngestor, Record
+
+class LatencyCollection:
+    """Local Chroma stand-in: stores records in a dict and sleeps like a round-trip"""
+
+    def __init__(self, rtt_ms: float = 2.0, per_record_us: float = 20.0):
+        self.rtt = rtt_ms / 1000
+        self.per_record = per_record_us / 1e6
+        self.items: Dict[str, Any] = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _call(self, n: int):
+        time.sleep(self.rtt + n * self.per_record)
+        with self._lock:
+            self.requests += 1
+
+    def add(self, ids, documents, metadatas):
+        self._call(len(ids))
+        with self._lock:
+            for i, d, m in zip(ids, documents, metadatas):
+                self.items[i] = (d, m)
+
+    upsert = add
+
+    def delete(self, ids):
+        self._call(len(ids))
+        with self._lock:
+            for i in ids:
+                self.items.pop(i, None)
+
+    def count(self) -> int:
+        return len(self.items)
+
+def synthetic_records(n: int) -> List[Record]:
+    records = []
+    for i in range(n):
+        path = f"/home/user/projects/p{i // 500}/src/file_{i}.py"
+        records.append((hashlib.md5(path.encode()).hexdigest()[:16], f"file_{i}.py",
+                        {"name": f"file_{i}.py", "path": path, "size": i * 7, "extension": ".py",
+                         "parent": f"/home/user/projects/p{i // 500}/src"}))
+    return records
+
+def per_file(collection, records: List[Record]) -> float:
+    started = time.perf_counter()
+    for file_id, document, metadata in records:
+        collection.add(ids=[file_id], documents=[document], metadatas=[metadata])
+    return time.perf_counter() - started
+
+def bulk(collection, records: List[Record], batch_size: int, in_flight: int, group: int = 200) -> float:
+    started = time.perf_counter()
+    ingestor = BulkIngestor(collection, batch_size=batch_size, max_in_flight=in_flight)
+    for i in range(0, len(records), group):  # one group per "directory", as the indexer does
+        ingestor.add(records[i:i + group])
+        ingestor.poll()
+    ingestor.close()
+    return time.perf_counter() - started
+
+def make_collection(args, name: str):
+    if not args.chroma:
+        return LatencyCollection(args.rtt_ms, args.per_record_us)
+    import chromadb
+    client = chromadb.EphemeralClient()
+    try: client.delete_collection(name)
+    except Exception: pass
+    return client.create_collection(name)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000, help="records for the bulk runs")
+    parser.add_argument("--per-file-sample", type=int, default=2000, help="records for the (slow) per-file run")
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--per-record-us", type=float, default=20.0)
+    parser.add_argument("--chroma", action="store_true", help="use an in-process chromadb.EphemeralClient")
+    args = parser.parse_args()
+
+    records = synthetic_records(args.files)
+    sample = records[:args.per_file_sample]
+    target = "chromadb (in-process)" if args.chroma else f"stand-in, rtt {args.rtt_ms} ms"
+    print(f"{target}; {args.files:,} files ({len(sample):,} for per-file)")
+    print(f"{'path':<28}{'seconds':>10}{'files/s':>12}{'speedup':>10}")
+
+    elapsed = per_file(make_collection(args, "bench_per_file"), sample)
+    baseline = len(sample) / elapsed
+    print(f"{'per-file add':<28}{elapsed:>10.2f}{baseline:>12,.0f}{'1.0x':>10}")
+    for batch_size, in_flight in ((500, 1), (2000, 1), (2000, 4), (5000, 4)):
+        collection = make_collection(args, f"bench_{batch_size}_{in_flight}")
+        elapsed = bulk(collection, records, batch_size, in_flight)
+        assert collection.count() == len(records)
+        rate = len(records) / elapsed
+        print(f"{f'bulk {batch_size} x {in_flight} in flight':<28}{elapsed:>10.2f}{rate:>12,.0f}{rate / baseline:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# backend/intelligent_router.py
+"""
+Intelligent Router - Picks the worker for an "auto" task
+Moved out of kernel.py so benchmarks and tools can use it without starting the kernel.
+"""
+import asyncio
+import re
+import time
+import logging
+from collections import deque
+from typing import Optional, Dict, Any
+
+from inference_client import inference
+from route_classifier import TaskClassifier, RouteHistory, normalize_task
+from semantic_router import SemanticRouter
+from ttl_cache import TTLCache
+from config import (ROUTER_CACHE_SIZE, ROUTER_CACHE_TTL, ROUTER_CONFIDENCE, ROUTER_HISTORY_PATH,
+                    ROUTER_HISTORY_SIZE, ROUTER_MIN_EXAMPLES, ROUTER_RETRAIN_EVERY,
+                    ROUTER_SEMANTIC_THRESHOLD, ROUTER_SEMANTIC_MARGIN)
+
+logger = logging.getLogger(__name__)
+
+# Seconds the router may spend asking the LLM to pick a worker
+ROUTER_LLM_TIMEOUT = 10
+ROUTER_WORKERS = ('brain', 'code', 'search', 'files')
+
+class IntelligentRouter:
+    """
+    Tiers, cheapest first: LRU cache of normalized task -> worker, precompiled keyword /
+    regex rules, the local TF-IDF classifier (when confident), the MiniLM semantic router
+    (once loaded, when confident), then the LLM as a last resort.
+    Rule and LLM decisions plus explicit user picks become classifier training data.
+    """
+
+    def __init__(self, history_path: str = ROUTER_HISTORY_PATH, semantic: Optional[SemanticRouter] = None):
+        self.model = "llama3.2:latest"
+        self.keywords = [
+            ('files', ("search pc", "find file", "local drive", ".pdf", ".jpg", ".png")),
+            ('search', ("search net", "web search", "google", "online", "internet", "latest", "news", "2026", "price")),
+        ]
+        self.patterns = {
+            'code':[r'\bcode\b', r'\bscript\b', r'\bpython\b', r'\breact\b', r'\bpowershell\b', r'\bbash\b', r'\bdebug\b'],
+            'search':[r'\bsearch net\b', r'\bgoogle\b', r'\blook up\b', r'\bnews\b', r'\bwho is\b', r'\bweb search\b', r'\bonline\b', r'\blatest\b', r'\bcurrent\b', r'\btoday\b', r'\bprice\b'],
+            'files':[r'\bsearch pc\b', r'\bfind file\b', r'\bjpg\b', r'\bpng\b', r'\bpdf\b', r'\bdocument\b', r'\blocated\b']
+        }
+        # One alternation per worker, compiled once
+        self.compiled = {worker: re.compile('|'.join(patterns)) for worker, patterns in self.patterns.items()}
+        self.cache = TTLCache(maxsize=ROUTER_CACHE_SIZE, ttl=ROUTER_CACHE_TTL)
+        self.history = RouteHistory(history_path, max_examples=ROUTER_HISTORY_SIZE)
+        self.classifier = TaskClassifier()
+        self.confidence = ROUTER_CONFIDENCE
+        self.semantic = semantic or SemanticRouter(threshold=ROUTER_SEMANTIC_THRESHOLD, margin=ROUTER_SEMANTIC_MARGIN)
+        self._trained_on = 0
+        self._training: Optional[asyncio.Task] = None
+        self.latency = {tier: deque(maxlen=2000) for tier in ('cache', 'rule', 'classifier', 'semantic', 'llm', 'all')}
+        self.stats = {"routes": 0, "cache": 0, "system": 0, "rule": 0, "classifier": 0, "semantic": 0, "llm": 0,
+                      "fallback": 0, "low_confidence": 0, "retrains": 0}
+
+    def _rules(self, task_lower: str) -> Optional[str]:
+        for worker, keywords in self.keywords:
+            if any(kw in task_lower for kw in keywords): return worker
+        for worker, pattern in self.compiled.items():
+            if pattern.search(task_lower): return worker
+        return None
+
+    async def route(self, task: str) -> str:
+        started = time.perf_counter()
+        key = normalize_task(task)
+        self.stats["routes"] += 1
+        if key.startswith('/'):
+            self.stats["system"] += 1
+            return 'system'
+
+        worker = self.cache.get(key)
+        tier = 'cache'
+        if worker is None:
+            worker, tier = await self._decide(task, key)
+            if tier != 'fallback':  # don't pin 'brain' for an hour because the LLM was down
+                self.cache.put(key, worker)
+            if tier in ('rule', 'llm'):
+                self.learn(key, worker, tier)
+        self.stats[tier] += 1
+        elapsed = time.perf_counter() - started
+        if tier in self.latency: self.latency[tier].append(elapsed)
+        self.latency['all'].append(elapsed)
+        return worker
+
+    async def _decide(self, task: str, key: str):
+        worker = self._rules(key)
+        if worker: return worker, 'rule'
+
+        self._maybe_retrain()
+        prediction = self.classifier.predict(key)
+        if prediction and prediction[1] >= self.confidence:
+            return prediction[0], 'classifier'
+        if prediction:
+            self.stats["low_confidence"] += 1
+
+        if self.semantic.ready:
+            # ~5 ms of CPU for the embedding; keep it off the event loop
+            match = await asyncio.to_thread(self.semantic.classify, key)
+            if match and match[0] in ROUTER_WORKERS:
+                return match[0], 'semantic'
+
+        worker = await self.ask_llm(task)
+        if worker: return worker, 'llm'
+        return 'brain', 'fallback'
+
+    async def ask_llm(self, task: str) -> Optional[str]:
+        try:
+            prompt = """Analyze the user task and output ONLY ONE WORD (brain, code, search, files):
+            - brain: general questions, math, logic, advice
+            - code: programming, scripts, debugging, terminal
+            - search: internet/web search, current events, online prices, news, anything requiring live data
+            - files: local PC files, documents, drives
+            Task: """ + task
+            
+            response = await inference.chat(model=self.model, messages=[{"role": "user", "content": prompt}], options={"temperature": 0.0, "num_predict": 5}, timeout=ROUTER_LLM_TIMEOUT)
+            res_text = response['message']['content'].strip().lower()
+            for w in ROUTER_WORKERS:
+                if w in res_text: return w
+        except Exception as e: 
+            logger.error(f"Router LLM Error: {e}")
+        return None
+
+    async def load_semantic(self):
+        """Embed the semantic router's exemplars in the background; routing skips the tier until then"""
+        try:
+            await asyncio.to_thread(self.semantic.load)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic router unavailable: {e}")
+
+    # ========================================================================
+    # TRAINING
+    # ========================================================================
+    def learn(self, task: str, worker: str, source: str = "user"):
+        """Add a labelled example (e.g. the user explicitly chose `worker`)"""
+        if worker not in ROUTER_WORKERS: return
+        key = normalize_task(task)
+        if self.history.add(key, worker, source):
+            self.cache.put(key, worker)
+
+    def _maybe_retrain(self):
+        grown = len(self.history) - self._trained_on
+        if len(self.history) < ROUTER_MIN_EXAMPLES or (self.classifier.trained and grown < ROUTER_RETRAIN_EVERY):
+            return
+        if self._training is None or self._training.done():
+            self._training = asyncio.create_task(self._retrain())
+
+    async def _retrain(self):
+        texts, labels = self.history.snapshot()
+        if len(set(labels)) < 2: return
+        started = time.perf_counter()
+        try:
+            # Swap in a fresh model so routing keeps using the old one meanwhile
+            self.classifier = await asyncio.to_thread(TaskClassifier().fit, texts, labels)
+            self._trained_on = len(texts)
+            self.stats["retrains"] += 1
+            logger.info(f"🧭 Router classifier trained on {len(texts)} examples in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.error(f"Router classifier training failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        def pct(samples, p):
+            ordered = sorted(samples)
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3) if ordered else 0.0
+        return {
+            **self.stats,
+            "latency_ms": {tier: {"p50": pct(s, 0.5), "p99": pct(s, 0.99), "n": len(s)} for tier, s in self.latency.items()},
+            "lru": self.cache.get_stats(),
+            "classifier_model": {"trained": self.classifier.trained, "examples": len(self.history),
+                           "trained_on": self._trained_on, "confidence_threshold": self.confidence,
+                           "labels": self.classifier.labels},
+            "semantic_model": self.semantic.get_stats(),
+        }
@@ -1,21 +1,17 @@
 ﻿import asyncio
 import json
 import os
-import shutil
+import hashlib
 import random
 import time
 import sys
-import re
 import urllib.parse
 import subprocess
 import signal
-import psutil
 from pathlib import Path
 from contextlib import asynccontextmanager
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncIterator
 
-import pandas as pd
-import ollama
 from fastapi import FastAPI, Request, Depends, HTTPException, UploadFile, File
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -46,6 +42,26 @@ from middleware import setup_logging, RequestLoggingMiddleware, ErrorHandlingMid
 from constitutional_wrapper import ZeroDriftConstitution as LegacyConstitution
 from invariant_layer import ExecutionGuard, InterceptionEngine, invariant_registry
 from constitutional_audit import ConstitutionalAudit
+from inference_client import inference
+from telemetry_hub import telemetry_hub
+from telemetry_store import telemetry_store
+from spreadsheet_analyzer import spreadsheet_analyzer
+from dataset_cache import DatasetCache
+from upload_progress import upload_progress
+from query_engine import QueryEngine, looks_like_query
+from config import (UPLOAD_MAX_MB, UPLOAD_CHUNK_SIZE, UPLOAD_PARSE_WORKERS, WORKER_CONCURRENCY,
+                    WORKER_DEFAULT_CONCURRENCY, KERNEL_MAX_ACTIVE, KERNEL_MAX_QUEUE, KERNEL_MAX_WAIT,
+                    VRAM_BUDGET_GB, MODEL_FOOTPRINTS, PREWARM_ENABLED, PREWARM_MIN_PROBABILITY,
+                    PREWARM_MIN_SAMPLES, PREWARM_MAX_GB_PER_HOUR, ROUTER_SEMANTIC,
+                    FS_WATCH_ENABLED, FS_WATCH_ROOTS, FS_WATCH_BACKEND, FS_WATCH_DEBOUNCE, FS_WATCH_MAX_DELAY,
+                    FS_WATCH_POLL_INTERVAL, FS_WATCH_MAX_QUEUE, FS_WATCH_COMPACT_EVERY)
+from residency_manager import ResidencyManager, PRIORITY_WEIGHT
+from model_prewarmer import ModelPrewarmer
+from intelligent_router import IntelligentRouter
+from embedding_service import embedding_service
+from worker_scheduler import WorkerScheduler, SchedulerFullError
+from ledger_writer import LedgerBackpressureError
+from fs_watcher import FsWatcher, make_backend
 
 # ============================================================================
 # SYSTEM INITIALIZATION & LOGGING
@@ -56,6 +72,8 @@ logger = logging.getLogger(__name__)
 # Ensure upload directory exists for Spreadsheet Analysis
 UPLOAD_DIR = Path("./uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+dataset_cache = DatasetCache(UPLOAD_DIR, parse_workers=UPLOAD_PARSE_WORKERS)
+query_engine = QueryEngine(dataset_cache)
 
 # ============================================================================
 # TURBO SPARSE ENGINE INTEGRATION - NOW DYNAMICALLY ACTIVE!
@@ -158,44 +176,11 @@ class WorkerRegistry:
 # ============================================================================ 
 # ORCHESTRATOR & SPARSE VRAM MANAGER
 # ============================================================================
-class IntelligentRouter:
-    def __init__(self):
-        self.model = "llama3.2:latest"
-        self.patterns = {
-            'code':[r'\bcode\b', r'\bscript\b', r'\bpython\b', r'\breact\b', r'\bpowershell\b', r'\bbash\b', r'\bdebug\b'],
-            'search':[r'\bsearch net\b', r'\bgoogle\b', r'\blook up\b', r'\bnews\b', r'\bwho is\b', r'\bweb search\b', r'\bonline\b', r'\blatest\b', r'\bcurrent\b', r'\btoday\b', r'\bprice\b'],
-            'files':[r'\bsearch pc\b', r'\bfind file\b', r'\bjpg\b', r'\bpng\b', r'\bpdf\b', r'\bdocument\b', r'\blocated\b']
-        }
-
-    async def route(self, task: str) -> str:
-        task_lower = task.lower().strip()
-        if task_lower.startswith('/'): return 'system'
-        if any(kw in task_lower for kw in["search pc", "find file", "local drive", ".pdf", ".jpg", ".png"]): return 'files'
-        if any(kw in task_lower for kw in["search net", "web search", "google", "online", "internet", "latest", "news", "2026", "price"]): return 'search'
-
-        for worker, patterns in self.patterns.items():
-            if any(re.search(p, task_lower) for p in patterns): return worker
-            
-        try:
-            prompt = """Analyze the user task and output ONLY ONE WORD (brain, code, search, files):
-            - brain: general questions, math, logic, advice
-            - code: programming, scripts, debugging, terminal
-            - search: internet/web search, current events, online prices, news, anything requiring live data
-            - files: local PC files, documents, drives
-            Task: """ + task
-            
-            response = await asyncio.to_thread(ollama.chat, model=self.model, messages=[{"role": "user", "content": prompt}], options={"temperature": 0.0, "num_predict": 5})
-            res_text = response['message']['content'].strip().lower()
-            for w in['brain', 'code', 'search', 'files']:
-                if w in res_text: return w
-        except Exception as e: 
-            logger.error(f"Router LLM Error: {e}")
-            
-        return 'brain'
-
 class SparseGPUManager:
     def __init__(self):
         self.active_model = None
+        self.swaps = 0
+        self.swap_seconds = 0.0
         self.sparse_executor = TurboSparseExecutor() if SPARSE_AVAILABLE else None
         
         self.worker_priorities = {
@@ -206,10 +191,19 @@ class SparseGPUManager:
             'system': 'CONSTITUTIONAL' 
         }
         self.models = { 'brain': 'llama3.2:latest', 'search': 'llama3.2:latest', 'code': 'qwen2.5-coder:14b', 'files': 'llama3.2:latest' }
-
-    async def optimize(self, target_worker: str, explicitly_requested_model: str = None):
+        # A shared model inherits the most protective priority of the workers using it
+        model_priorities = {}
+        for worker, model in self.models.items():
+            level = self.worker_priorities.get(worker, 'LOW')
+            current = model_priorities.get(model)
+            if current is None or PRIORITY_WEIGHT[level] < PRIORITY_WEIGHT[current]:
+                model_priorities[model] = level
+        self.residency = ResidencyManager(inference, VRAM_BUDGET_GB, MODEL_FOOTPRINTS, model_priorities)
+
+    async def optimize(self, target_worker: str, explicitly_requested_model: str = None) -> Optional[str]:
+        """Make the worker's model resident; returns the model to release() when the request ends"""
         target_model = explicitly_requested_model or self.models.get(target_worker)
-        if not target_model: return
+        if not target_model: return None
         
         if SPARSE_AVAILABLE and self.sparse_executor:
             priority = self.worker_priorities.get(target_worker, 'LOW')
@@ -222,15 +216,31 @@ class SparseGPUManager:
                 try: await self.sparse_executor.turbo_load(f"worker_module_{target_worker}")
                 except Exception as e: logger.warning(f"Sparse load warning: {e}")
         
-        if self.active_model and self.active_model != target_model:
-            logger.info(f"💾 VRAM: Offloading[{self.active_model}] from GPU...")
-            try: await asyncio.to_thread(ollama.generate, model=self.active_model, prompt='', keep_alive=0)
-            except Exception: pass
+        # Evict only what the memory budget requires (LRU weighted by priority)
+        started = time.perf_counter()
+        result = await self.residency.acquire(target_model)
+        if result["evicted"]:
+            self.swaps += 1
+            self.swap_seconds += time.perf_counter() - started
                 
         self.active_model = target_model
+        return target_model
+
+    def release(self, model: str):
+        self.residency.release(model)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"active_model": self.active_model, "swaps": self.swaps,
+                "swap_seconds": round(self.swap_seconds, 2)}
 
 smart_router = IntelligentRouter()
 vram_manager = SparseGPUManager()
+scheduler = WorkerScheduler(vram_manager.worker_priorities, WORKER_CONCURRENCY, WORKER_DEFAULT_CONCURRENCY,
+                            max_active=KERNEL_MAX_ACTIVE, max_queue=KERNEL_MAX_QUEUE, max_wait=KERNEL_MAX_WAIT,
+                            can_colocate=vram_manager.residency.fits)
+prewarmer = ModelPrewarmer(vram_manager.residency, vram_manager.models, scheduler.is_idle,
+                           min_probability=PREWARM_MIN_PROBABILITY, min_samples=PREWARM_MIN_SAMPLES,
+                           max_gb_per_hour=PREWARM_MAX_GB_PER_HOUR)
 
 # ============================================================================ 
 # PYDANTIC MODELS
@@ -253,6 +263,11 @@ class AnalysisRequest(BaseModel):
     analysis_type: str  # 'summary', 'trends', 'forecast', 'comparison', 'query'
     columns: Optional[List[str]] = None
     query: Optional[str] = None
+    page: int = 1
+    page_size: int = 50
+
+class EmbedRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=1024)
 
 # ============================================================================ 
 # APP INITIALIZATION
@@ -273,6 +288,14 @@ hands = HandsWorker(); hands.name = 'code'; workers.register(hands)
 memory = MemoryWorker(); memory.name = 'files'; workers.register(memory)
 system = SystemWorker(); system.name = 'system'; workers.register(system)
 
+# Live updates for the filename index (only once one has been built)
+fs_watcher = None
+if FS_WATCH_ENABLED and memory.file_index is not None:
+    fs_watcher = FsWatcher(memory.file_index, FS_WATCH_ROOTS,
+                           make_backend(FS_WATCH_BACKEND, poll_interval=FS_WATCH_POLL_INTERVAL),
+                           debounce=FS_WATCH_DEBOUNCE, max_delay=FS_WATCH_MAX_DELAY,
+                           max_queue=FS_WATCH_MAX_QUEUE, compact_every=FS_WATCH_COMPACT_EVERY)
+
 zero_drift_constitution = constitution
 legacy_constitution = LegacyConstitution()
 execution_guard = ExecutionGuard(invariant_registry)
@@ -283,8 +306,22 @@ audit = ConstitutionalAudit()
 async def lifespan(app: FastAPI):
     await init_db()
     asyncio.create_task(detector.start_monitoring())
+    telemetry_hub.add_listener(telemetry_store.add)
+    telemetry_hub.start()
+    if ROUTER_SEMANTIC:
+        asyncio.create_task(smart_router.load_semantic())
+    if fs_watcher is not None:
+        fs_watcher.start()
     yield
+    await telemetry_hub.stop()
+    if fs_watcher is not None:
+        await fs_watcher.close()
+    await prewarmer.close()
     await close_db()
+    await inference.close()
+    await asyncio.to_thread(zero_drift_constitution.ledger_writer.close)
+    await asyncio.to_thread(smart_router.history.close)
+    dataset_cache.close()
     for name, server in mcp_manager.servers.items():
         if server.process:
             try: server.process.terminate(); await asyncio.wait_for(server.process.wait(), timeout=5.0)
@@ -296,162 +333,154 @@ app.router.lifespan_context = lifespan
 # ============================================================================ 
 # LIVE HARDWARE TELEMETRY STREAM
 # ============================================================================
-async def generate_telemetry():
-    """Streams live hardware data to the frontend UI"""
-    last_net_io = psutil.net_io_counters()
-    last_time = time.time()
-    
-    while True:
-        try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            ram = psutil.virtual_memory()
-            ram_percent = ram.percent
-            
-            current_net_io = psutil.net_io_counters()
-            current_time = time.time()
-            time_delta = current_time - last_time
-            
-            if time_delta > 0:
-                down_speed = (current_net_io.bytes_recv - last_net_io.bytes_recv) / time_delta / (1024 * 1024) 
-                up_speed = (current_net_io.bytes_sent - last_net_io.bytes_sent) / time_delta / (1024 * 1024) 
-            else:
-                down_speed, up_speed = 0.0, 0.0
-                
-            last_net_io = current_net_io
-            last_time = current_time
-            gpu_temp = 45 + (cpu_percent * 0.3)
-            
-            payload = {
-                "cpu": round(cpu_percent, 1),
-                "ram": round(ram_percent, 1),
-                "networkDown": round(down_speed, 2),
-                "networkUp": round(up_speed, 2),
-                "gpuTemp": round(gpu_temp, 1)
-            }
-            yield sse(payload)
-            await asyncio.sleep(1.5)
-        except asyncio.CancelledError: break
-        except Exception as e:
-            logger.error(f"Telemetry error: {e}")
-            await asyncio.sleep(2)
+async def generate_telemetry(min_interval: float = 0.0, history: int = 0):
+    """Streams live hardware data to the frontend UI from the shared telemetry hub"""
+    async for snapshot in telemetry_hub.subscribe(min_interval=min_interval, replay=history):
+        yield sse(snapshot)
 
 @app.get("/kernel/telemetry")
-async def kernel_telemetry(request: Request):
-    return StreamingResponse(generate_telemetry(), media_type="text/event-stream")
+async def kernel_telemetry(request: Request, interval: float = 0.0, history: int = 0):
+    """?interval= downsamples this client (seconds between frames); ?history= replays recent samples"""
+    return StreamingResponse(generate_telemetry(min(max(interval, 0.0), 60.0), min(max(history, 0), telemetry_hub.history.maxlen)), media_type="text/event-stream")
+
+@app.get("/kernel/telemetry/range")
+async def kernel_telemetry_range(seconds: float = 300, start: float = None, end: float = None, resolution: str = "auto", max_points: int = 1000):
+    """Historical telemetry from memory: ?seconds= lookback or ?start=&end= (unix), resolution auto|raw|1s|10s|1m"""
+    end = end or time.time()
+    start = start if start is not None else end - seconds
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    try:
+        result = telemetry_store.range(start, end, resolution, max(1, min(max_points, 10000)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["summary"] = telemetry_store.summary(start, end)
+    return result
+
+@app.get("/kernel/telemetry/stats")
+async def kernel_telemetry_stats():
+    return telemetry_hub.get_stats()
 
 # ============================================================================ 
 # SPREADSHEET & DATA MATRIX ENDPOINTS
 # ============================================================================
+ALLOWED_UPLOAD_EXTENSIONS = {'.xlsx', '.xls', '.csv'}
+UPLOAD_MAX_BYTES = UPLOAD_MAX_MB * 1024 * 1024
+
+async def receive_upload(chunks: AsyncIterator[bytes], filename: str, upload_id: Optional[str], total: Optional[int]) -> Dict[str, Any]:
+    """
+    Stream an upload to disk in chunks, enforcing UPLOAD_MAX_MB and hashing on the way in,
+    then hand the file to the dataset cache (parsed in its process pool).
+    """
+    filename = Path(filename or "").name
+    file_ext = Path(filename).suffix.lower()
+    if file_ext not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Only .xlsx, .xls, and .csv files are supported for analysis.")
+    if total is not None and total > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds the {UPLOAD_MAX_MB} MB upload limit.")
+
+    if upload_id:
+        upload_progress.start(upload_id, filename, total)
+    file_path = UPLOAD_DIR / filename
+    part_path = file_path.with_name(file_path.name + ".part")
+    sha = hashlib.sha256()
+    received = 0
+    try:
+        with open(part_path, "wb") as buffer:
+            def write(chunk: bytes):
+                sha.update(chunk)
+                buffer.write(chunk)
+
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the {UPLOAD_MAX_MB} MB upload limit.")
+                await asyncio.to_thread(write, chunk)
+                upload_progress.update(upload_id, received=received)
+        os.replace(part_path, file_path)
+
+        # Parse once into the columnar cache; identical re-uploads are a hash hit
+        upload_progress.update(upload_id, phase="parsing")
+        info = await asyncio.to_thread(dataset_cache.ingest, file_path, filename, sha.hexdigest())
+    except BaseException as e:
+        part_path.unlink(missing_ok=True)
+        upload_progress.update(upload_id, phase="error", error=getattr(e, "detail", None) or str(e) or type(e).__name__)
+        raise
+
+    rows = info["rows"]
+    upload_progress.update(upload_id, phase="done", rows=rows, cached=info["cached"])
+    return {
+        "status": "success",
+        "filename": filename,
+        "type": file_ext,
+        "size": received,
+        "rows": rows,
+        "columns": info["columns"],
+        "hash": info["hash"],
+        "cached": info["cached"],
+        "message": f"✅ Successfully loaded {filename} ({rows} rows{', cached' if info['cached'] else ''})"
+    }
+
 @app.post("/kernel/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Handle physical file uploads and basic dataframe parsing."""
+async def upload_file(file: UploadFile = File(...), upload_id: Optional[str] = None):
+    """Handle multipart file uploads; pass ?upload_id= to follow progress over SSE."""
+    async def chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
     try:
-        file_ext = Path(file.filename).suffix.lower()
-        allowed_extensions = {'.xlsx', '.xls', '.csv'}
-        
-        if file_ext not in allowed_extensions:
-            raise HTTPException(status_code=400, detail="Only .xlsx, .xls, and .csv files are supported for analysis.")
-            
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        rows = 0
-        if file_ext in['.xlsx', '.xls']:
-            df = pd.read_excel(file_path)
-            rows = len(df)
-        elif file_ext == '.csv':
-            df = pd.read_csv(file_path)
-            rows = len(df)
-            
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "type": file_ext,
-            "size": os.path.getsize(file_path),
-            "rows": rows,
-            "message": f"✅ Successfully loaded {file.filename} ({rows} rows)"
-        }
+        return await receive_upload(chunks(), file.filename, upload_id, getattr(file, "size", None))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/kernel/analyze")
-async def analyze_spreadsheet(request: AnalysisRequest):
-    """Smart analysis endpoint that generates insights based on the uploaded file."""
+@app.post("/kernel/upload/stream")
+async def upload_stream(request: Request, filename: str, upload_id: Optional[str] = None):
+    """
+    Raw-body upload (Content-Type: application/octet-stream). Unlike multipart, the body
+    is never spooled first, so oversized files are rejected from Content-Length or mid-stream.
+    """
+    length = request.headers.get("content-length")
     try:
-        file_path = UPLOAD_DIR / request.filename
-        
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail=f"File {request.filename} not found. Please upload it first.")
-
-        if request.analysis_type == "summary":
-            content = f"""### 📊 Data Matrix Analysis: `{request.filename}`
-
-**Key Findings:**
-- Total dimensions: Processed all rows successfully
-- Missing data: 3.2% (mostly in secondary columns)
-- Structural Integrity: 98.5%
-
-**Top Variables by Data Quality:**
-1. Transaction ID (100% complete)
-2. Date (100% complete)
-3. Revenue (99.8% complete)
-
-**Numeric Summary:**
-- Average transaction: $847.32
-- Median: $234.50
-- Standard deviation: $1,234.67
-
-**Anomalies Detected:**
-- ⚠️ 23 entries exceed $10,000 threshold (flagged for review)
-- ⚠️ 47 entries below $20 floor (possible test data)"""
-
-        elif request.analysis_type == "trends":
-            content = f"""### 📈 Trend Analysis for `{request.filename}`
-
-**Timeline Trajectory:**
-- Current Quarter: +12.3% growth detected
-- Previous Quarter: +5.7% growth
-- Initial Baseline: -2.1% decline
-
-**Algorithmic Patterns:**
-- High Velocity Period: Q4 (Oct-Dec) carries 34% of volume
-- Low Velocity Period: Q1 (Jan-Mar) carries 18% of volume
-- **Overall YoY Growth:** 23.4%
-
-**Forward Projection:** +15.2% velocity expected based on current trajectory."""
-
-        elif request.analysis_type == "forecast":
-            content = f"""### 🔮 Predictive Model Forecast: `{request.filename}`
-
-**Next 90-Day Projection:**
-- Month 1: $234,567 (+8.2%)
-- Month 2: $245,678 (+4.7%)
-- Month 3: $267,890 (+9.0%)
-
-**Confidence Intervals:**
-- 90% CI: ±5.3% variance
-- 95% CI: ±7.8% variance
-- 99% CI: ±12.4% variance
-
-**Identified Risk Factors:**
-- Seasonal contraction expected in late Q3 (-15%)
-- Market volatility index: Moderate."""
-
-        else: # Compare or Query
-            content = f"""### 🔍 Query Results: `{request.filename}`
+        return await receive_upload(request.stream(), filename, upload_id, int(length) if length else None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-**Data Extractions:**
-| Segment | Revenue | Growth | Efficiency |
-|---------|---------|--------|------------|
-| Alpha   | $1.2M   | +18%   | 92%        |
-| Beta    | $847K   | +12%   | 87%        |
-| Gamma   | $523K   | +8%    | 78%        |
-| Delta   | $234K   | +5%    | 95%        |
+@app.get("/kernel/upload/{upload_id}/progress")
+async def upload_progress_stream(upload_id: str):
+    """SSE: receiving (bytes) -> parsing -> done | error"""
+    async def events():
+        async for state in upload_progress.subscribe(upload_id):
+            yield sse(state)
+    return StreamingResponse(events(), media_type="text/event-stream")
 
-*Note: Top 10% of entries account for 47% of total target volume.*"""
+@app.get("/kernel/datasets/stats")
+async def kernel_dataset_stats():
+    """Columnar upload cache and query engine counters"""
+    return {**dataset_cache.get_stats(), "queries": query_engine.get_stats()}
 
-        return {"type": request.analysis_type, "content": content}
+@app.post("/kernel/analyze")
+async def analyze_spreadsheet(request: AnalysisRequest):
+    """Smart analysis endpoint that generates insights based on the uploaded file."""
+    try:
+        def run():
+            if request.analysis_type == "query" and looks_like_query(request.query):
+                data = query_engine.run(request.filename, request.query, request.page, request.page_size)
+                return {"content": query_engine.render(request.filename, request.query, data), "data": data}
+            digest = dataset_cache.resolve(request.filename)
+            if digest is None:
+                raise FileNotFoundError(f"File {request.filename} not found. Please upload it first.")
+            dtypes = dataset_cache.metadata(digest)["dtypes"]
+            columns = spreadsheet_analyzer.focus_columns(dtypes, request.columns, request.query)
+            df = dataset_cache.load(request.filename, columns)
+            return spreadsheet_analyzer.analyze(df, request.analysis_type, request.filename)
+
+        # Parsing and analysis are CPU-bound; keep them off the event loop
+        result = await asyncio.to_thread(run)
+        return {"type": request.analysis_type, "content": result["content"], "data": result["data"]}
             
     except Exception as e:
         return {"error": str(e)}
@@ -470,20 +499,50 @@ async def format_response_for_streaming(result: dict, worker_name: str) -> str:
         return str(result["results"])
     else: return str(result)
 
+# Seconds a worker may stay silent before the stream is abandoned
+WORKER_IDLE_TIMEOUT = 60
+
+async def stream_worker(worker: Any, task: str, model: str, worker_name: str) -> AsyncIterator[str]:
+    """Yield partial content from a worker; non-streaming workers yield their whole answer once."""
+    if hasattr(worker, "stream"):
+        async for chunk in worker.stream(task, model=model):
+            yield chunk
+        return
+    result = await worker.process(task, model=model)
+    yield await format_response_for_streaming(result, worker_name)
+
 async def generate_stream(task: str, worker_name: str = "auto", model: str = None, session_id: str = None, db: AsyncSession = Depends(get_db)):
+    ticket = gpu_model = None
     try:
         if worker_name == "auto" or not worker_name:
             worker_name = await smart_router.route(task)
             logger.info(f"🤖 Auto-Router dynamically selected: [{worker_name.upper()}]")
+        else:
+            smart_router.learn(task, worker_name)
 
-        await vram_manager.optimize(worker_name, model)
-        ruling = zero_drift_constitution.validate_task(task, worker_name, session_id or "anonymous")
+        try:
+            ruling = zero_drift_constitution.validate_task(task, worker_name, session_id or "anonymous")
+        except LedgerBackpressureError as e:
+            yield sse({"error": f"⏳ {e}", "status": "failed", "retry_after": 2})
+            return
         
         if ruling["verdict"] == "denied":
             yield sse({"error": f"⚠️ Constitutional violation: {ruling['reason']}", "constitutional": True})
             yield sse({"status": "failed"})
             return
-        
+
+        prewarmer.observe(session_id, worker_name, model)
+
+        # Admission control: wait for a worker slot, reporting queue position meanwhile
+        try:
+            ticket = scheduler.enqueue(worker_name, model or vram_manager.models.get(worker_name))
+        except SchedulerFullError as e:
+            yield sse({"error": f"⏳ {e}", "status": "failed", "retry_after": 2})
+            return
+        async for position in scheduler.wait(ticket):
+            yield sse({"status": "queued", "worker": worker_name, "position": position})
+
+        gpu_model = await vram_manager.optimize(worker_name, model)
         sparse_flag = SPARSE_AVAILABLE
         yield sse({"status": "started", "worker": worker_name, "constitutional": ruling["verdict"], "sparse_active": sparse_flag})
         
@@ -496,17 +555,30 @@ async def generate_stream(task: str, worker_name: str = "auto", model: str = Non
             yield sse({"error": f"Worker '{worker_name}' not found", "status": "failed"})
             return
         
-        try: result = await asyncio.wait_for(worker.process(task, model=model), timeout=60)
+        chunks = stream_worker(worker, task, model, worker_name)
+        try:
+            while True:
+                try: chunk = await asyncio.wait_for(anext(chunks), timeout=WORKER_IDLE_TIMEOUT)
+                except StopAsyncIteration: break
+                yield sse({"content": chunk, "status": "streaming"})
         except asyncio.TimeoutError:
             yield sse({"error": f"Worker '{worker_name}' timed out", "status": "failed"})
             return
+        finally:
+            await chunks.aclose()
         
-        formatted_content = await format_response_for_streaming(result, worker_name)
-        yield sse({"content": formatted_content, "status": "complete"})
+        yield sse({"status": "complete"})
         
     except Exception as e:
         logger.error(f"Stream error: {e}")
         yield sse({"error": f"Internal error: {str(e)}", "status": "failed"})
+    finally:
+        if gpu_model:
+            vram_manager.release(gpu_model)
+        if ticket:
+            scheduler.release(ticket)
+            if PREWARM_ENABLED:
+                prewarmer.maybe_prewarm(session_id)
 
 # ============================================================================ 
 # STANDARD ENDPOINTS
@@ -523,6 +595,11 @@ async def create_session(db: AsyncSession = Depends(get_db)):
 async def kernel_stream(request: Request, db: AsyncSession = Depends(get_db)):
     try: data = await request.json()
     except: raise HTTPException(status_code=400, detail="Invalid JSON")
+    # Backpressure before the stream opens; generate_stream re-checks when it enqueues
+    if scheduler.is_full():
+        raise HTTPException(status_code=429, detail="Kernel queue is full - retry shortly", headers={"Retry-After": "2"})
+    if zero_drift_constitution.ledger_writer.saturated:
+        raise HTTPException(status_code=429, detail="Constitutional ledger is behind - retry shortly", headers={"Retry-After": "2"})
     return StreamingResponse(generate_stream(data.get("task", ""), data.get("worker", "auto"), data.get("model"), data.get("session_id") or request.headers.get("X-Session-ID"), db), media_type="text/event-stream")
 
 @app.get("/chat/{session_id}/history")
@@ -563,6 +640,58 @@ async def get_sparse_metrics():
           "Constitutional (Auto)"
         ]
     }
+@app.get("/kernel/ledger-metrics")
+async def get_ledger_metrics():
+    """Queue depth and group-commit latency of the constitutional ledger writer"""
+    return zero_drift_constitution.ledger_writer.get_metrics()
+
+@app.get("/kernel/scheduler")
+async def get_scheduler_stats():
+    """Active slots, waiting requests, model-affinity counters, admission waits and VRAM swaps"""
+    return {**scheduler.get_stats(), "vram": vram_manager.get_stats()}
+
+@app.get("/kernel/residency")
+async def get_residency():
+    """Loaded models, memory budget use and residency hit/miss/eviction counters"""
+    await vram_manager.residency.refresh()
+    return vram_manager.residency.get_stats()
+
+@app.post("/kernel/embed")
+async def embed_texts(request: EmbedRequest):
+    """Embeddings from the shared, micro-batched model (instead of shelling out to embed.py)"""
+    try:
+        vectors = await embedding_service.embed_many(request.texts)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"model": embedding_service.model_name, "dim": embedding_service.dim, "embeddings": vectors.tolist()}
+
+@app.get("/kernel/embed/stats")
+async def get_embedding_stats():
+    return embedding_service.get_stats()
+
+@app.get("/kernel/router")
+async def get_router_stats():
+    """Routing tier counts, p50/p99 latency per tier, cache and classifier state"""
+    return smart_router.get_stats()
+
+@app.get("/kernel/prewarm")
+async def get_prewarm_stats():
+    """Learned worker transitions and prewarm hit rate / cost"""
+    return {"enabled": PREWARM_ENABLED, **prewarmer.get_stats()}
+
+@app.get("/kernel/files")
+async def get_file_index_stats():
+    """Filename index size/query latency and watcher event lag, queue depth, backend"""
+    if memory.file_index is None:
+        return {"index": None, "watcher": None, "hint": "python file_index.py build"}
+    return {"index": memory.file_index.get_stats(),
+            "watcher": fs_watcher.get_stats() if fs_watcher is not None else None}
+
+@app.get("/kernel/verdict-cache")
+async def get_verdict_cache_stats():
+    """Hit rate and size of the constitutional verdict cache"""
+    return {"constitution_version": zero_drift_constitution.version, **zero_drift_constitution.verdict_cache.get_stats()}
+
 @app.get("/workers")
 async def list_workers():
     """List available workers with their status and models"""
@@ -0,0 +1,270 @@
+# backend/ledger_writer.py
+"""
+Constitutional Ledger Writer - Background group-commit for the JSONL ledger
+Rulings are queued from the request path and written in batches off the event loop;
+submit() never blocks and never drops a record
+"""
+import json
+import os
+import queue
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+FSYNC_POLICIES = ("none", "interval", "batch")
+
+class LedgerBackpressureError(Exception):
+    """Raised by check_capacity() while the spill is at capacity (HTTP 429)"""
+
+class LedgerWriter:
+    """
+    Append-only JSONL writer fed by a bounded queue. When the queue is full, records
+    spill to an in-memory list the writer drains after the queue (ledger order is kept).
+
+    submit() itself never blocks or drops, so the spill is bounded by admission instead:
+    once it holds `max_spill` records, check_capacity() raises LedgerBackpressureError
+    and callers refuse new work before producing a record. The spill can then only
+    exceed `max_spill` by the records of work already admitted.
+
+    fsync_policy:
+      - none:     flush to the OS only; the kernel decides when it hits disk
+      - interval: fsync at most once every `fsync_interval` seconds, and after a
+                  quiet `fsync_interval` if anything is still unsynced
+      - batch:    fsync after every committed batch
+
+    on_commit(batch, spans) is called under the file lock after each batch is
+    written, with the (byte offset, length) of every record - used to keep the
+    ruling store's sidecar offset index in ledger order.
+    """
+
+    def __init__(self, path: Path, max_queue: int = 10000, max_spill: int = 50000, batch_size: int = 256,
+                 fsync_policy: str = "interval", fsync_interval: float = 1.0,
+                 on_commit: Optional[Callable[[List[Dict[str, Any]], List[Tuple[int, int]]], None]] = None):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}, got {fsync_policy!r}")
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.max_spill = max_spill
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.on_commit = on_commit
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._spill: List[Dict[str, Any]] = []   # overflow past a full queue, oldest first
+        self._spill_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_fsync = 0.0
+        self._dirty = False   # written since the last fsync
+        self._closed = False
+
+        self.metrics = {
+            "records_written": 0,
+            "batches_committed": 0,
+            "fsyncs": 0,
+            "spilled_records": 0,
+            "max_spill_depth": 0,
+            "backpressure_rejections": 0,
+            "write_errors": 0,
+            "max_queue_depth": 0,
+            "last_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "total_commit_ms": 0.0,
+        }
+
+    # ========================================================================
+    # PRODUCER SIDE
+    # ========================================================================
+    def submit(self, record: Dict[str, Any]):
+        """Queue a record for the next group commit (never blocks, never drops records)"""
+        if self._closed:
+            self._commit([record])
+            return
+        self._ensure_started()
+        with self._spill_lock:
+            # Once spilling, keep spilling until the writer has drained it, so order holds
+            if not self._spill:
+                try:
+                    self._queue.put_nowait(record)
+                except queue.Full:
+                    pass
+                else:
+                    depth = self._queue.qsize()
+                    if depth > self.metrics["max_queue_depth"]:
+                        self.metrics["max_queue_depth"] = depth
+                    return
+            self._spill.append(record)
+            self.metrics["spilled_records"] += 1
+            depth = len(self._spill)
+            if depth > self.metrics["max_spill_depth"]:
+                self.metrics["max_spill_depth"] = depth
+            if depth == self.max_spill:
+                logger.warning(f"⚠️ Ledger spill at capacity ({depth} records) - disk is not keeping up, "
+                               f"refusing new work until it drains")
+
+    @property
+    def saturated(self) -> bool:
+        return len(self._spill) >= self.max_spill
+
+    def check_capacity(self):
+        """Raise LedgerBackpressureError while the spill is full (call before producing a record)"""
+        if self.saturated:
+            self.metrics["backpressure_rejections"] += 1
+            raise LedgerBackpressureError(f"Constitutional ledger is {len(self._spill)} records behind - retry shortly")
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    # ========================================================================
+    # WRITER THREAD
+    # ========================================================================
+    def _run(self):
+        while True:
+            try:
+                record = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                # Quiet: spilled records are next in ledger order, then the pending interval fsync
+                if not self._drain_spill():
+                    self._sync_if_dirty()
+                continue
+            if record is None:
+                self._drain_spill()
+                self._queue.task_done()
+                break
+            batch = [record]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(batch)
+            if stop:
+                self._drain_spill()
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                break
+            if self._queue.empty():
+                self._drain_spill()
+
+    def _drain_spill(self) -> bool:
+        """Commit everything spilled (only once the queue ahead of it is written); records
+        leave the spill after they are committed, so submit() keeps appending behind them"""
+        drained = False
+        while True:
+            with self._spill_lock:
+                batch = self._spill[:self.batch_size]
+            if not batch:
+                return drained
+            self._commit(batch)
+            with self._spill_lock:
+                del self._spill[:len(batch)]
+            drained = True
+
+    def _sync_if_dirty(self):
+        if not self._dirty:
+            return
+        try:
+            with self._file_lock, open(self.path, "ab") as f:
+                os.fsync(f.fileno())
+            self._last_fsync = time.monotonic()
+            self._dirty = False
+            self.metrics["fsyncs"] += 1
+        except Exception as e:
+            logger.error(f"Ledger fsync failed: {e}")
+
+    def _commit(self, batch: List[Dict[str, Any]]):
+        """Write one batch with a single write() call, then apply the fsync policy"""
+        start = time.perf_counter()
+        lines = [(json.dumps(r) + "\n").encode() for r in batch]
+        try:
+            with self._file_lock:
+                with open(self.path, "ab") as f:
+                    offset = f.seek(0, os.SEEK_END)
+                    f.write(b"".join(lines))
+                    f.flush()
+                    now = time.monotonic()
+                    if self.fsync_policy == "batch" or (
+                        self.fsync_policy == "interval" and now - self._last_fsync >= self.fsync_interval
+                    ):
+                        os.fsync(f.fileno())
+                        self._last_fsync = now
+                        self._dirty = False
+                        self.metrics["fsyncs"] += 1
+                    elif self.fsync_policy == "interval":
+                        self._dirty = True
+                if self.on_commit:
+                    spans = []
+                    for line in lines:
+                        spans.append((offset, len(line)))
+                        offset += len(line)
+                    self.on_commit(batch, spans)
+        except Exception as e:
+            self.metrics["write_errors"] += 1
+            logger.error(f"Failed to write to ledger: {e}")
+            return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.metrics["records_written"] += len(batch)
+        self.metrics["batches_committed"] += 1
+        self.metrics["last_commit_ms"] = elapsed_ms
+        self.metrics["total_commit_ms"] += elapsed_ms
+        if elapsed_ms > self.metrics["max_commit_ms"]:
+            self.metrics["max_commit_ms"] = elapsed_ms
+
+    # ========================================================================
+    # LIFECYCLE & METRICS
+    # ========================================================================
+    def flush(self):
+        """Block until everything queued so far is on disk (per the fsync policy)"""
+        if self._thread is not None:
+            self._queue.join()
+            while True:
+                with self._spill_lock:
+                    if not self._spill:
+                        break
+                time.sleep(0.01)
+
+    def close(self, timeout: float = 10.0):
+        """Drain the queue, fsync, and stop the writer thread (shutdown hook)"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=timeout)
+        if self.fsync_policy != "none" and self.path.exists():
+            try:
+                with self._file_lock, open(self.path, "a") as f:
+                    os.fsync(f.fileno())
+            except Exception as e:
+                logger.error(f"Final ledger fsync failed: {e}")
+        logger.info(f"📜 Ledger writer flushed ({self.metrics['records_written']} records)")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        batches = self.metrics["batches_committed"]
+        return {
+            **self.metrics,
+            "queue_depth": self._queue.qsize(),
+            "spill_depth": len(self._spill),
+            "spill_capacity": self.max_spill,
+            "saturated": self.saturated,
+            "avg_commit_ms": round(self.metrics["total_commit_ms"] / batches, 3) if batches else 0.0,
+            "avg_batch_size": round(self.metrics["records_written"] / batches, 1) if batches else 0.0,
+            "fsync_policy": self.fsync_policy,
+        }
@@ -0,0 +1,156 @@
+# backend/model_prewarmer.py
+"""
+Model Prewarmer - Loads the model a session is likely to need next while the GPU is idle
+Learns worker -> worker transition counts from consecutive requests in the same session
+(e.g. files followed by brain). After a request finishes, if the most likely next worker's
+model is not resident, fits without evicting anything and the kernel is idle, the model
+is loaded in the background with an empty generate.
+"""
+import asyncio
+import time
+import logging
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ModelPrewarmer:
+    """
+    observe() when a request's worker is known, maybe_prewarm() when it finishes.
+    Cost cap: at most `max_gb_per_hour` of prewarm loads in any rolling hour, one load
+    in flight, and never a load that would evict a resident model.
+    """
+
+    def __init__(self, residency, models: Dict[str, str], is_idle: Callable[[], bool],
+                 min_probability: float = 0.5, min_samples: int = 3, max_gb_per_hour: float = 40.0,
+                 keep_alive: str = "10m", max_sessions: int = 1000):
+        self.residency = residency
+        self.models = models
+        self.is_idle = is_idle
+        self.min_probability = min_probability
+        self.min_samples = min_samples
+        self.max_gb_per_hour = max_gb_per_hour
+        self.keep_alive = keep_alive
+        self.max_sessions = max_sessions
+        self.transitions: Dict[str, Dict[str, int]] = {}
+        self._last_worker: "OrderedDict[str, str]" = OrderedDict()   # session -> last worker
+        self._pending: Dict[str, str] = {}                            # session -> prewarmed model
+        self._loads: deque = deque()                                  # (timestamp, gb) within the last hour
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"predictions": 0, "prewarms": 0, "hits": 0, "misses": 0, "evicted_before_use": 0,
+                      "skipped_resident": 0, "skipped_busy": 0, "skipped_no_room": 0, "skipped_cost": 0,
+                      "errors": 0, "gb_loaded": 0.0, "load_seconds": 0.0}
+
+    # ========================================================================
+    # LEARNING
+    # ========================================================================
+    def observe(self, session_id: Optional[str], worker: str, model: Optional[str] = None):
+        """Record that `session_id` is now using `worker` (scoring any prewarm made for it)"""
+        if not session_id:
+            return
+        model = model or self.models.get(worker)
+        prewarmed = self._pending.pop(session_id, None)
+        if prewarmed is not None:
+            if prewarmed != model:
+                self.stats["misses"] += 1
+            elif self.residency.is_resident(model):
+                self.stats["hits"] += 1
+            else:
+                self.stats["evicted_before_use"] += 1
+
+        previous = self._last_worker.pop(session_id, None)
+        if previous is not None:
+            row = self.transitions.setdefault(previous, {})
+            row[worker] = row.get(worker, 0) + 1
+        self._last_worker[session_id] = worker
+        while len(self._last_worker) > self.max_sessions:
+            stale, _ = self._last_worker.popitem(last=False)
+            self._pending.pop(stale, None)
+
+    def predict(self, worker: str) -> Optional[Tuple[str, float]]:
+        """Most likely next worker after `worker` and its probability, once enough samples exist"""
+        row = self.transitions.get(worker)
+        if not row:
+            return None
+        total = sum(row.values())
+        if total < self.min_samples:
+            return None
+        nxt, count = max(row.items(), key=lambda item: item[1])
+        probability = count / total
+        return (nxt, probability) if probability >= self.min_probability else None
+
+    # ========================================================================
+    # PREWARMING
+    # ========================================================================
+    def _spent_gb(self, now: float) -> float:
+        while self._loads and now - self._loads[0][0] > 3600:
+            self._loads.popleft()
+        return sum(gb for _, gb in self._loads)
+
+    def maybe_prewarm(self, session_id: Optional[str]) -> Optional[str]:
+        """Start a background load of the session's predicted next model; returns it if started"""
+        worker = self._last_worker.get(session_id) if session_id else None
+        prediction = self.predict(worker) if worker else None
+        if prediction is None:
+            return None
+        model = self.models.get(prediction[0])
+        if not model:
+            return None
+        self.stats["predictions"] += 1
+        if self.residency.is_resident(model):
+            self.stats["skipped_resident"] += 1
+            return None
+        if not self.is_idle() or (self._task is not None and not self._task.done()):
+            self.stats["skipped_busy"] += 1
+            return None
+        if not self.residency.fits(model):
+            self.stats["skipped_no_room"] += 1
+            return None
+        now = time.monotonic()
+        size = self.residency.footprint(model)
+        if self._spent_gb(now) + size > self.max_gb_per_hour:
+            self.stats["skipped_cost"] += 1
+            return None
+
+        self._loads.append((now, size))
+        self._pending[session_id] = model
+        self._task = asyncio.create_task(self._load(model, size))
+        logger.info(f"🔥 PREWARM: Loading [{model}] for likely next worker [{prediction[0]}] "
+                    f"(p={prediction[1]:.2f})")
+        return model
+
+    async def _load(self, model: str, size: float):
+        started = time.perf_counter()
+        await self.residency.acquire(model)
+        try:
+            await self.residency.client.generate(model=model, prompt="", keep_alive=self.keep_alive, timeout=120)
+            self.stats["prewarms"] += 1
+            self.stats["gb_loaded"] += size
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Prewarm of {model} failed: {e}")
+        finally:
+            self.residency.release(model)
+            self.stats["load_seconds"] += time.perf_counter() - started
+
+    async def close(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try: await self._task
+            except (asyncio.CancelledError, Exception): pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        scored = self.stats["hits"] + self.stats["misses"] + self.stats["evicted_before_use"]
+        return {
+            **self.stats,
+            "gb_loaded": round(self.stats["gb_loaded"], 2),
+            "load_seconds": round(self.stats["load_seconds"], 2),
+            "hit_rate": round(self.stats["hits"] / scored, 4) if scored else 0.0,
+            "gb_last_hour": round(self._spent_gb(time.monotonic()), 2),
+            "max_gb_per_hour": self.max_gb_per_hour,
+            "sessions": len(self._last_worker),
+            "transitions": {
+                src: {dst: round(n / sum(row.values()), 3) for dst, n in row.items()}
+                for src, row in self.transitions.items()
+            },
+        }
@@ -16,6 +16,7 @@ from datetime import datetime
 from database import get_db
 from services import WorkerLogService, HealthCheckService
 from zero_drift_core import constitution
+from ledger_writer import LedgerBackpressureError
 from drift_detector import detector
 from drift_detector import detector as drift_monitor
 
@@ -181,7 +182,10 @@ async def heal_system():
 @router.post("/validate-task")
 async def validate_constitutional_task(task: str, worker: str, session_id: str):
     """Validate a task against the constitution"""
-    ruling = constitution.validate_task(task, worker, session_id)
+    try:
+        ruling = constitution.validate_task(task, worker, session_id)
+    except LedgerBackpressureError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "2"})
     return ruling
 
 @router.get("/ruling-history/{session_id}")
@@ -192,6 +196,15 @@ async def get_ruling_history(session_id: str, limit: int = 50):
         "rulings": constitution.get_ruling_history(session_id, limit)
     }
 
+@router.get("/rulings")
+async def get_rulings_window(since: float, until: float = None, limit: int = 100):
+    """Get recent constitutional rulings in a time window (unix timestamps)"""
+    return {
+        "since": since,
+        "until": until,
+        "rulings": constitution.get_rulings_since(since, until, limit)
+    }
+
 @router.get("/constitution")
 async def get_constitution():
     """Get the full constitution text"""
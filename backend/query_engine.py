@@ -0,0 +1,411 @@
+# backend/query_engine.py
+"""
+Query Engine - Ad-hoc SQL-style queries over cached upload datasets
+    [SELECT cols | agg(col) [AS name], ...] [WHERE pred [AND|OR pred ...]]
+    [GROUP BY cols] [ORDER BY key [ASC|DESC], ...] [LIMIT n]
+WHERE clauses are pushed down into the Parquet reader (row-group skipping + row filtering)
+and only referenced columns are read; results are cached by (dataset hash, normalized query)
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import DatasetCache, PARQUET_AVAILABLE
+
+KEYWORDS = {"select", "where", "group", "by", "order", "limit", "and", "or", "in", "not", "as", "asc", "desc"}
+CLAUSE_STARTS = ("select", "where", "group", "order", "limit")
+AGGREGATES = {"sum": "sum", "avg": "mean", "mean": "mean", "min": "min", "max": "max",
+              "count": "count", "median": "median", "nunique": "nunique"}
+OPERATORS = {"=": "==", "==": "==", "!=": "!=", "<>": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+      | '(?P<string>(?:[^']|'')*)'
+      | "(?P<dquoted>[^"]*)"
+      | `(?P<bquoted>[^`]*)`
+      | (?P<op><=|>=|<>|!=|==|[=<>(),*])
+      | (?P<word>[A-Za-z_][\w.]*)
+    )""", re.VERBOSE)
+
+class QueryError(ValueError):
+    pass
+
+Literal = Union[str, float]
+
+@dataclass(frozen=True)
+class SelectItem:
+    column: Optional[str]          # None for count(*)
+    agg: Optional[str] = None
+    alias: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self.alias:
+            return self.alias
+        if self.agg:
+            return f"{self.agg}({self.column or '*'})"
+        return self.column
+
+@dataclass(frozen=True)
+class Query:
+    select: Tuple[SelectItem, ...] = ()                                  # () = all columns
+    where: Tuple[Tuple[Tuple[str, str, Any], ...], ...] = ()             # OR of ANDs
+    group_by: Tuple[str, ...] = ()
+    order_by: Tuple[Tuple[str, bool], ...] = ()                          # (key, descending)
+    limit: Optional[int] = None
+
+    def columns(self) -> List[str]:
+        """Every dataset column the query touches (for projection pushdown)"""
+        cols = [s.column for s in self.select if s.column]
+        cols += [c for conj in self.where for c, _, _ in conj]
+        cols += list(self.group_by)
+        aliases = {s.name for s in self.select}
+        cols += [k for k, _ in self.order_by if k not in aliases]
+        return list(dict.fromkeys(cols))
+
+# ============================================================================
+# PARSER
+# ============================================================================
+def looks_like_query(text: Optional[str]) -> bool:
+    """True when the text starts with a query clause (vs. free-form chat)"""
+    first = (text or "").strip().split(None, 1)
+    return bool(first) and first[0].lower() in CLAUSE_STARTS
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    tokens, pos, text = [], 0, text.strip().rstrip(";")
+    while pos < len(text):
+        m = TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"Unexpected input at: {text[pos:pos + 20]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "number":
+            tokens.append(("literal", float(m.group(kind))))
+        elif kind == "string":
+            tokens.append(("literal", m.group(kind).replace("''", "'")))
+        elif kind in ("dquoted", "bquoted"):
+            tokens.append(("ident", m.group(kind)))
+        elif kind == "op":
+            tokens.append(("op", m.group(kind)))
+        else:
+            word = m.group(kind)
+            tokens.append(("kw", word.lower()) if word.lower() in KEYWORDS else ("ident", word))
+    return tokens
+
+class _Parser:
+    def __init__(self, text: str, columns: Dict[str, str]):
+        self.tokens = _tokenize(text)
+        self.i = 0
+        # case-insensitive column resolution
+        self.columns = {c.lower(): c for c in columns}
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Any]:
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def accept(self, kind: str, value: Any = None) -> bool:
+        k, v = self.peek()
+        if k == kind and (value is None or v == value):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Any = None) -> Any:
+        k, v = self.peek()
+        if k != kind or (value is not None and v != value):
+            raise QueryError(f"Expected {value or kind}, found {v!r}" if v is not None else f"Expected {value or kind} at end of query")
+        self.i += 1
+        return v
+
+    def column(self) -> str:
+        name = self.expect("ident")
+        resolved = self.columns.get(name.lower())
+        if resolved is None:
+            raise QueryError(f"Unknown column '{name}'. Columns: {', '.join(self.columns.values())}")
+        return resolved
+
+    def literal(self) -> Literal:
+        k, v = self.peek()
+        if k in ("literal", "ident"):  # bare words are accepted as strings
+            self.i += 1
+            return v
+        raise QueryError(f"Expected a value, found {v!r}")
+
+    def parse(self) -> Query:
+        select, where, group_by, order_by, limit = (), (), (), (), None
+        if self.accept("kw", "select"):
+            select = self.select_list()
+        if self.accept("kw", "where"):
+            where = self.condition()
+        if self.accept("kw", "group"):
+            self.expect("kw", "by")
+            group_by = self.comma_list(self.column)
+        if self.accept("kw", "order"):
+            self.expect("kw", "by")
+            order_by = self.comma_list(self.order_item)
+        if self.accept("kw", "limit"):
+            value = self.expect("literal")
+            if not isinstance(value, float) or value < 0 or value != int(value):
+                raise QueryError("LIMIT must be a non-negative integer")
+            limit = int(value)
+        if self.peek()[0] is not None:
+            raise QueryError(f"Unexpected {self.peek()[1]!r}")
+        return Query(select, where, group_by, order_by, limit)
+
+    def comma_list(self, item) -> tuple:
+        items = [item()]
+        while self.accept("op", ","):
+            items.append(item())
+        return tuple(items)
+
+    def select_list(self) -> Tuple[SelectItem, ...]:
+        if self.accept("op", "*"):
+            return ()
+        return self.comma_list(self.select_item)
+
+    def select_item(self) -> SelectItem:
+        k, v = self.peek()
+        if k == "ident" and v.lower() in AGGREGATES and self.peek(1) == ("op", "("):
+            self.i += 2
+            agg = v.lower()
+            column = None if agg == "count" and self.accept("op", "*") else self.column()
+            self.expect("op", ")")
+        else:
+            agg, column = None, self.column()
+        alias = self.expect("ident") if self.accept("kw", "as") else None
+        return SelectItem(column, agg, alias)
+
+    def order_item(self) -> Tuple[str, bool]:
+        k, v = self.peek()
+        if k == "ident" and v.lower() in AGGREGATES and self.peek(1) == ("op", "("):
+            key = self.select_item().name
+        else:
+            self.i += 1
+            if k != "ident":
+                raise QueryError(f"Expected an ORDER BY key, found {v!r}")
+            key = self.columns.get(v.lower(), v)  # column or SELECT alias
+        if self.accept("kw", "desc"):
+            return key, True
+        self.accept("kw", "asc")
+        return key, False
+
+    def condition(self) -> tuple:
+        disjuncts = [self.conjunction()]
+        while self.accept("kw", "or"):
+            disjuncts.append(self.conjunction())
+        return tuple(disjuncts)
+
+    def conjunction(self) -> tuple:
+        preds = [self.predicate()]
+        while self.accept("kw", "and"):
+            preds.append(self.predicate())
+        return tuple(preds)
+
+    def predicate(self) -> Tuple[str, str, Any]:
+        column = self.column()
+        negate = self.accept("kw", "not")
+        if self.accept("kw", "in"):
+            self.expect("op", "(")
+            values = self.comma_list(self.literal)
+            self.expect("op", ")")
+            return column, "not in" if negate else "in", values
+        if negate:
+            raise QueryError("NOT is only supported as NOT IN")
+        op = self.expect("op")
+        if op not in OPERATORS:
+            raise QueryError(f"Unsupported operator {op!r}")
+        return column, OPERATORS[op], self.literal()
+
+def parse_query(text: str, dtypes: Dict[str, str]) -> Query:
+    """Parse against a dataset schema; literals are coerced to each column's type"""
+    query = _Parser(text, dtypes).parse()
+    if query.where:
+        query = Query(query.select, tuple(
+            tuple((c, op, _coerce(c, v, dtypes[c])) for c, op, v in conj) for conj in query.where
+        ), query.group_by, query.order_by, query.limit)
+    return query
+
+def _is_numeric(dtype: str) -> bool:
+    return dtype.startswith(("int", "uint", "float"))
+
+def _coerce(column: str, value: Any, dtype: str) -> Any:
+    if isinstance(value, tuple):
+        return tuple(_coerce(column, v, dtype) for v in value)
+    if _is_numeric(dtype):
+        try:
+            number = float(value)
+        except ValueError:
+            raise QueryError(f"Column '{column}' is numeric; {value!r} is not a number")
+        return int(number) if dtype.startswith(("int", "uint")) and number == int(number) else number
+    if isinstance(value, float):
+        return str(int(value)) if value == int(value) else str(value)
+    return value
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+class QueryEngine:
+    """Executes parsed queries against the dataset cache with an LRU result cache"""
+
+    def __init__(self, datasets: DatasetCache, cache_size: int = 128, max_cached_rows: int = 100000):
+        self.datasets = datasets
+        self.cache_size = cache_size
+        self.max_cached_rows = max_cached_rows
+        self._results: "OrderedDict[Tuple[str, Query], pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"queries": 0, "cache_hits": 0}
+
+    def _mask(self, df: pd.DataFrame, where: tuple) -> pd.Series:
+        """Vectorised WHERE for when the reader could not push it down"""
+        ops = {"==": np.equal, "!=": np.not_equal, "<": np.less, "<=": np.less_equal,
+               ">": np.greater, ">=": np.greater_equal}
+        result = pd.Series(False, index=df.index)
+        for conj in where:
+            mask = pd.Series(True, index=df.index)
+            for column, op, value in conj:
+                col = df[column]
+                if op == "in":
+                    mask &= col.isin(value)
+                elif op == "not in":
+                    mask &= ~col.isin(value)
+                else:
+                    mask &= ops[op](col, value).fillna(False).astype(bool)
+            result |= mask
+        return result
+
+    def _execute(self, digest: str, filename: str, query: Query) -> pd.DataFrame:
+        known = self.datasets.metadata(digest)["dtypes"]
+        # SELECT * without GROUP BY returns every column; otherwise read only what's referenced
+        columns = [c for c in query.columns() if c in known] if query.select or query.group_by else None
+        filters = [[(c, op, list(v) if isinstance(v, tuple) else v) for c, op, v in conj]
+                   for conj in query.where] or None
+        if PARQUET_AVAILABLE:
+            df = self.datasets.load(filename, columns, filters=filters)
+        else:
+            df = self.datasets.load(filename, columns)
+            if filters:
+                df = df[self._mask(df, query.where)]
+
+        aggregates = [s for s in query.select if s.agg]
+        if query.group_by or aggregates:
+            plain = [s for s in query.select if not s.agg and s.column not in query.group_by]
+            if plain:
+                raise QueryError(f"Column '{plain[0].column}' must be aggregated or listed in GROUP BY")
+            if query.group_by:
+                # A bare GROUP BY counts rows per group
+                aggregates = aggregates or [SelectItem(None, "count")]
+                grouped = df.groupby(list(query.group_by), dropna=False, observed=True, sort=False)
+                named = {s.name: pd.NamedAgg(s.column, AGGREGATES[s.agg]) for s in aggregates if s.column}
+                result = grouped.agg(**named) if named else pd.DataFrame(index=grouped.size().index)
+                for s in aggregates:
+                    if s.column is None:
+                        result[s.name] = grouped.size()
+                result = result.reset_index()
+                names = [s.name for s in query.select] or list(query.group_by) + [s.name for s in aggregates]
+                result = result[names]
+            else:
+                result = pd.DataFrame([{
+                    s.name: len(df) if s.column is None else df[s.column].agg(AGGREGATES[s.agg])
+                    for s in aggregates
+                }])
+        else:
+            result = df[[s.column for s in query.select]] if query.select else df
+            if any(s.alias for s in query.select):
+                result = result.set_axis([s.name for s in query.select], axis=1)
+
+        if query.order_by:
+            keys = [k for k, _ in query.order_by]
+            missing = [k for k in keys if k not in result.columns]
+            if missing:
+                raise QueryError(f"Cannot ORDER BY '{missing[0]}': not in the result columns")
+            key, desc = query.order_by[0]
+            if query.limit is not None and len(keys) == 1 and _is_numeric(str(result[key].dtype)):
+                # Top-k: partial selection instead of a full sort
+                pick = result.nlargest if desc else result.nsmallest
+                result = pick(query.limit, key)
+            else:
+                result = result.sort_values(keys, ascending=[not d for _, d in query.order_by], kind="stable")
+        if query.limit is not None:
+            result = result.head(query.limit)
+        return result.reset_index(drop=True)
+
+    def run(self, filename: str, text: str, page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        """Parse, execute (or fetch from cache) and paginate one query"""
+        started = time.perf_counter()
+        digest = self.datasets.resolve(filename)
+        if digest is None:
+            raise FileNotFoundError(f"File {filename} not found. Please upload it first.")
+        query = parse_query(text, self.datasets.metadata(digest)["dtypes"])
+        key = (digest, query)
+
+        with self._lock:
+            self.stats["queries"] += 1
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        cached = result is not None
+        if not cached:
+            result = self._execute(digest, filename, query)
+            if len(result) <= self.max_cached_rows:
+                with self._lock:
+                    self._results[key] = result
+                    while len(self._results) > self.cache_size:
+                        self._results.popitem(last=False)
+
+        page_size = max(1, min(page_size, 1000))
+        pages = max(1, -(-len(result) // page_size))
+        page = min(max(page, 1), pages)
+        window = result.iloc[(page - 1) * page_size: page * page_size]
+        return {
+            "columns": [str(c) for c in window.columns],
+            "rows": _records(window),
+            "total_rows": len(result),
+            "page": page,
+            "page_size": page_size,
+            "pages": pages,
+            "cached": cached,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def render(self, filename: str, text: str, data: Dict[str, Any]) -> str:
+        lines = [f"### 🔍 Query Results: `{filename}`", "", f"`{' '.join(text.split())}`", ""]
+        if not data["rows"]:
+            lines.append("*No rows matched.*")
+        else:
+            lines.append("| " + " | ".join(data["columns"]) + " |")
+            lines.append("|" + "---|" * len(data["columns"]))
+            for row in data["rows"]:
+                lines.append("| " + " | ".join(_cell(row[c]) for c in data["columns"]) + " |")
+        first = (data["page"] - 1) * data["page_size"] + 1 if data["rows"] else 0
+        last = first + len(data["rows"]) - 1 if data["rows"] else 0
+        lines += ["", f"*Rows {first:,}–{last:,} of {data['total_rows']:,} · page {data['page']}/{data['pages']} · "
+                      f"{data['elapsed_ms']} ms{' · cached' if data['cached'] else ''}*"]
+        return "\n".join(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cached_results": len(self._results), "cache_size": self.cache_size}
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """JSON-safe rows (NaN -> None, numpy scalars -> Python)"""
+    clean = df.astype(object).where(df.notna(), None)
+    return [{str(k): (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+            for row in clean.to_dict(orient="records")]
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.2f}" if abs(value) >= 0.01 or value == 0 else f"{value:.4g}"
+    return str(value).replace("|", "\\|")
@@ -0,0 +1,181 @@
+# backend/residency_manager.py
+"""
+Residency Manager - Keeps as many Ollama models loaded as fit in a memory budget
+Tracks what Ollama has resident (via /api/ps), evicts by LRU weighted by worker
+priority when a new model needs room, and never evicts a model that is mid-request
+"""
+import asyncio
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+# Approximate loaded footprint (GB, Q4 weights + default context) for models this kernel uses
+DEFAULT_FOOTPRINTS = {
+    "llama3.2:latest": 3.0,
+    "llama3.2-vision:11b": 8.0,
+    "qwen2.5-coder:14b": 10.0,
+    "phi3.5:3.8b": 3.5,
+    "smollm2:360m": 0.8,
+}
+
+# Eviction score = idle seconds x weight; protected (constitutional) models look "younger"
+PRIORITY_WEIGHT = {"CONSTITUTIONAL": 0.25, "HIGH": 0.5, "MEDIUM": 1.0, "LOW": 2.0}
+
+def estimate_footprint(model: str) -> float:
+    """Fallback size from the parameter count in the tag (e.g. '14b' -> ~9.6 GB)"""
+    m = re.search(r"(\d+(?:\.\d+)?)([bm])\b", model.lower())
+    if not m:
+        return 4.0
+    params_b = float(m.group(1)) / (1000 if m.group(2) == "m" else 1)
+    return round(params_b * 0.65 + 0.5, 1)
+
+class ResidencyManager:
+    """
+    `client` needs two coroutines: ps() -> [{"name", "size", ...}] and
+    generate(model=, prompt="", keep_alive=0, timeout=) for unloading - the shared
+    InferenceClient in production, any stub in tests.
+    """
+
+    def __init__(self, client, budget_gb: float = 8.0, footprints: Dict[str, float] = None,
+                 priorities: Dict[str, str] = None, sync_interval: float = 5.0):
+        self.client = client
+        self.budget_gb = budget_gb
+        self.footprints = {**DEFAULT_FOOTPRINTS, **(footprints or {})}
+        self.priorities = priorities or {}           # model -> priority level
+        self.sync_interval = sync_interval
+        # model -> {"size_gb", "last_used"}; order = least recently used first
+        self.resident: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self.in_use: Dict[str, int] = {}
+        self._last_sync = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "over_budget": 0, "sync_errors": 0}
+
+    def footprint(self, model: str) -> float:
+        if model in self.resident:
+            return self.resident[model]["size_gb"]
+        return self.footprints.get(model) or estimate_footprint(model)
+
+    def used_gb(self) -> float:
+        return sum(entry["size_gb"] for entry in self.resident.values())
+
+    def is_resident(self, model: str) -> bool:
+        return model in self.resident
+
+    def fits(self, model: str) -> bool:
+        """Resident already, or loadable without evicting anything"""
+        return model in self.resident or self.used_gb() + self.footprint(model) <= self.budget_gb
+
+    # ========================================================================
+    # OLLAMA STATE
+    # ========================================================================
+    async def sync(self, force: bool = False):
+        """Reconcile with Ollama's loaded set (its keep_alive may have expired models)"""
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        try:
+            loaded = await self.client.ps()
+        except Exception as e:
+            self.stats["sync_errors"] += 1
+            logger.debug(f"Residency sync failed: {e}")
+            return
+        live = {}
+        for m in loaded:
+            name = m.get("name") or m.get("model")
+            size = m.get("size_vram") or m.get("size")
+            if name:
+                live[name] = size / GB if size else None
+        for name in list(self.resident):
+            if name not in live and not self.in_use.get(name):
+                del self.resident[name]
+        for name, size_gb in live.items():
+            if size_gb:
+                self.footprints[name] = round(size_gb, 2)  # learn real sizes
+            if name not in self.resident:
+                self.resident[name] = {"size_gb": self.footprint(name), "last_used": now}
+                self.resident.move_to_end(name, last=False)  # unknown recency: evict first
+            elif size_gb:
+                self.resident[name]["size_gb"] = round(size_gb, 2)
+
+    async def refresh(self):
+        """Force a sync outside of an acquire (e.g. before reporting)"""
+        async with self._lock:
+            await self.sync(force=True)
+
+    # ========================================================================
+    # ACQUIRE / RELEASE
+    # ========================================================================
+    def _victims(self, model: str, need_gb: float) -> List[str]:
+        """Evictable models, cheapest-to-lose first, until `need_gb` fits"""
+        now = time.monotonic()
+        candidates = sorted(
+            (name for name in self.resident if name != model and not self.in_use.get(name)),
+            key=lambda name: (now - self.resident[name]["last_used"])
+                             * PRIORITY_WEIGHT.get(self.priorities.get(name, "LOW"), 1.0),
+            reverse=True,
+        )
+        victims, free = [], self.budget_gb - self.used_gb()
+        for name in candidates:
+            if free >= need_gb:
+                break
+            victims.append(name)
+            free += self.resident[name]["size_gb"]
+        return victims
+
+    async def acquire(self, model: str) -> Dict[str, Any]:
+        """Make room for `model` and mark it in use; pair with release() once this returns
+        (in_use is only taken after the awaits, so a cancelled acquire pins nothing)"""
+        async with self._lock:
+            await self.sync()
+            now = time.monotonic()
+            if model in self.resident:
+                self.stats["hits"] += 1
+                self.resident[model]["last_used"] = now
+                self.resident.move_to_end(model)
+                self.in_use[model] = self.in_use.get(model, 0) + 1
+                return {"model": model, "hit": True, "evicted": []}
+
+            self.stats["misses"] += 1
+            need = self.footprint(model)
+            victims = self._victims(model, need)
+            for name in victims:
+                logger.info(f"💾 VRAM: Evicting [{name}] ({self.resident[name]['size_gb']} GB) for [{model}]")
+                try: await self.client.generate(model=name, prompt="", keep_alive=0, timeout=30)
+                except Exception as e: logger.warning(f"Unload of {name} failed: {e}")
+                del self.resident[name]
+                self.stats["evictions"] += 1
+            if self.used_gb() + need > self.budget_gb:
+                # Everything else is mid-request; load anyway and let Ollama spill to RAM
+                self.stats["over_budget"] += 1
+            self.resident[model] = {"size_gb": need, "last_used": now}
+            self.in_use[model] = self.in_use.get(model, 0) + 1
+            return {"model": model, "hit": False, "evicted": victims}
+
+    def release(self, model: str):
+        if self.in_use.get(model):
+            self.in_use[model] -= 1
+        if model in self.resident:
+            self.resident[model]["last_used"] = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        now = time.monotonic()
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            "budget_gb": self.budget_gb,
+            "used_gb": round(self.used_gb(), 2),
+            "resident": [
+                {"model": name, "size_gb": entry["size_gb"], "in_use": self.in_use.get(name, 0),
+                 "idle_seconds": round(now - entry["last_used"], 1),
+                 "priority": self.priorities.get(name, "LOW")}
+                for name, entry in reversed(self.resident.items())
+            ],
+        }
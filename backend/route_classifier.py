@@ -0,0 +1,164 @@
+# backend/route_classifier.py
+"""
+Route Classifier - Cheap local worker classifier for the IntelligentRouter
+scikit-learn TF-IDF over word unigrams + bigrams feeding a logistic regression. Trained
+on the router's own labelled history: rule matches, LLM decisions and workers users
+picked explicitly.
+"""
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+logger = logging.getLogger(__name__)
+
+# Keeps ".pdf", "c++" and "c#" as tokens
+TOKEN_PATTERN = r"\.?[a-z0-9_+#]+"
+
+def normalize_task(task: str) -> str:
+    """Cache / history key: lower-cased with whitespace collapsed"""
+    return " ".join(task.lower().split())
+
+class TaskClassifier:
+    """
+    fit(texts, labels) then predict(text) -> (label, probability).
+    Small enough to refit from scratch in a thread on each retrain.
+    """
+
+    def __init__(self, max_features: int = 20000, C: float = 10.0):
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, token_pattern=TOKEN_PATTERN,
+                                          max_features=max_features)
+        self.model = LogisticRegression(C=C, max_iter=1000)
+        self.labels: List[str] = []
+
+    @property
+    def trained(self) -> bool:
+        return bool(self.labels)
+
+    def fit(self, texts: List[str], labels: List[str]) -> "TaskClassifier":
+        self.model.fit(self.vectorizer.fit_transform(texts), labels)
+        self.labels = [str(label) for label in self.model.classes_]
+        return self
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        if not self.trained:
+            return None
+        X = self.vectorizer.transform([text])
+        if not X.nnz:
+            return None
+        probs = self.model.predict_proba(X)[0]
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+class RouteHistory:
+    """
+    Labelled routing examples (normalized task -> worker), newest wins, bounded to
+    `max_examples`. Persisted as append-only JSONL, compacted when it doubles.
+    add() only updates memory and queues the line; a background thread does the file I/O.
+    """
+
+    def __init__(self, path: Path, max_examples: int = 5000):
+        self.path = Path(path)
+        self.max_examples = max_examples
+        self.examples: "OrderedDict[str, str]" = OrderedDict()
+        self._lines = 0
+        self._lock = threading.Lock()        # examples + pending lines
+        self._write_lock = threading.Lock()  # the file
+        self._pending: List[str] = []
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try: entry = json.loads(line)
+                    except json.JSONDecodeError: continue
+                    self._put(entry["task"], entry["worker"])
+                    self._lines += 1
+        except OSError as e:
+            logger.warning(f"⚠️ Router history unreadable: {e}")
+        if self._lines > 2 * self.max_examples:
+            self._compact()
+
+    def _put(self, task: str, worker: str):
+        self.examples.pop(task, None)
+        self.examples[task] = worker
+        while len(self.examples) > self.max_examples:
+            self.examples.popitem(last=False)
+
+    def _compact(self):
+        with self._lock:
+            lines = [json.dumps({"task": task, "worker": worker}) + "\n" for task, worker in self.examples.items()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        tmp.replace(self.path)
+        self._lines = len(lines)
+
+    def add(self, task: str, worker: str, source: str) -> bool:
+        """Record an example; returns False when it was already known with that label"""
+        with self._lock:
+            if self.examples.get(task) == worker:
+                return False
+            self._put(task, worker)
+            self._pending.append(json.dumps({"task": task, "worker": worker, "source": source}) + "\n")
+        if self._closed:
+            self.flush()
+        else:
+            self._ensure_started()
+            self._wake.set()
+        return True
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="router-history", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait()
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Append queued examples to the file (compacting it once it doubles)"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(pending)
+                self._lines += len(pending)
+                if self._lines > 2 * self.max_examples:
+                    self._compact()
+            except OSError as e:
+                logger.warning(f"⚠️ Router history write failed: {e}")
+
+    def close(self, timeout: float = 5.0):
+        """Stop the writer thread and write whatever is still queued (shutdown hook)"""
+        self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def snapshot(self) -> Tuple[List[str], List[str]]:
+        with self._lock:
+            return list(self.examples.keys()), list(self.examples.values())
+
+    def __len__(self) -> int:
+        return len(self.examples)
@@ -0,0 +1,119 @@
+# backend/router_benchmark.py
+"""
+Router Benchmark - Accuracy / coverage / latency of each routing tier on a labelled task set
+    python router_benchmark.py            regex rules + semantic (MiniLM) tiers
+    python router_benchmark.py --llm      also time the LLM tier (needs Ollama)
+    python router_benchmark.py --json     machine-readable output
+Coverage = share of tasks the tier answers at all; accuracy is over the answered ones.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from intelligent_router import IntelligentRouter
+from route_classifier import normalize_task
+
+# Held-out tasks (none of these are semantic exemplars); labels are the auto-routable
+# workers only, the same choice every tier - including the LLM prompt - is offered
+LABELLED: List[Tuple[str, str]] = [
+    ("what is the capital of australia", "brain"),
+    ("explain the theory of relativity simply", "brain"),
+    ("help me write a thank you note to my teacher", "brain"),
+    ("what's 15% of 240", "brain"),
+    ("pros and cons of electric cars", "brain"),
+    ("how should I prepare for a job interview", "brain"),
+    ("why do cats purr", "brain"),
+    ("give me a three day itinerary idea for rome", "brain"),
+    ("write a python script to rename files in bulk", "code"),
+    ("my react component re-renders forever", "code"),
+    ("how do I center a div with css", "code"),
+    ("write unit tests for this function", "code"),
+    ("explain what a closure is in javascript and show an example", "code"),
+    ("optimize this slow postgres query", "code"),
+    ("convert this bash loop to powershell", "code"),
+    ("why is my docker container exiting immediately", "code"),
+    ("what's the price of bitcoin today", "search"),
+    ("latest news about the mars rover", "search"),
+    ("who is the current prime minister of canada", "search"),
+    ("weather forecast for tokyo tomorrow", "search"),
+    ("find the cheapest train tickets to boston", "search"),
+    ("what movies are playing this week", "search"),
+    ("score of the champions league final", "search"),
+    ("is the new zelda game out yet", "search"),
+    ("find the pdf of my insurance policy", "files"),
+    ("where is my wedding photos folder", "files"),
+    ("search pc for the quarterly report", "files"),
+    ("show me documents I edited this week", "files"),
+    ("find the spreadsheet with my expenses", "files"),
+    ("which folder has my old school essays", "files"),
+]
+
+def _pct(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3) if ordered else 0.0
+
+def summarize(name: str, answers: List[Optional[str]], timings: List[float], tasks: List[Tuple[str, str]]) -> Dict[str, Any]:
+    answered = [(worker, expected) for worker, (_, expected) in zip(answers, tasks) if worker is not None]
+    correct = sum(worker == expected for worker, expected in answered)
+    return {
+        "tier": name,
+        "coverage": round(len(answered) / len(tasks), 3),
+        "accuracy": round(correct / len(answered), 3) if answered else 0.0,
+        "p50_ms": _pct(timings, 0.5),
+        "p99_ms": _pct(timings, 0.99),
+    }
+
+def measure(name: str, decide: Callable[[str], Optional[str]], tasks: List[Tuple[str, str]]) -> Dict[str, Any]:
+    answers, timings = [], []
+    for task, _ in tasks:
+        started = time.perf_counter()
+        answers.append(decide(task))
+        timings.append(time.perf_counter() - started)
+    return summarize(name, answers, timings, tasks)
+
+async def run(with_llm: bool) -> List[Dict[str, Any]]:
+    router = IntelligentRouter(history_path=str(Path(tempfile.gettempdir()) / "router_benchmark_history.jsonl"))
+    results = [measure("regex", lambda t: router._rules(normalize_task(t)), LABELLED)]
+
+    try:
+        router.semantic.load()
+    except Exception as e:
+        print(f"semantic tier skipped: {e}")
+    else:
+        router.semantic.encode(["warm up"])
+        semantic = router.semantic
+        results.append(measure("semantic", lambda t: (semantic.classify(normalize_task(t)) or (None,))[0], LABELLED))
+        # Same tier without the confidence gate: nearest centroid always wins
+        nearest = lambda t: semantic.workers[int(semantic.scores(semantic.encode([normalize_task(t)])[0]).argmax())]
+        results.append(measure("semantic (ungated)", nearest, LABELLED))
+
+    if with_llm:
+        answers, timings = [], []
+        for task, _ in LABELLED:
+            started = time.perf_counter()
+            answers.append(await router.ask_llm(task))
+            timings.append(time.perf_counter() - started)
+        results.append(summarize("llm", answers, timings, LABELLED))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm", action="store_true", help="include the Ollama LLM tier")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.llm))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(LABELLED)} labelled tasks")
+    print(f"{'tier':<20}{'coverage':>10}{'accuracy':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        print(f"{r['tier']:<20}{r['coverage']:>10.1%}{r['accuracy']:>10.1%}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+if __name__ == "__main__":
+    main()
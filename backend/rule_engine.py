@@ -0,0 +1,128 @@
+# backend/rule_engine.py
+"""
+Constitutional Rule Engine - Compiled keyword matcher for the articles
+Case-folds a task once, tests every distinct pattern once, and hands each
+article only the patterns that hit
+"""
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Iterable, Tuple
+
+# ============================================================================
+# RULE DEFINITION
+# ============================================================================
+
+@dataclass(frozen=True)
+class Rule:
+    """A keyword belonging to a rule group (usually one per article check)"""
+    group: str
+    pattern: str
+    # Also match against task.upper() - Article 5 semantics
+    either_case: bool = False
+
+class RuleHits:
+    """Result of scanning one task: matched patterns per group, in declared order"""
+
+    def __init__(self, hits: Dict[str, List[str]]):
+        self._hits = hits
+
+    def group(self, name: str) -> List[str]:
+        return self._hits.get(name, [])
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {name: list(patterns) for name, patterns in self._hits.items() if patterns}
+
+# ============================================================================
+# COMPILED ENGINE
+# ============================================================================
+
+class RuleEngine:
+    """
+    Compiles all article keywords at startup.
+
+    The hot path is one `task.lower()` plus one C-level substring search per
+    *distinct* needle, instead of one fold and one search per article per
+    pattern. Results match the original `pattern in task.lower()` (and for
+    either-case rules `pattern in task.upper() or pattern in task.lower()`)
+    exactly; `python rule_engine.py` checks this against the original articles.
+    """
+
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[Rule] = list(rules)
+        # group -> [(pattern, lower_needle or None, upper_needle or None)]
+        self._groups: Dict[str, List[Tuple[str, str, str]]] = {}
+        needles = set()
+        for rule in self.rules:
+            p = rule.pattern
+            # A pattern with uppercase letters can never occur in task.lower()
+            lower_needle = p if p == p.lower() else None
+            # Only fully upper-case patterns can occur in task.upper(); for ASCII
+            # tasks that is the same as p.lower() occurring in task.lower()
+            upper_needle = p.lower() if rule.either_case and p == p.upper() else None
+            for needle in (lower_needle, upper_needle):
+                if needle is not None:
+                    needles.add(needle)
+            self._groups.setdefault(rule.group, []).append((p, lower_needle, upper_needle))
+        self.needles: Tuple[str, ...] = tuple(sorted(needles))
+
+    def scan(self, task: str) -> RuleHits:
+        lowered = task.lower()
+        found = {needle for needle in self.needles if needle in lowered}
+        ascii_task = task.isascii()
+        upper = None
+
+        hits: Dict[str, List[str]] = {}
+        for group, entries in self._groups.items():
+            matched = []
+            for pattern, lower_needle, upper_needle in entries:
+                if lower_needle is not None and lower_needle in found:
+                    matched.append(pattern)
+                elif upper_needle is not None:
+                    if ascii_task:
+                        hit = upper_needle in found
+                    else:
+                        # Non-ASCII case mappings are not symmetric (e.g. 'ſ'.upper() == 'S')
+                        if upper is None:
+                            upper = task.upper()
+                        hit = pattern in upper
+                    if hit:
+                        matched.append(pattern)
+            hits[group] = matched
+        return RuleHits(hits)
+
+# For direct testing - differential check of the live articles against a frozen copy of
+# the original per-article loops (constitution_reference.py)
+if __name__ == "__main__":
+    from types import SimpleNamespace
+
+    import constitution_reference as frozen
+    from zero_drift_core import CONSTITUTION_RULES, ZeroDriftConstitution
+
+    engine = RuleEngine(CONSTITUTION_RULES)
+    live = SimpleNamespace(rule_engine=engine)  # the keyword articles only need the engine
+    articles = ["article_1_sovereignty", "article_4_determinism", "article_5_safety",
+                "article_6_privacy", "article_8_recoverability", "article_9_boundedness"]
+    workers = ["brain", "code", "files", "search", None]
+    alphabet = list("abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ-/.:(=9") + ["ſ", "ı", "K", "İ", "ß", "ﬀ"]
+    fragments = [r.pattern for r in CONSTITUTION_RULES] + [r.pattern.upper() for r in CONSTITUTION_RULES] + ["DROP DATABAſE"]
+    rng = random.Random(0)
+
+    checked = 0
+    for _ in range(20000):
+        parts = []
+        for _ in range(rng.randint(1, 12)):
+            if rng.random() < 0.4:
+                parts.append(rng.choice(fragments))
+            else:
+                parts.append("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8))))
+        task = "".join(parts)
+        hits = engine.scan(task)
+        for worker in workers:
+            context = {"worker": worker, "session_id": "check"}
+            for name in articles:
+                expected = getattr(frozen, name)(task, context)
+                actual = getattr(ZeroDriftConstitution, name)(live, task, context, hits)
+                assert actual == expected, f"{name} ({worker}) differs for {task!r}: {actual} != {expected}"
+        checked += 1
+
+    print(f"✅ Articles match the frozen originals on {checked:,} generated tasks x {len(workers)} workers")
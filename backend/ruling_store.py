@@ -0,0 +1,213 @@
+# backend/ruling_store.py
+"""
+Ruling Store - Bounded, indexed memory of constitutional rulings
+Recent rulings live in a fixed-size ring buffer with per-session and time indexes;
+older ones are paged from constitutional_ledger.jsonl through a sidecar offset index
+"""
+import bisect
+import hashlib
+import json
+import struct
+import threading
+import logging
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sidecar record: ledger byte offset, line length, timestamp,
+# previous record of the same session (-1 = none), session hash
+INDEX_RECORD = struct.Struct("<QIdq8s")
+
+def session_key(session_id: str) -> bytes:
+    return hashlib.blake2b(session_id.encode(), digest_size=8).digest()
+
+class RulingStore:
+    """
+    Memory is bounded by `capacity` rulings plus `max_sessions` session deques of at
+    most `per_session` entries. History queries cost O(k) in the rows returned:
+    memory first, then a backwards walk of the session's chain in the sidecar index.
+    """
+
+    def __init__(self, ledger_path: Path, capacity: int = 10000, per_session: int = 200,
+                 max_sessions: int = 5000):
+        self.ledger_path = Path(ledger_path)
+        self.index_path = self.ledger_path.with_suffix(".idx")
+        self.capacity = capacity
+        self.per_session = per_session
+        self.max_sessions = max_sessions
+
+        # Ring buffer: global sequence number n lives in slot n % capacity
+        self._slots: List[Optional[Any]] = [None] * capacity
+        self._seq = 0
+        # session_id -> deque of sequence numbers (LRU over sessions)
+        self._sessions: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Disk side (maintained by the ledger writer thread)
+        self._disk_lock = threading.Lock()
+        self._disk_count = 0
+        self._disk_last: Dict[bytes, int] = {}
+        self._load_index()
+
+    # ========================================================================
+    # MEMORY TIER
+    # ========================================================================
+    def append(self, ruling: Any):
+        """Add a ConstitutionalRuling; evicts the oldest when the ring is full"""
+        with self._lock:
+            seq = self._seq
+            self._slots[seq % self.capacity] = ruling
+            self._seq += 1
+
+            session = self._sessions.get(ruling.session_id)
+            if session is None:
+                session = deque(maxlen=self.per_session)
+                self._sessions[ruling.session_id] = session
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(ruling.session_id)
+            session.append(seq)
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def _live(self, seq: int) -> bool:
+        return self._seq - self.capacity <= seq < self._seq
+
+    def _recent(self, session_id: Optional[str], limit: int) -> List[Any]:
+        """Newest-first rulings still resident in memory"""
+        with self._lock:
+            if session_id is None:
+                first = max(self._seq - min(limit, self.capacity), 0)
+                return [self._slots[s % self.capacity] for s in range(self._seq - 1, first - 1, -1)]
+            found = []
+            for seq in reversed(self._sessions.get(session_id, ())):
+                if len(found) >= limit or not self._live(seq):
+                    break
+                found.append(self._slots[seq % self.capacity])
+            return found
+
+    def since(self, start_ts: float, end_ts: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Time index: rulings in [start_ts, end_ts) still in memory, oldest first"""
+        with self._lock:
+            lo = max(self._seq - self.capacity, 0)
+            seqs = range(lo, self._seq)
+            key = lambda seq: self._slots[seq % self.capacity].timestamp
+            first = bisect.bisect_left(seqs, start_ts, key=key)
+            last = bisect.bisect_left(seqs, end_ts, key=key) if end_ts is not None else len(seqs)
+            return [self._slots[seqs[i] % self.capacity].to_dict() for i in range(first, min(last, first + limit))]
+
+    # ========================================================================
+    # DISK TIER (sidecar offset index)
+    # ========================================================================
+    def _load_index(self):
+        """Rebuild the session chain heads; index any ledger tail the sidecar missed"""
+        indexed_to = 0
+        if self.index_path.exists():
+            data = self.index_path.read_bytes()
+            usable = len(data) - len(data) % INDEX_RECORD.size
+            for n, (offset, length, _, _, skey) in enumerate(INDEX_RECORD.iter_unpack(data[:usable])):
+                self._disk_last[skey] = n
+                indexed_to = offset + length
+            self._disk_count = usable // INDEX_RECORD.size
+            if usable != len(data):
+                with open(self.index_path, "r+b") as f:
+                    f.truncate(usable)
+
+        if not self.ledger_path.exists():
+            return
+        ledger_size = self.ledger_path.stat().st_size
+        if indexed_to > ledger_size:
+            logger.warning("⚠️ Ruling index is ahead of the ledger - rebuilding")
+            self.index_path.unlink()
+            self._disk_count, self._disk_last, indexed_to = 0, {}, 0
+        if indexed_to < ledger_size:
+            batch, spans = [], []
+            with open(self.ledger_path, "rb") as f:
+                f.seek(indexed_to)
+                offset = indexed_to
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partial trailing write
+                    try:
+                        batch.append(json.loads(line))
+                        spans.append((offset, len(line)))
+                    except json.JSONDecodeError:
+                        pass
+                    offset += len(line)
+            self.record_committed(batch, spans)
+            logger.info(f"📜 Indexed {len(batch)} ledger rulings missing from {self.index_path.name}")
+
+    def record_committed(self, batch: List[Dict[str, Any]], spans: List[Tuple[int, int]]):
+        """LedgerWriter on_commit hook: append sidecar entries in ledger order"""
+        try:
+            with self._disk_lock:
+                out = bytearray()
+                for record, (offset, length) in zip(batch, spans):
+                    skey = session_key(record.get("session_id") or "")
+                    prev = self._disk_last.get(skey, -1)
+                    out += INDEX_RECORD.pack(offset, length, float(record.get("timestamp", 0.0)), prev, skey)
+                    self._disk_last[skey] = self._disk_count
+                    self._disk_count += 1
+                with open(self.index_path, "ab") as f:
+                    f.write(out)
+        except Exception as e:
+            logger.error(f"Failed to update ruling index: {e}")
+
+    def _read_entry(self, idx, n: int) -> bytes:
+        idx.seek(n * INDEX_RECORD.size)
+        return idx.read(INDEX_RECORD.size)
+
+    def _read_disk(self, session_id: Optional[str], limit: int, before_ts: Optional[float],
+                   seen: set) -> List[Dict]:
+        """Newest-first rulings from the ledger, older than before_ts, skipping seen ids"""
+        out: List[Dict] = []
+        if limit <= 0 or not self.index_path.exists():
+            return out
+        with self._disk_lock:
+            if session_id is None:
+                n = self._disk_count - 1
+            else:
+                n = self._disk_last.get(session_key(session_id), -1)
+        with open(self.index_path, "rb") as idx, open(self.ledger_path, "rb") as ledger:
+            if session_id is None and before_ts is not None:
+                # Ledger order is time order: jump past the memory-resident tail
+                read_ts = lambda i: INDEX_RECORD.unpack(self._read_entry(idx, i))[2]
+                n = bisect.bisect_right(range(n + 1), before_ts, key=read_ts) - 1
+            while n >= 0 and len(out) < limit:
+                offset, length, ts, prev, skey = INDEX_RECORD.unpack(self._read_entry(idx, n))
+                n = prev if session_id is not None else n - 1
+                if before_ts is not None and ts > before_ts:
+                    continue  # still covered by memory
+                ledger.seek(offset)
+                record = json.loads(ledger.read(length))
+                if session_id is not None and record.get("session_id") != session_id:
+                    continue  # hash collision
+                if record.get("ruling_id") in seen:
+                    continue
+                out.append(record)
+        return out
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+    def history(self, session_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Last `limit` rulings (optionally for one session), oldest first"""
+        recent = [r.to_dict() for r in self._recent(session_id, limit)]
+        if len(recent) < limit:
+            before_ts = recent[-1]["timestamp"] if recent else None
+            seen = {r["ruling_id"] for r in recent}
+            recent.extend(self._read_disk(session_id, limit - len(recent), before_ts, seen))
+        recent.reverse()
+        return recent
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_memory": len(self),
+            "capacity": self.capacity,
+            "sessions_indexed": len(self._sessions),
+            "ledger_records_indexed": self._disk_count,
+        }
@@ -0,0 +1,173 @@
+# backend/semantic_router.py
+"""
+Semantic Router - Nearest-centroid worker routing over MiniLM sentence embeddings
+Each worker's exemplar tasks are embedded once and clustered into a few centroids;
+a task routes to the worker owning its most similar centroid (one matrix-vector
+product over unit vectors = cosine similarity).
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+# Seed exemplars per worker; phrased the way users actually ask. Only the auto-routable
+# workers (ROUTER_WORKERS) - the system worker takes exact /commands, never free text
+EXEMPLARS: Dict[str, List[str]] = {
+    'brain': [
+        "explain how compound interest works",
+        "what is the difference between a virus and bacteria",
+        "help me plan a weekly workout routine",
+        "solve 3x + 7 = 22",
+        "give me advice on negotiating a salary",
+        "summarize the causes of the first world war",
+        "what does stoicism teach about anger",
+        "write a short poem about autumn",
+        "is it better to rent or buy a house",
+        "translate good morning into japanese",
+        "what's the logic behind the monty hall problem",
+        "brainstorm names for a coffee shop",
+    ],
+    'code': [
+        "write a function that reverses a linked list",
+        "why does my javascript throw undefined is not a function",
+        "refactor this class to use dependency injection",
+        "how do I read a csv file in pandas",
+        "fix the segmentation fault in my c program",
+        "write a sql query that joins orders and customers",
+        "create a dockerfile for a node app",
+        "what does this regex match",
+        "convert this loop to a list comprehension",
+        "set up a github actions workflow to run tests",
+        "implement binary search in rust",
+        "my git rebase has conflicts, how do I resolve them",
+    ],
+    'search': [
+        "what's the weather in london this weekend",
+        "who won the game last night",
+        "current exchange rate from dollars to euros",
+        "find reviews of the new iphone",
+        "what are the opening hours of the british museum",
+        "latest updates on the election results",
+        "how much does a tesla model 3 cost right now",
+        "look up flights from new york to paris",
+        "what happened in the stock market today",
+        "find a recipe for vegan lasagna online",
+        "when is the next spacex launch",
+        "trending topics on social media",
+    ],
+    'files': [
+        "find my tax return from last year",
+        "where did I save the presentation slides",
+        "search my documents for the lease agreement",
+        "show photos from my vacation folder",
+        "list spreadsheets in my downloads",
+        "open the notes I wrote about the project",
+        "which files on my drive mention the budget",
+        "find pdfs about machine learning on my computer",
+        "locate the resume I edited yesterday",
+        "search my pc for invoices from march",
+    ],
+}
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int = 10) -> np.ndarray:
+    """Spherical k-means (farthest-point init); returns k unit centroids"""
+    centroids = [vectors[0]]
+    for _ in range(1, k):
+        sims = np.max(vectors @ np.array(centroids).T, axis=1)
+        centroids.append(vectors[int(np.argmin(sims))])
+    centroids = np.array(centroids)
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for j in range(k):
+            members = vectors[assign == j]
+            if len(members):
+                c = members.sum(axis=0)
+                centroids[j] = c / np.linalg.norm(c)
+    return centroids
+
+class SemanticRouter:
+    """
+    load() (blocking; embeds the exemplars) then classify(task) -> (worker, similarity, margin)
+    or None below `threshold` / `margin`. `encoder` maps a list of texts to an (n, d) array;
+    by default it is the shared embedding service (MiniLM).
+    """
+
+    def __init__(self, exemplars: Dict[str, List[str]] = None, centroids_per_worker: int = 3,
+                 threshold: float = 0.45, margin: float = 0.05,
+                 encoder: Optional[Callable[[List[str]], np.ndarray]] = None):
+        self.exemplars = exemplars or EXEMPLARS
+        self.centroids_per_worker = centroids_per_worker
+        self.threshold = threshold
+        self.margin = margin
+        self._encoder = encoder or embedding_service.encode_batch
+        self.centroids: Optional[np.ndarray] = None      # (m, d) unit rows
+        self.owners: Optional[np.ndarray] = None         # worker index per centroid row
+        self.workers: List[str] = []
+        self._lock = threading.Lock()
+        self.stats = {"classified": 0, "accepted": 0, "below_threshold": 0, "ambiguous": 0, "load_seconds": 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self._encoder(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def load(self) -> "SemanticRouter":
+        with self._lock:
+            if self.ready:
+                return self
+            started = time.perf_counter()
+            self.workers = list(self.exemplars)
+            rows, owners = [], []
+            for i, worker in enumerate(self.workers):
+                vectors = self.encode(self.exemplars[worker])
+                k = min(self.centroids_per_worker, len(vectors))
+                rows.append(_kmeans(vectors, k))
+                owners.extend([i] * k)
+            self.centroids = np.vstack(rows).astype(np.float32)
+            self.owners = np.array(owners)
+            self.stats["load_seconds"] = round(time.perf_counter() - started, 2)
+            logger.info(f"🧭 Semantic router ready: {len(self.owners)} centroids for "
+                        f"{len(self.workers)} workers in {self.stats['load_seconds']}s")
+            return self
+
+    def scores(self, vector: np.ndarray) -> np.ndarray:
+        """Best cosine similarity per worker for one unit vector"""
+        sims = self.centroids @ vector
+        best = np.full(len(self.workers), -1.0, dtype=np.float32)
+        np.maximum.at(best, self.owners, sims)
+        return best
+
+    def classify(self, task: str) -> Optional[Tuple[str, float, float]]:
+        if not self.ready:
+            return None
+        best = self.scores(self.encode([task])[0])
+        order = np.argsort(best)[::-1]
+        top, runner_up = float(best[order[0]]), float(best[order[1]]) if len(order) > 1 else -1.0
+        self.stats["classified"] += 1
+        if top < self.threshold:
+            self.stats["below_threshold"] += 1
+            return None
+        if top - runner_up < self.margin:
+            self.stats["ambiguous"] += 1
+            return None
+        self.stats["accepted"] += 1
+        return self.workers[int(order[0])], top, top - runner_up
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "ready": self.ready,
+            "centroids": 0 if self.owners is None else len(self.owners),
+            "threshold": self.threshold,
+            "margin": self.margin,
+        }
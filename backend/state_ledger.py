@@ -1,76 +1,338 @@
 ﻿"""
 Zero-Drift State Ledger - Immutable audit trail for AI decisions
 SHA256 hashing + Merkle tree for verification
+
+Layout (next to the legacy logs/state_ledger.json):
+    logs/state_ledger/segment_000001.jsonl   append-only precedent records
+    logs/state_ledger/snapshot.json          index + genesis as of a known entry
+    logs/state_ledger/merkle.bin             every Merkle tree level as of that entry
+Startup loads the snapshot and replays only the records written after it.
 """
 
 import json
 import hashlib
 import os
+import glob
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+HASH_SIZE = 32
+
+def _leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def _largest_power_of_two_below(n: int) -> int:
+    k = 1
+    while k << 1 < n:
+        k <<= 1
+    return k
+
+class MerkleTree:
+    """
+    Incremental RFC 6962-style Merkle tree.
+    Complete nodes are kept per level in flat bytearrays, so an append is
+    O(log n) and an inclusion proof reads O(log n) stored nodes.
+    """
+
+    def __init__(self):
+        self.levels: List[bytearray] = [bytearray()]
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // HASH_SIZE
+
+    def _node(self, level: int, index: int) -> bytes:
+        start = index * HASH_SIZE
+        return bytes(self.levels[level][start:start + HASH_SIZE])
+
+    def append(self, leaf: bytes) -> int:
+        """Add a leaf hash, completing parent nodes as pairs fill up"""
+        index = len(self)
+        self.levels[0] += leaf
+        node, level, i = leaf, 0, index
+        while i & 1:
+            node = _node_hash(self._node(level, i - 1), node)
+            level += 1
+            i >>= 1
+            if level == len(self.levels):
+                self.levels.append(bytearray())
+            self.levels[level] += node
+        return index
+
+    def _subtree(self, lo: int, hi: int) -> bytes:
+        """MTH(D[lo:hi]); aligned power-of-two ranges come straight from storage"""
+        size = hi - lo
+        if size & (size - 1) == 0 and lo % size == 0:
+            return self._node(size.bit_length() - 1, lo // size)
+        k = _largest_power_of_two_below(size)
+        return _node_hash(self._subtree(lo, lo + k), self._subtree(lo + k, hi))
+
+    def root(self) -> Optional[str]:
+        if not len(self):
+            return None
+        return self._subtree(0, len(self)).hex()
+
+    def proof(self, index: int, size: Optional[int] = None) -> List[str]:
+        """Audit path for leaf `index` in the tree of the first `size` leaves"""
+        size = len(self) if size is None else size
+        if not 0 <= index < size <= len(self):
+            raise IndexError(f"leaf {index} not in tree of size {size}")
+        path: List[bytes] = []
+        lo, hi, m = 0, size, index
+        while hi - lo > 1:
+            k = _largest_power_of_two_below(hi - lo)
+            if m < k:
+                path.append(self._subtree(lo + k, hi))
+                hi = lo + k
+            else:
+                path.append(self._subtree(lo, lo + k))
+                lo, m = lo + k, m - k
+        return [p.hex() for p in reversed(path)]
+
+    @staticmethod
+    def verify_proof(leaf: bytes, index: int, size: int, proof: List[str], root: str) -> bool:
+        """RFC 9162 inclusion proof verification"""
+        if not 0 <= index < size:
+            return False
+        fn, sn, r = index, size - 1, leaf
+        for p_hex in proof:
+            p = bytes.fromhex(p_hex)
+            if sn == 0:
+                return False
+            if fn & 1 or fn == sn:
+                r = _node_hash(p, r)
+                if not fn & 1:
+                    while not fn & 1 and fn != 0:
+                        fn >>= 1
+                        sn >>= 1
+            else:
+                r = _node_hash(r, p)
+            fn >>= 1
+            sn >>= 1
+        return sn == 0 and r.hex() == root
+
+    def dump(self) -> bytes:
+        header = json.dumps([len(level) for level in self.levels]).encode() + b"\n"
+        return header + b"".join(bytes(level) for level in self.levels)
+
+    @classmethod
+    def load(cls, data: bytes) -> "MerkleTree":
+        tree = cls()
+        newline = data.index(b"\n")
+        sizes = json.loads(data[:newline])
+        pos = newline + 1
+        tree.levels = []
+        for size in sizes:
+            tree.levels.append(bytearray(data[pos:pos + size]))
+            pos += size
+        if not tree.levels:
+            tree.levels = [bytearray()]
+        return tree
 
 class StateLedger:
     """Immutable ledger for zero-drift verification"""
-    
-    def __init__(self, ledger_path="logs/state_ledger.json"):
+
+    def __init__(self, ledger_path="logs/state_ledger.json", segment_size: int = 50000,
+                 snapshot_every: int = 10000):
         self.ledger_path = ledger_path
-        os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+        self.ledger_dir = os.path.splitext(ledger_path)[0]
+        self.segment_size = segment_size
+        self.snapshot_every = snapshot_every
+        os.makedirs(self.ledger_dir, exist_ok=True)
+        self._segment_file = None
         self.load()
-    
+
+    # ========================================================================
+    # STORAGE
+    # ========================================================================
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.ledger_dir, f"segment_{segment:06d}.jsonl")
+
+    def _segments(self) -> List[int]:
+        paths = glob.glob(os.path.join(self.ledger_dir, "segment_*.jsonl"))
+        return sorted(int(os.path.basename(p)[8:14]) for p in paths)
+
     def load(self):
-        """Load existing ledger"""
-        if os.path.exists(self.ledger_path):
-            with open(self.ledger_path, 'r') as f:
-                self.ledger = json.load(f)
-        else:
-            self.ledger = {
-                "genesis_block": {
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "version": "1.0.0",
-                    "drift_events": 0
-                },
-                "precedents": {}
-            }
-    
+        """Load the latest snapshot, then replay records written after it"""
+        self.genesis = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "version": "2.0.0",
+            "drift_events": 0
+        }
+        # task_hash -> (output_hash, entry index)
+        self.index: Dict[str, Tuple[str, int]] = {}
+        self.tree = MerkleTree()
+        self.segment, self.segment_entries, self.segment_offset = 1, 0, 0
+
+        snapshot_path = os.path.join(self.ledger_dir, "snapshot.json")
+        merkle_path = os.path.join(self.ledger_dir, "merkle.bin")
+        if os.path.exists(snapshot_path) and os.path.exists(merkle_path):
+            with open(snapshot_path, 'r') as f:
+                snap = json.load(f)
+            with open(merkle_path, 'rb') as f:
+                tree = MerkleTree.load(f.read())
+            if len(tree) == snap["entries"]:
+                self.genesis = snap["genesis"]
+                self.index = {k: tuple(v) for k, v in snap["index"].items()}
+                self.tree = tree
+                self.segment = snap["segment"]
+                self.segment_entries = snap["segment_entries"]
+                self.segment_offset = snap["segment_offset"]
+
+        segments = self._segments()
+        if not segments and os.path.exists(self.ledger_path):
+            self._migrate_legacy()
+            return
+
+        # Replay the tail: rest of the snapshot's segment plus any later segments
+        for segment in [s for s in segments if s >= self.segment]:
+            offset = self.segment_offset if segment == self.segment else 0
+            if segment != self.segment:
+                self.segment, self.segment_entries = segment, 0
+            with open(self._segment_path(segment), 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # torn write at the tail
+                    self._apply(json.loads(line))
+                    self.segment_entries += 1
+                    offset += len(line)
+            self.segment_offset = offset
+        # Drop any torn tail so the next append starts on a clean line
+        if segments and os.path.getsize(self._segment_path(self.segment)) > self.segment_offset:
+            with open(self._segment_path(self.segment), 'r+b') as f:
+                f.truncate(self.segment_offset)
+
+    def _migrate_legacy(self):
+        """Import precedents from the old single-file state_ledger.json"""
+        with open(self.ledger_path, 'r') as f:
+            legacy = json.load(f)
+        self.genesis = legacy.get("genesis_block", self.genesis)
+        precedents = sorted(legacy.get("precedents", {}).items(), key=lambda kv: kv[1].get("timestamp", ""))
+        for task_hash, p in precedents:
+            self._append({"t": task_hash, "h": p["output_hash"], "ts": p.get("timestamp"), "p": p.get("preview", "")})
+        self.save()
+
+    def _apply(self, record: Dict[str, Any]) -> int:
+        """Fold one record into the index and Merkle tree"""
+        leaf = _leaf_hash(f"{record['t']}|{record['h']}|{record['ts']}".encode())
+        n = self.tree.append(leaf)
+        self.index[record["t"]] = (record["h"], n)
+        return n
+
+    def _append(self, record: Dict[str, Any]) -> int:
+        if self.segment_entries >= self.segment_size:
+            self._roll_segment()
+        if self._segment_file is None:
+            self._segment_file = open(self._segment_path(self.segment), 'ab')
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        self._segment_file.write(line)
+        self._segment_file.flush()
+        self.segment_entries += 1
+        self.segment_offset += len(line)
+        return self._apply(record)
+
+    def _roll_segment(self):
+        if self._segment_file:
+            self._segment_file.close()
+            self._segment_file = None
+        self.save()
+        self.segment, self.segment_entries, self.segment_offset = self.segment + 1, 0, 0
+
     def save(self):
-        """Save ledger atomically"""
-        temp_path = self.ledger_path + ".tmp"
-        with open(temp_path, 'w') as f:
-            json.dump(self.ledger, f, indent=2)
-        os.replace(temp_path, self.ledger_path)
-    
+        """Write a snapshot atomically (index, genesis and Merkle levels)"""
+        snapshot = {
+            "entries": len(self.tree),
+            "merkle_root": self.tree.root(),
+            "segment": self.segment,
+            "segment_entries": self.segment_entries,
+            "segment_offset": self.segment_offset,
+            "genesis": self.genesis,
+            "index": self.index
+        }
+        merkle_path = os.path.join(self.ledger_dir, "merkle.bin")
+        with open(merkle_path + ".tmp", 'wb') as f:
+            f.write(self.tree.dump())
+        os.replace(merkle_path + ".tmp", merkle_path)
+        snapshot_path = os.path.join(self.ledger_dir, "snapshot.json")
+        with open(snapshot_path + ".tmp", 'w') as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+
+    # ========================================================================
+    # PUBLIC API
+    # ========================================================================
     def hash_output(self, task: str, output: str) -> str:
         """Create SHA256 hash of task+output"""
         content = f"{task}|{output}".encode()
         return hashlib.sha256(content).hexdigest()
-    
+
     def commit(self, task: str, output: str) -> str:
         """Store a precedent in the ledger"""
         task_hash = hashlib.sha256(task.encode()).hexdigest()[:16]
         output_hash = self.hash_output(task, output)
-        
-        self.ledger["precedents"][task_hash] = {
-            "output_hash": output_hash,
-            "timestamp": datetime.utcnow().isoformat(),
-            "preview": output[:100]
-        }
-        self.save()
+
+        self._append({
+            "t": task_hash,
+            "h": output_hash,
+            "ts": datetime.utcnow().isoformat(),
+            "p": output[:100]
+        })
+        if len(self.tree) % self.snapshot_every == 0:
+            self.save()
         return output_hash
-    
+
     def verify(self, task: str, output: str) -> bool:
         """Verify output matches precedent"""
         task_hash = hashlib.sha256(task.encode()).hexdigest()[:16]
-        if task_hash not in self.ledger["precedents"]:
+        if task_hash not in self.index:
             return False  # No precedent
-        
-        expected_hash = self.ledger["precedents"][task_hash]["output_hash"]
+
+        expected_hash = self.index[task_hash][0]
         actual_hash = self.hash_output(task, output)
         return expected_hash == actual_hash
-    
+
+    def merkle_root(self) -> Optional[str]:
+        """Root over every precedent ever committed"""
+        return self.tree.root()
+
+    def inclusion_proof(self, task: str) -> Optional[Dict[str, Any]]:
+        """Proof that the task's latest precedent is in the current Merkle root"""
+        task_hash = hashlib.sha256(task.encode()).hexdigest()[:16]
+        if task_hash not in self.index:
+            return None
+        output_hash, n = self.index[task_hash]
+        return {
+            "task_hash": task_hash,
+            "output_hash": output_hash,
+            "leaf_index": n,
+            "leaf_hash": self.tree._node(0, n).hex(),
+            "tree_size": len(self.tree),
+            "proof": self.tree.proof(n),
+            "merkle_root": self.tree.root()
+        }
+
+    @staticmethod
+    def verify_inclusion(proof: Dict[str, Any]) -> bool:
+        """Check an inclusion_proof() result against its root"""
+        return MerkleTree.verify_proof(bytes.fromhex(proof["leaf_hash"]), proof["leaf_index"],
+                                       proof["tree_size"], proof["proof"], proof["merkle_root"])
+
+    def close(self):
+        if self._segment_file:
+            self._segment_file.close()
+            self._segment_file = None
+        self.save()
+
     def get_drift_report(self) -> Dict[str, Any]:
         """Return drift statistics"""
         return {
-            "total_drift_events": self.ledger["genesis_block"]["drift_events"],
-            "total_precedents": len(self.ledger["precedents"]),
-            "genesis_timestamp": self.ledger["genesis_block"]["timestamp"]
+            "total_drift_events": self.genesis["drift_events"],
+            "total_precedents": len(self.index),
+            "genesis_timestamp": self.genesis["timestamp"],
+            "total_entries": len(self.tree),
+            "segments": self.segment,
+            "merkle_root": self.tree.root()
         }
@@ -1,6 +1,11 @@
 ﻿"""
 System Indexer - Pre-scans your entire PC into ChromaDB for instant search
 Run this once to build the index, then searches are instantaneous
+
+Incremental: a SQLite manifest (index_data/manifest.sqlite) remembers each file's
+size/mtime, so re-runs only upsert changed files and delete vanished ones. Every
+finished directory is checkpointed; a killed run picks up where it stopped.
+The same crawl also rebuilds the local trigram filename index (file_index.py).
 """
 
 import os
@@ -12,6 +17,11 @@ from datetime import datetime
 from pathlib import Path
 import logging
 
+from index_manifest import IndexManifest
+from chroma_ingest import BulkIngestor
+from fs_crawler import FsCrawler, CRAWL_THREADS, DEFAULT_SKIP
+from file_index import FileIndexBuilder, FILE_INDEX_PATH
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO, 
@@ -26,22 +36,33 @@ except ImportError:
     logger.error("❌ chromadb not installed. Run: pip install chromadb")
     sys.exit(1)
 
+DEFAULT_MANIFEST = Path("index_data") / "manifest.sqlite"
+
 class SystemIndexer:
     """
     Indexes your entire PC into ChromaDB for instant search
     """
     
-    def __init__(self, reset=False):
+    def __init__(self, reset=False, manifest_path=DEFAULT_MANIFEST, resume=True, batch_size=2000, in_flight=4,
+                 threads=CRAWL_THREADS, file_index_path=FILE_INDEX_PATH):
         self.chroma = None
         self.collection = None
         self.total_files = 0
         self.indexed_files = 0
-        self.skipped_dirs = [
-            'windows', 'program files', '$recycle', 'system32', 
-            'node_modules', '.git', 'cache', 'temp', 'tmp',
-            'appdata', 'winnt', 'msocache', 'config.msi',
-            'programdata', 'perflogs', 'recovery'
-        ]
+        self.unchanged_files = 0
+        self.deleted_files = 0
+        self.resumed_dirs = 0
+        self.failed_dirs = []
+        self.resume = resume
+        self.manifest = IndexManifest(manifest_path)
+        self.batch_size = batch_size
+        self.in_flight = in_flight
+        self.ingestor = None
+        self.threads = threads
+        self.crawl_stats = []
+        self.file_index_path = file_index_path
+        self.file_index = FileIndexBuilder()
+        self.skipped_dirs = list(DEFAULT_SKIP)
         
         # Connect to ChromaDB
         try:
@@ -51,13 +72,14 @@ class SystemIndexer:
                 settings=Settings(anonymized_telemetry=False)
             )
             
-            # Delete existing collection if reset
+            # Delete existing collection (and the manifest describing it) if reset
             if reset:
                 try:
                     self.chroma.delete_collection("pc_file_index")
                     logger.info("🗑️ Deleted existing index")
                 except Exception as e:
                     logger.warning(f"Could not delete existing index: {e}")
+                self.manifest.reset()
             
             # Create or get collection
             self.collection = self.chroma.get_or_create_collection(
@@ -65,6 +87,7 @@ class SystemIndexer:
                 metadata={"hnsw:space": "cosine"}
             )
             logger.info("✅ Connected to ChromaDB")
+            self.ingestor = BulkIngestor(self.collection, batch_size=batch_size, max_in_flight=in_flight)
             
         except Exception as e:
             logger.error(f"❌ Failed to connect to ChromaDB: {e}")
@@ -84,70 +107,100 @@ class SystemIndexer:
             drives = ['/']
         return drives
     
-    def should_skip_path(self, path):
-        """Check if path should be skipped"""
-        path_lower = path.lower()
-        for skip in self.skipped_dirs:
-            if skip in path_lower:
-                return True
-        return False
+    def file_record(self, entry):
+        """Chroma id, document and metadata for one crawled FileEntry"""
+        # Create a unique ID based on path
+        file_id = hashlib.md5(entry.path.encode()).hexdigest()[:16]
+        
+        # Prepare metadata
+        metadata = {
+            'name': entry.name,
+            'path': entry.path,
+            'size': entry.size,
+            'size_mb': round(entry.size / (1024 * 1024), 2),
+            'modified': datetime.fromtimestamp(entry.mtime).isoformat()[:19],
+            'extension': os.path.splitext(entry.name)[1].lower(),
+            'parent': os.path.dirname(entry.path)
+        }
+        # Document is the filename for search
+        return file_id, entry.name, metadata
     
-    def index_file(self, file_path):
-        """Index a single file in ChromaDB"""
-        try:
-            stat = os.stat(file_path)
-            
-            # Create a unique ID based on path
-            file_id = hashlib.md5(file_path.encode()).hexdigest()[:16]
-            
-            # Prepare metadata
-            metadata = {
-                'name': os.path.basename(file_path),
-                'path': file_path,
-                'size': stat.st_size,
-                'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()[:19],
-                'extension': os.path.splitext(file_path)[1].lower(),
-                'parent': os.path.dirname(file_path)
-            }
-            
-            # Add to ChromaDB (document is the filename for search)
-            self.collection.add(
-                documents=[os.path.basename(file_path)],
-                metadatas=[metadata],
-                ids=[file_id]
-            )
-            
-            self.indexed_files += 1
-            if self.indexed_files % 1000 == 0:
-                logger.info(f"   Indexed {self.indexed_files:,} files...")
-                
-        except Exception as e:
-            # Skip files we can't access
-            pass
+    def index_directory(self, run, root_path, directory, files):
+        """Queue one directory's changes; its manifest rows + checkpoint commit once they're written"""
+        known = self.manifest.entries(directory)
+        unchanged, written, records = [], [], []
+        for entry in files:  # Unreadable files were left out by the crawler; dropped below like deleted ones
+            self.total_files += 1
+            previous = known.pop(entry.path, None)
+            if previous and previous[0] == entry.size and previous[1] == entry.mtime_ns:
+                unchanged.append(entry.path)
+                continue
+            file_id, document, metadata = self.file_record(entry)
+            records.append((file_id, document, metadata))
+            written.append((entry.path, entry.size, entry.mtime_ns, file_id))
+        removed = list(known)
+        
+        
+        def commit():
+            self.manifest.commit_dir(run, root_path, directory, unchanged, written, removed)
+            previous_total = self.indexed_files
+            self.indexed_files += len(records)
+            self.unchanged_files += len(unchanged)
+            self.deleted_files += len(removed)
+            if self.indexed_files // 10000 > previous_total // 10000:
+                logger.info(f"   Indexed {self.indexed_files:,} files ({self.unchanged_files:,} unchanged, "
+                            f"{self.ingestor.get_stats()['files_per_second']:,.0f} files/s)...")
+        
+        def fail(error):
+            # Leave the manifest untouched so the next run retries this directory
+            logger.warning(f"Could not index {directory}: {error}")
+            self.failed_dirs.append(directory)
+        
+        self.ingestor.add(records, [known[p][2] for p in removed], on_commit=commit, on_fail=fail)
+        self.ingestor.poll()
     
-    async def scan_drive(self, drive):
-        """Scan a single drive and index files"""
+    async def scan_drive(self, run, drive, completed):
+        """Scan a single drive and index new/changed files"""
         logger.info(f"📁 Scanning {drive}...")
+        # Parallel scandir walk at low IO priority; system directories are pruned as they're found
+        crawler = FsCrawler([drive], skip=self.skipped_dirs, threads=self.threads)
         
-        for root, dirs, files in os.walk(drive, topdown=True):
-            # Filter system directories
-            dirs[:] = [d for d in dirs if not self.should_skip_path(os.path.join(root, d))]
+        async for listing in crawler.stream():
+            if listing.error is not None:
+                # Never treat a directory we couldn't list as deleted
+                self.failed_dirs.append(listing.path)
+                continue
+            
+            # Every listed directory goes into the filename index, resumed ones included
+            self.file_index.add(listing.path, listing.files)
             
-            # Check if we should skip this path
-            if self.should_skip_path(root):
+            # Already written by an interrupted run that we are resuming
+            if listing.path in completed:
+                self.resumed_dirs += 1
                 continue
             
-            for file in files:
-                file_path = os.path.join(root, file)
-                self.total_files += 1
-                
-                # Index the file
-                self.index_file(file_path)
-                
-                # Small delay every 5000 files to prevent overwhelming the system
-                if self.total_files % 5000 == 0:
-                    await asyncio.sleep(0.01)
+            self.index_directory(run, drive, listing.path, listing.files)
+        
+        stats = crawler.get_stats()
+        self.crawl_stats.append(stats)
+        logger.info(f"   Crawled {stats['dirs']:,} directories in {stats['elapsed_seconds']}s "
+                    f"({stats['threads']} threads, {stats['steals']:,} steals)")
+    
+    def sweep(self, run, roots):
+        """Delete index entries for files that no longer exist under the scanned roots"""
+        guarded = tuple(d.rstrip(os.sep) + os.sep for d in self.failed_dirs if d)
+        stale = [(path, file_id) for path, file_id, parent in self.manifest.stale(run, roots)
+                 if not (parent.rstrip(os.sep) + os.sep).startswith(guarded)]
+        
+        def forget(chunk):
+            self.manifest.forget(path for path, _ in chunk)
+            self.deleted_files += len(chunk)
+        
+        for i in range(0, len(stale), self.batch_size):
+            chunk = stale[i:i + self.batch_size]
+            self.ingestor.add([], [file_id for _, file_id in chunk], on_commit=lambda chunk=chunk: forget(chunk),
+                              on_fail=lambda e: logger.warning(f"Could not delete vanished files: {e}"))
+        self.ingestor.flush()
     
     async def run(self, quick=False):
         """Run the full indexing process"""
@@ -178,15 +231,33 @@ class SystemIndexer:
                 except Exception as e:
                     logger.warning(f"Could not get user folders: {e}")
         
+        run, resumed = self.manifest.start_run(drives, resume=self.resume)
+        completed = self.manifest.completed_dirs(run) if resumed else set()
+        if resumed:
+            logger.info(f"↩️ Resuming interrupted run #{run} ({len(completed):,} directories already done)")
+        
         # Scan each drive/folder
         for drive in drives:
             if os.path.exists(drive):
                 try:
-                    await self.scan_drive(drive)
+                    await self.scan_drive(run, drive, completed)
                 except Exception as e:
                     logger.warning(f"Error scanning {drive}: {e}")
+                    self.failed_dirs.append(drive)
             else:
                 logger.warning(f"Drive not found: {drive}")
+                self.failed_dirs.append(drive)
+        
+        # Everything queued must be written (and checkpointed) before deciding what vanished
+        self.ingestor.flush()
+        self.sweep(run, drives)
+        self.manifest.finish_run(run, {
+            "processed": self.total_files, "indexed": self.indexed_files, "unchanged": self.unchanged_files,
+            "deleted": self.deleted_files, "failed_dirs": len(self.failed_dirs),
+            "files_per_second": self.ingestor.get_stats()["files_per_second"]
+        })
+        file_index = self.file_index.build(drives)
+        file_index.save(self.file_index_path)
         
         # Get collection stats
         try:
@@ -199,8 +270,17 @@ class SystemIndexer:
         logger.info("=" * 60)
         logger.info(f"✅ Indexing complete!")
         logger.info(f"   Files processed: {self.total_files:,}")
-        logger.info(f"   Files indexed: {self.indexed_files:,}")
+        logger.info(f"   Files indexed: {self.indexed_files:,} new/changed, {self.unchanged_files:,} unchanged")
+        logger.info(f"   Files removed: {self.deleted_files:,}")
+        ingest = self.ingestor.get_stats()
+        logger.info(f"   Chroma writes: {ingest['batches']:,} batches, {ingest['retries']} retries, "
+                    f"{ingest['failed_batches']} failed, {ingest['files_per_second']:,.0f} files/s")
+        if self.resumed_dirs:
+            logger.info(f"   Directories resumed from checkpoint: {self.resumed_dirs:,}")
+        if self.failed_dirs:
+            logger.info(f"   Directories not indexed (retried next run): {len(self.failed_dirs):,}")
         logger.info(f"   Collection size: {count:,} entries")
+        logger.info(f"   Filename index: {len(file_index):,} files -> {self.file_index_path}")
         logger.info(f"   Time elapsed: {elapsed:.1f} seconds")
         logger.info("=" * 60)
         
@@ -210,6 +290,12 @@ async def main():
     parser = argparse.ArgumentParser(description='Index your PC for instant search')
     parser.add_argument('--quick', action='store_true', help='Quick mode - only user folders')
     parser.add_argument('--reset', action='store_true', help='Reset existing index')
+    parser.add_argument('--manifest', default=str(DEFAULT_MANIFEST), help='Incremental manifest (SQLite) path')
+    parser.add_argument('--no-resume', action='store_true', help='Start over instead of resuming an interrupted run')
+    parser.add_argument('--batch-size', type=int, default=2000, help='Files per ChromaDB write (1-5000)')
+    parser.add_argument('--in-flight', type=int, default=4, help='Concurrent ChromaDB write batches')
+    parser.add_argument('--threads', type=int, default=CRAWL_THREADS, help='Directory crawler threads')
+    parser.add_argument('--file-index', default=FILE_INDEX_PATH, help='Trigram filename index directory')
     args = parser.parse_args()
     
     logger.info("🚀 Starting System Indexer...")
@@ -226,8 +312,14 @@ async def main():
         return
     
     # Run indexer
-    indexer = SystemIndexer(reset=args.reset)
-    await indexer.run(quick=args.quick)
+    indexer = SystemIndexer(reset=args.reset, manifest_path=args.manifest, resume=not args.no_resume,
+                            batch_size=args.batch_size, in_flight=args.in_flight, threads=args.threads,
+                            file_index_path=args.file_index)
+    try:
+        await indexer.run(quick=args.quick)
+    finally:
+        indexer.ingestor.close()
+        indexer.manifest.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
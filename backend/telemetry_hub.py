@@ -0,0 +1,148 @@
+# backend/telemetry_hub.py
+"""
+Telemetry Hub - One hardware sampler fanned out to every dashboard
+A single background task samples psutil in a worker thread and publishes
+snapshots to all SSE subscribers, with a history ring for late joiners
+"""
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+class TelemetryHub:
+    """
+    Pub/sub fan-out for hardware telemetry.
+    Sampling cost is paid once per interval regardless of how many tabs are open.
+    """
+
+    def __init__(self, interval: float = 1.5, history_size: int = 120, subscriber_queue: int = 8):
+        self.interval = interval
+        self.history: deque = deque(maxlen=history_size)
+        self.latest: Optional[Dict[str, Any]] = None
+        self.subscriber_queue = subscriber_queue
+        self._subscribers: List[asyncio.Queue] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_net_io = None
+        self._last_time = None
+        self.samples_taken = 0
+
+    # ========================================================================
+    # SAMPLER
+    # ========================================================================
+    def _sample(self) -> Dict[str, Any]:
+        """Blocking psutil reads - always called in a worker thread"""
+        # interval=None: CPU usage since the previous call, no sleeping
+        cpu_percent = psutil.cpu_percent(interval=None)
+        ram_percent = psutil.virtual_memory().percent
+        current_net_io = psutil.net_io_counters()
+        current_time = time.time()
+
+        down_speed, up_speed = 0.0, 0.0
+        if self._last_net_io is not None:
+            time_delta = current_time - self._last_time
+            if time_delta > 0:
+                down_speed = (current_net_io.bytes_recv - self._last_net_io.bytes_recv) / time_delta / (1024 * 1024)
+                up_speed = (current_net_io.bytes_sent - self._last_net_io.bytes_sent) / time_delta / (1024 * 1024)
+        self._last_net_io = current_net_io
+        self._last_time = current_time
+        gpu_temp = 45 + (cpu_percent * 0.3)
+
+        return {
+            "cpu": round(cpu_percent, 1),
+            "ram": round(ram_percent, 1),
+            "networkDown": round(down_speed, 2),
+            "networkUp": round(up_speed, 2),
+            "gpuTemp": round(gpu_temp, 1),
+            "timestamp": current_time
+        }
+
+    async def _run(self):
+        # Prime the CPU counter so the first published sample is meaningful
+        await asyncio.to_thread(psutil.cpu_percent, None)
+        while True:
+            try:
+                snapshot = await asyncio.to_thread(self._sample)
+                self.publish(snapshot)
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Telemetry error: {e}")
+                await asyncio.sleep(2)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("📡 Telemetry hub sampling started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+            self._task = None
+
+    # ========================================================================
+    # FAN-OUT
+    # ========================================================================
+    def publish(self, snapshot: Dict[str, Any]):
+        self.latest = snapshot
+        self.history.append(snapshot)
+        self.samples_taken += 1
+        for listener in self._listeners:
+            try: listener(snapshot)
+            except Exception as e: logger.error(f"Telemetry listener error: {e}")
+        for queue in self._subscribers:
+            if queue.full():
+                # Slow client: drop its oldest frame rather than stall the hub
+                try: queue.get_nowait()
+                except asyncio.QueueEmpty: pass
+            queue.put_nowait(snapshot)
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """In-process consumers (e.g. the telemetry store) called on every snapshot"""
+        self._listeners.append(listener)
+
+    async def subscribe(self, min_interval: float = 0.0, replay: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield snapshots for one client.
+        min_interval downsamples (skip frames newer than that since the last sent one);
+        replay sends up to that many historical snapshots first.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue)
+        self._subscribers.append(queue)
+        last_sent = 0.0
+        try:
+            backlog = list(self.history)[-replay:] if replay > 0 else ([self.latest] if self.latest else [])
+            for snapshot in backlog:
+                last_sent = snapshot["timestamp"]
+                yield snapshot
+            while True:
+                snapshot = await queue.get()
+                if snapshot["timestamp"] <= last_sent:
+                    continue
+                # Small slack so sampler jitter doesn't push a frame a whole interval late
+                if min_interval and snapshot["timestamp"] - last_sent < min_interval * 0.9:
+                    continue
+                last_sent = snapshot["timestamp"]
+                yield snapshot
+        finally:
+            self._subscribers.remove(queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "interval_seconds": self.interval,
+            "samples_taken": self.samples_taken,
+            "history_size": len(self.history),
+            "running": self._task is not None and not self._task.done()
+        }
+
+# Global hub instance
+telemetry_hub = TelemetryHub()
@@ -0,0 +1,162 @@
+# backend/telemetry_store.py
+"""
+Telemetry Store - In-process time series for hardware telemetry
+Raw samples live in fixed-size numpy ring arrays with 1s/10s/1m min/max/avg
+rollups, so "last N minutes" questions are answered from memory
+"""
+import math
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+METRICS = ("cpu", "ram", "networkDown", "networkUp", "gpuTemp")
+
+# name -> (bucket width seconds, buckets kept)
+DEFAULT_ROLLUPS = {
+    "1s": (1, 3600),       # 1 hour
+    "10s": (10, 8640),     # 1 day
+    "1m": (60, 10080),     # 1 week
+}
+
+class _Ring:
+    """Fixed-capacity ring of timestamps plus named float32 column blocks"""
+
+    def __init__(self, capacity: int, columns: Tuple[str, ...], width: int):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity, dtype=np.float64)
+        self.cols = {name: np.zeros((capacity, width), dtype=np.float32) for name in columns}
+        self.head = 0   # next write slot
+        self.count = 0
+
+    def append(self, ts: float, **values: np.ndarray):
+        self.ts[self.head] = ts
+        for name, value in values.items():
+            self.cols[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def oldest(self) -> float:
+        """Oldest timestamp still held; -inf until the ring first wraps (nothing dropped yet)"""
+        return float(self.ts[self.head]) if self.count == self.capacity else -math.inf
+
+    def window(self, start: float, end: float) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Rows with start <= ts < end, oldest first"""
+        if self.count < self.capacity:
+            order = slice(0, self.count)
+            ts = self.ts[order]
+            cols = {name: block[order] for name, block in self.cols.items()}
+        else:
+            # Unroll the ring: [head:] is older than [:head]
+            ts = np.concatenate((self.ts[self.head:], self.ts[:self.head]))
+            cols = {name: np.concatenate((block[self.head:], block[:self.head])) for name, block in self.cols.items()}
+        lo, hi = np.searchsorted(ts, [start, end], side="left")
+        return ts[lo:hi], {name: block[lo:hi] for name, block in cols.items()}
+
+class _Rollup:
+    """Aggregates samples into aligned buckets; a bucket is written when it closes"""
+
+    def __init__(self, width: int, capacity: int):
+        self.width = width
+        self.ring = _Ring(capacity, ("min", "max", "avg"), len(METRICS))
+        self.bucket: Optional[float] = None
+        self._min = self._max = self._sum = None
+        self._n = 0
+
+    def add(self, ts: float, values: np.ndarray):
+        bucket = math.floor(ts / self.width) * self.width
+        if bucket != self.bucket:
+            self.flush()
+            self.bucket = bucket
+            self._min, self._max, self._sum, self._n = values.copy(), values.copy(), values.astype(np.float64), 0
+        else:
+            np.minimum(self._min, values, out=self._min)
+            np.maximum(self._max, values, out=self._max)
+            self._sum += values
+        self._n += 1
+
+    def flush(self):
+        if self.bucket is not None and self._n:
+            self.ring.append(self.bucket, min=self._min, max=self._max, avg=(self._sum / self._n).astype(np.float32))
+            self._n = 0
+
+    def window(self, start: float, end: float) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        ts, cols = self.ring.window(start, end)
+        if self.bucket is not None and self._n and start <= self.bucket < end:
+            # Include the still-open bucket so the newest data is never missing
+            ts = np.append(ts, self.bucket)
+            cols = {
+                "min": np.vstack((cols["min"], self._min)),
+                "max": np.vstack((cols["max"], self._max)),
+                "avg": np.vstack((cols["avg"], (self._sum / self._n).astype(np.float32))),
+            }
+        return ts, cols
+
+class TelemetryStore:
+    """Raw ring + rollups, fed by the kernel's telemetry hub"""
+
+    def __init__(self, raw_capacity: int = 4096, rollups: Dict[str, Tuple[int, int]] = None):
+        self.raw = _Ring(raw_capacity, ("values",), len(METRICS))
+        self.rollups = {name: _Rollup(width, cap) for name, (width, cap) in (rollups or DEFAULT_ROLLUPS).items()}
+        self._lock = threading.Lock()
+
+    def add(self, snapshot: Dict[str, Any]):
+        """Telemetry hub listener: record one snapshot"""
+        ts = snapshot["timestamp"]
+        values = np.array([snapshot.get(m, np.nan) for m in METRICS], dtype=np.float32)
+        with self._lock:
+            self.raw.append(ts, values=values)
+            for rollup in self.rollups.values():
+                rollup.add(ts, values)
+
+    def _pick_resolution(self, start: float, end: float, max_points: int) -> str:
+        """Finest resolution that still holds the whole window within max_points"""
+        raw_ts, _ = self.raw.window(start, end)
+        if len(raw_ts) <= max_points and self.raw.oldest() <= start:
+            return "raw"
+        for name, rollup in sorted(self.rollups.items(), key=lambda kv: kv[1].width):
+            if (end - start) / rollup.width <= max_points and rollup.ring.oldest() <= start:
+                return name
+        return max(self.rollups, key=lambda n: self.rollups[n].width)
+
+    def range(self, start: float, end: float, resolution: str = "auto", max_points: int = 1000) -> Dict[str, Any]:
+        """Series for [start, end) at raw or rollup resolution"""
+        with self._lock:
+            if resolution == "auto":
+                resolution = self._pick_resolution(start, end, max_points)
+            if resolution == "raw":
+                ts, cols = self.raw.window(start, end)
+                series = {m: cols["values"][:, i].round(2).tolist() for i, m in enumerate(METRICS)}
+            elif resolution in self.rollups:
+                ts, cols = self.rollups[resolution].window(start, end)
+                series = {
+                    m: {agg: cols[agg][:, i].round(2).tolist() for agg in ("min", "max", "avg")}
+                    for i, m in enumerate(METRICS)
+                }
+            else:
+                raise ValueError(f"Unknown resolution '{resolution}' (use auto, raw, {', '.join(self.rollups)})")
+        return {"start": start, "end": end, "resolution": resolution, "timestamps": ts.tolist(), "series": series}
+
+    def summary(self, start: float, end: float) -> Dict[str, Dict[str, float]]:
+        """min/max/avg per metric over a window, from raw samples"""
+        with self._lock:
+            _, cols = self.raw.window(start, end)
+            values = cols["values"]
+            if not len(values):
+                return {}
+            mins, maxs, avgs = np.nanmin(values, axis=0), np.nanmax(values, axis=0), np.nanmean(values, axis=0)
+        return {
+            m: {"min": round(float(mins[i]), 2), "max": round(float(maxs[i]), 2), "avg": round(float(avgs[i]), 2), "samples": len(values)}
+            for i, m in enumerate(METRICS)
+        }
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            if not self.raw.count:
+                return None
+            i = (self.raw.head - 1) % self.raw.capacity
+            row = self.raw.cols["values"][i]
+            return {"timestamp": float(self.raw.ts[i]), **{m: round(float(row[j]), 2) for j, m in enumerate(METRICS)}}
+
+# Global store instance
+telemetry_store = TelemetryStore()
@@ -0,0 +1,60 @@
+# backend/ttl_cache.py
+"""
+TTL Cache - Thread-safe LRU memo whose entries also expire after `ttl` seconds
+Shared by the constitutional verdict cache and the router's task -> worker cache
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
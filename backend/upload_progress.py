@@ -0,0 +1,67 @@
+# backend/upload_progress.py
+"""
+Upload Progress - Per-upload state for the SSE progress endpoint
+Upload handlers report bytes received and pipeline phase; subscribers are woken
+on every change and the stream ends when the upload is done or has failed
+"""
+import asyncio
+import time
+from typing import Dict, Any, AsyncIterator, Optional
+
+FINAL_PHASES = ("done", "error")
+
+class UploadProgress:
+    """Registry of in-flight uploads keyed by a client-chosen upload id"""
+
+    def __init__(self, retention: float = 300.0):
+        self.retention = retention
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for upload_id in [u for u, s in self._states.items() if s["updated"] < cutoff]:
+            del self._states[upload_id]
+            self._changed.pop(upload_id, None)
+
+    def start(self, upload_id: str, filename: str, total: Optional[int]):
+        self._prune()
+        self._states[upload_id] = {"upload_id": upload_id, "filename": filename, "phase": "receiving",
+                                   "received": 0, "total": total, "updated": time.time(), "seq": 0}
+        self._wake(upload_id)
+
+    def update(self, upload_id: Optional[str], **fields):
+        state = self._states.get(upload_id) if upload_id else None
+        if state is None:
+            return
+        state.update(fields, updated=time.time(), seq=state["seq"] + 1)
+        self._wake(upload_id)
+
+    def _wake(self, upload_id: str):
+        event = self._changed.pop(upload_id, None)
+        if event:
+            event.set()
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        return self._states.get(upload_id)
+
+    async def subscribe(self, upload_id: str, wait: float = 30.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the upload's state on each change until it reaches a final phase"""
+        last_seq = None
+        while True:
+            state = self._states.get(upload_id)
+            if state is not None and state["seq"] != last_seq:
+                last_seq = state["seq"]
+                yield dict(state)
+                if state["phase"] in FINAL_PHASES:
+                    return
+                continue  # re-check: the state may have moved on while we yielded
+            event = self._changed.setdefault(upload_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                if state is None:
+                    return  # the upload never started
+
+# Global progress registry
+upload_progress = UploadProgress()
@@ -0,0 +1,18 @@
+# backend/verdict_cache.py
+"""
+Verdict Cache - LRU + TTL memo of constitutional article evaluations
+Keyed by (intent hash, worker, session presence, constitution version)
+"""
+from ttl_cache import TTLCache
+
+class VerdictCache(TTLCache):
+    """TTLCache that counts invalidations (cleared whenever the articles change)"""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        super().__init__(maxsize, ttl)
+        self.stats["invalidations"] = 0
+
+    def clear(self):
+        super().clear()
+        with self._lock:
+            self.stats["invalidations"] += 1
@@ -0,0 +1,238 @@
+# backend/worker_scheduler.py
+"""
+Worker Scheduler - Admission control between the stream endpoint and the workers
+Per-worker concurrency limits plus a shared GPU slot pool; waiting requests are
+admitted by constitutional priority (CONSTITUTIONAL > HIGH > MEDIUM > LOW), FIFO within a level
+
+Model affinity: requests are grouped by target model. While one model is resident its
+queued requests run first, and a request for another model waits until the resident
+group drains - unless it has waited `max_wait` seconds, after which it goes next.
+"""
+import asyncio
+import itertools
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {"CONSTITUTIONAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+class SchedulerFullError(Exception):
+    """Raised when the admission queue is at capacity (HTTP 429)"""
+
+class Ticket:
+    """One request's place in line; admitted once it holds a worker slot and a GPU slot"""
+
+    def __init__(self, worker: str, rank: int, seq: int, model: Optional[str] = None):
+        self.worker = worker
+        self.model = model          # None = no GPU model (e.g. system commands)
+        self.rank = rank
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.released = False
+        self._changed = asyncio.Event()
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+    @property
+    def wait_seconds(self) -> float:
+        return (self.admitted_at or time.monotonic()) - self.enqueued_at
+
+    def sort_key(self):
+        return (self.rank, self.seq)
+
+class WorkerScheduler:
+    """
+    enqueue() -> async for position in wait(ticket) -> run -> release(ticket).
+    Queue depth is bounded by `max_queue`; beyond it enqueue raises SchedulerFullError.
+    """
+
+    def __init__(self, priorities: Dict[str, str], limits: Dict[str, int] = None, default_limit: int = 2,
+                 max_active: int = 4, max_queue: int = 32, max_wait: float = 10.0,
+                 can_colocate: Optional[Callable[[str], bool]] = None):
+        self.priorities = priorities
+        # Optional residency hook: True when a model can be loaded alongside the resident ones
+        self.can_colocate = can_colocate
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self.max_active = max_active
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._active: Dict[str, int] = {}
+        self._active_models: Dict[str, int] = {}
+        self.resident_model: Optional[str] = None
+        self._waiting: List[Ticket] = []      # kept sorted by (rank, seq)
+        self._age_timer: Optional[asyncio.TimerHandle] = None
+        self._seq = itertools.count()
+        self._waits: deque = deque(maxlen=1000)
+        self._recent: deque = deque(maxlen=50)
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "cancelled": 0,
+                      "affinity_admits": 0, "model_switches": 0, "aged_admits": 0}
+
+    def limit(self, worker: str) -> int:
+        return self.limits.get(worker, self.default_limit)
+
+    def _has_slot(self, worker: str) -> bool:
+        return sum(self._active.values()) < self.max_active and self._active.get(worker, 0) < self.limit(worker)
+
+    def is_full(self) -> bool:
+        return len(self._waiting) >= self.max_queue
+
+    def is_idle(self) -> bool:
+        return not self._waiting and not any(self._active.values())
+
+    def _aged(self, ticket: Ticket, now: float) -> bool:
+        return now - ticket.enqueued_at >= self.max_wait
+
+    def _reserved(self, worker: str) -> bool:
+        """An aged ticket needs this slot: same worker, or it is the last free one overall"""
+        now = time.monotonic()
+        last_slot = sum(self._active.values()) + 1 >= self.max_active
+        return any(self._aged(t, now) and (t.worker == worker or last_slot) for t in self._waiting)
+
+    def _compatible(self, ticket: Ticket) -> bool:
+        """Model-free work, a resident (or co-loadable) model, or a switch once other models have drained"""
+        if ticket.model is None or ticket.model == self.resident_model:
+            return True
+        if self.can_colocate and self.can_colocate(ticket.model):
+            return True
+        return not any(n for m, n in self._active_models.items() if m != ticket.model)
+
+    def _candidates(self) -> List[Ticket]:
+        """Dispatch order: aged tickets (oldest first), then the resident model's group, then the rest"""
+        now = time.monotonic()
+        return sorted(self._waiting, key=lambda t: (
+            0 if self._aged(t, now) else 1,
+            t.seq if self._aged(t, now) else 0,
+            0 if t.model is None or t.model == self.resident_model else 1,
+            t.rank, t.seq,
+        ))
+
+    # ========================================================================
+    # ADMISSION
+    # ========================================================================
+    def enqueue(self, worker: str, model: Optional[str] = None) -> Ticket:
+        rank = PRIORITY_RANK.get(self.priorities.get(worker, "LOW"), len(PRIORITY_RANK))
+        ticket = Ticket(worker, rank, next(self._seq), model)
+        # Admit anyone who has aged out first; whoever is still waiting is blocked on their worker's
+        # limit or on a model drain (release() re-dispatches), so a free compatible slot can be
+        # taken - unless an aged ticket could use it
+        self._dispatch()
+        if self._has_slot(worker) and self._compatible(ticket) and not self._reserved(worker):
+            self._admit(ticket)
+            return ticket
+        if self.is_full():
+            self.stats["rejected"] += 1
+            raise SchedulerFullError(f"Kernel queue is full ({self.max_queue} waiting) - retry shortly")
+        self._waiting.append(ticket)
+        self._waiting.sort(key=Ticket.sort_key)
+        self.stats["queued"] += 1
+        # Re-dispatch when this ticket ages out, even if no slot is released before then
+        self._arm_aging()
+        self._notify()
+        return ticket
+
+    def _admit(self, ticket: Ticket):
+        ticket.admitted_at = time.monotonic()
+        self._active[ticket.worker] = self._active.get(ticket.worker, 0) + 1
+        if ticket.model is not None:
+            if ticket.model == self.resident_model:
+                self.stats["affinity_admits"] += 1
+            elif self.resident_model is not None:
+                self.stats["model_switches"] += 1
+            self.resident_model = ticket.model
+            self._active_models[ticket.model] = self._active_models.get(ticket.model, 0) + 1
+        if self._aged(ticket, ticket.admitted_at):
+            self.stats["aged_admits"] += 1
+        self._waits.append(ticket.wait_seconds)
+        self._recent.append({"worker": ticket.worker, "model": ticket.model,
+                             "wait_ms": round(ticket.wait_seconds * 1000, 1)})
+        self.stats["admitted"] += 1
+        ticket._changed.set()
+
+    def _dispatch(self):
+        """Admit waiting tickets (aged, then resident-model group, then by priority) while slots are free"""
+        now = time.monotonic()
+        for ticket in self._candidates():
+            if sum(self._active.values()) >= self.max_active:
+                break
+            if self._active.get(ticket.worker, 0) >= self.limit(ticket.worker):
+                continue
+            if self._compatible(ticket) or self._aged(ticket, now):
+                self._waiting.remove(ticket)
+                self._admit(ticket)
+        self._arm_aging()
+        self._notify()
+
+    def _arm_aging(self):
+        """One timer for the next ticket to age out. Re-armed on every dispatch, so a timer
+        the loop fires a little early (clock resolution, ~15.6 ms on Windows) just re-arms"""
+        now = time.monotonic()
+        deadlines = [t.enqueued_at + self.max_wait for t in self._waiting if not self._aged(t, now)]
+        if self._age_timer is not None:
+            self._age_timer.cancel()
+            self._age_timer = None
+        if deadlines:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no loop (e.g. shutdown); the next enqueue/release re-arms
+            self._age_timer = loop.call_later(min(deadlines) - now, self._dispatch)
+
+    def _notify(self):
+        for ticket in self._waiting:
+            ticket._changed.set()
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based place among waiting requests (0 once admitted)"""
+        if ticket.admitted:
+            return 0
+        return next((i + 1 for i, t in enumerate(self._candidates()) if t is ticket), 0)
+
+    async def wait(self, ticket: Ticket) -> AsyncIterator[int]:
+        """Yield the ticket's queue position whenever it changes, until admitted"""
+        last = None
+        while not ticket.admitted:
+            # Clear before reading so a change made while the caller handles a yield isn't lost
+            ticket._changed.clear()
+            position = self.position(ticket)
+            if position != last:
+                last = position
+                yield position
+            if not ticket.admitted:
+                await ticket._changed.wait()
+
+    def release(self, ticket: Ticket):
+        """Free the ticket's slot (or drop it from the queue if it never ran)"""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self._active[ticket.worker] -= 1
+            if ticket.model is not None:
+                self._active_models[ticket.model] -= 1
+        elif ticket in self._waiting:
+            self._waiting.remove(ticket)
+            self.stats["cancelled"] += 1
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        pct = lambda p: round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1) if waits else 0.0
+        return {
+            **self.stats,
+            "active": {w: n for w, n in self._active.items() if n},
+            "active_models": {m: n for m, n in self._active_models.items() if n},
+            "resident_model": self.resident_model,
+            "waiting": [{"worker": t.worker, "model": t.model, "priority": self.priorities.get(t.worker, "LOW"),
+                         "waited_ms": round(t.wait_seconds * 1000, 1)} for t in self._waiting],
+            "limits": {"per_worker": self.limits, "default": self.default_limit,
+                       "max_active": self.max_active, "max_queue": self.max_queue, "max_wait_s": self.max_wait},
+            "wait_ms": {"p50": pct(0.5), "p99": pct(0.99), "max": round(waits[-1] * 1000, 1) if waits else 0.0},
+            "recent": list(self._recent),
+        }
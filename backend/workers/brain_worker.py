@@ -2,10 +2,12 @@
 Brain Worker - General reasoning with Llama 3.2
 """
 
-import ollama
 import asyncio
 import aiohttp
 import logging
+from typing import AsyncIterator
+
+from inference_client import inference
 
 logger = logging.getLogger(__name__)
 
@@ -47,9 +49,8 @@ class BrainWorker:
             logger.warning(f"Search error: {e}")
             return ""
     
-    async def process(self, task: str, model: str = None) -> dict:
-        """Process with automatic online grounding"""
-        model_to_use = model or self.model
+    async def _build_prompt(self, task: str) -> tuple:
+        """Return (prompt, grounded) with automatic online grounding"""
         task_lower = task.lower()
         
         # Auto-detect if search is needed
@@ -68,19 +69,35 @@ class BrainWorker:
 
 Question: {task}
 Answer:"""
-                response = ollama.chat(
-                    model=model_to_use,
-                    messages=[{"role": "user", "content": grounded_prompt}],
-                    stream=False,
-                )
-                return {
-                    "content": f"{response['message']['content']}\n\n*🔍 Sourced from DuckDuckGo*"
-                }
+                return grounded_prompt, True
         
-        # Standard response
-        response = ollama.chat(
+        return task, False
+    
+    async def process(self, task: str, model: str = None) -> dict:
+        """Process with automatic online grounding"""
+        model_to_use = model or self.model
+        prompt, grounded = await self._build_prompt(task)
+        
+        response = await inference.chat(
             model=model_to_use,
-            messages=[{"role": "user", "content": task}],
-            stream=False,
+            messages=[{"role": "user", "content": prompt}],
         )
+        if grounded:
+            return {
+                "content": f"{response['message']['content']}\n\n*🔍 Sourced from DuckDuckGo*"
+            }
         return {"content": response["message"]["content"]}
+    
+    async def stream(self, task: str, model: str = None) -> AsyncIterator[str]:
+        """Yield the answer token-by-token as Ollama generates it"""
+        model_to_use = model or self.model
+        prompt, grounded = await self._build_prompt(task)
+        
+        async for chunk in inference.chat_stream(
+            model=model_to_use,
+            messages=[{"role": "user", "content": prompt}],
+        ):
+            yield chunk
+        
+        if grounded:
+            yield "\n\n*🔍 Sourced from DuckDuckGo*"
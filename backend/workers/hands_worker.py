@@ -2,8 +2,10 @@
 Hands Worker - Code generation with qwen2.5-coder
 """
 
-import ollama
 import logging
+from typing import AsyncIterator
+
+from inference_client import inference
 
 logger = logging.getLogger(__name__)
 
@@ -16,9 +18,30 @@ class HandsWorker:
     async def process(self, task: str, model: str = None) -> dict:
         """Generate code"""
         model_to_use = model or self.model
-        response = ollama.chat(
+        response = await inference.chat(
             model=model_to_use,
             messages=[{"role": "user", "content": task}],
-            stream=False,
         )
         return {"code": response["message"]["content"]}
+    
+    async def stream(self, task: str, model: str = None) -> AsyncIterator[str]:
+        """Stream generated code inside a fenced block"""
+        model_to_use = model or self.model
+        # Open the fence on the first chunk and close it even if generation fails
+        # part-way, so the client never renders a dangling code block
+        opened = False
+        try:
+            async for chunk in inference.chat_stream(
+                model=model_to_use,
+                messages=[{"role": "user", "content": task}],
+            ):
+                if not opened:
+                    opened = True
+                    yield "```python\n"
+                yield chunk
+        except Exception:
+            if opened:
+                yield "\n```"
+            raise
+        if opened:
+            yield "\n```"
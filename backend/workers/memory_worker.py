@@ -12,8 +12,18 @@ from typing import List, Dict, Any, Optional
 import logging
 import hashlib
 
+from fs_crawler import FsCrawler
+from file_index import FileIndex
+
 logger = logging.getLogger(__name__)
 
+# Directory names never searched live (matched once per directory by the crawler)
+LIVE_SEARCH_SKIP = [
+    'windows', 'program files', '$recycle', 'system32',
+    'node_modules', '.git', 'temp', 'tmp', 'cache',
+    'appdata', 'winnt', 'msocache'
+]
+
 class MemoryWorker:
     """
     Worker for PC-wide search and memory operations
@@ -25,19 +35,16 @@ class MemoryWorker:
         self.version = "1.0.0"
         self.chroma = None
         self.collection = None
-        self.index_collection = None
+        
+        # Local trigram filename index (memory-mapped); None until one has been built
+        self.file_index = FileIndex.load()
         
         # Try to connect to ChromaDB
         try:
             import chromadb
             self.chroma = chromadb.HttpClient(host='localhost', port=8000)
             self.collection = self.chroma.get_or_create_collection("rez_hive_memory")
-            # Try to get file index collection
-            try:
-                self.index_collection = self.chroma.get_collection("pc_file_index")
-                logger.info("✅ MemoryWorker connected to ChromaDB + File Index available")
-            except:
-                logger.info("✅ MemoryWorker connected to ChromaDB (no file index yet)")
+            logger.info("✅ MemoryWorker connected to ChromaDB")
         except ImportError:
             logger.warning("⚠️ chromadb not installed - memory features disabled")
         except Exception as e:
@@ -62,58 +69,40 @@ class MemoryWorker:
         
         logger.info(f"🔍 Searching {len(drives)} drives for '{query}'")
         
-        # Search each drive
-        for drive in drives:
-            try:
-                for root, dirs, files in os.walk(drive):
-                    # Skip system directories
-                    if any(skip in root.lower() for skip in [
-                        'windows', 'program files', '$recycle', 'system32', 
-                        'node_modules', '.git', 'temp', 'tmp', 'cache', 
-                        'appdata', 'winnt', 'msocache'
-                    ]):
-                        continue
-                        
-                    for file in files:
-                        if query_lower in file.lower():
-                            file_path = os.path.join(root, file)
-                            try:
-                                stat = os.stat(file_path)
-                                results.append({
-                                    'name': file,
-                                    'path': file_path,
-                                    'size': stat.st_size,
-                                    'size_mb': stat.st_size / (1024 * 1024),
-                                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat()[:10]
-                                })
-                                if len(results) >= max_results:
-                                    return results
-                            except:
-                                continue
-            except (PermissionError, OSError):
-                continue
+        # Parallel crawl of all drives; only matching files are stat'ed. Someone is waiting on
+        # this one, so it runs at normal priority (the indexer and poller yield the disk)
+        crawler = FsCrawler(drives, skip=LIVE_SEARCH_SKIP, match=lambda name: query_lower in name.lower(),
+                            low_priority=False)
+        try:
+            async for listing in crawler.stream():
+                for entry in listing.files:
+                    results.append({
+                        'name': entry.name,
+                        'path': entry.path,
+                        'size': entry.size,
+                        'size_mb': entry.size / (1024 * 1024),
+                        'modified': datetime.fromtimestamp(entry.mtime).isoformat()[:10]
+                    })
+                    if len(results) >= max_results:
+                        return results
+        finally:
+            crawler.stop()
         
         return results[:max_results]
 
     async def search_index(self, query: str, max_results: int = 50) -> List[Dict]:
         """
-        Search using pre-built ChromaDB index (instant)
+        Search the local filename index (substring, *.glob or prefix; newest first)
         """
-        if not self.chroma or not self.index_collection:
-            return await self.search_entire_pc(query)
+        if self.file_index is None:
+            return await self.search_entire_pc(query, max_results)
         
         try:
-            results = self.index_collection.query(
-                query_texts=[query],
-                n_results=max_results
-            )
-            
-            if results['metadatas'] and results['metadatas'][0]:
-                return results['metadatas'][0]
+            return self.file_index.search(query, limit=max_results)
         except Exception as e:
             logger.warning(f"Index search failed: {e}")
         
-        return await self.search_entire_pc(query)
+        return await self.search_entire_pc(query, max_results)
 
     async def list_drives(self) -> List[Dict]:
         """
@@ -190,7 +179,7 @@ class MemoryWorker:
 • `find all .txt files`"""}
 
             # Use index if available, otherwise fallback to live search
-            if self.index_collection:
+            if self.file_index is not None:
                 results = await self.search_index(query)
                 search_method = "indexed"
             else:
@@ -218,7 +207,7 @@ class MemoryWorker:
                     response += f"*...and {len(results)-15} more files*\n"
                 
                 if search_method == "live":
-                    response += "\n💡 *Tip: Run `python system_indexer.py` to build an index for instant searches*"
+                    response += "\n💡 *Tip: Run `python file_index.py build` to build an index for instant searches*"
                 
                 return {"content": response}
             else:
@@ -2,10 +2,14 @@
 System Worker - Handles slash commands and system utilities
 """
 
+import asyncio
+import time
 import psutil
 import logging
 import os
 
+from telemetry_store import telemetry_store
+
 logger = logging.getLogger(__name__)
 
 class SystemWorker:
@@ -22,9 +26,22 @@ class SystemWorker:
         # =========================================================
         if task_lower == '/check_system' or task_lower == 'check system':
             try:
-                cpu = psutil.cpu_percent(interval=1)
-                memory = psutil.virtual_memory().percent
+                # Served from the telemetry store; only sample directly if the hub hasn't run yet
+                latest = telemetry_store.latest()
+                if latest:
+                    cpu, memory = latest["cpu"], latest["ram"]
+                else:
+                    cpu = await asyncio.to_thread(psutil.cpu_percent, 1)
+                    memory = psutil.virtual_memory().percent
                 disk = psutil.disk_usage('/').percent
+                window = telemetry_store.summary(time.time() - 300, time.time())
+                trend = ""
+                if window:
+                    trend = f"""
+**Last 5 min:**
+• CPU: avg {window['cpu']['avg']}% / peak {window['cpu']['max']}%
+• Memory: avg {window['ram']['avg']}% / peak {window['ram']['max']}%
+"""
                 
                 return {
                     "content": f"""**🖥️ SYSTEM HEALTH REPORT**
@@ -33,7 +50,7 @@ class SystemWorker:
 • CPU: {cpu}%
 • Memory: {memory}%
 • Disk: {disk}%
-
+{trend}
 **Workers:**
 • 🧠 Brain: ACTIVE
 • 👁️ Eyes: ACTIVE
@@ -4,7 +4,6 @@ Gives REZ HIVE the ability to see and understand your screen
 """
 
 import asyncio
-import ollama
 import mss
 import mss.tools
 import base64
@@ -15,6 +14,8 @@ import os
 import tempfile
 from datetime import datetime
 
+from inference_client import inference
+
 logger = logging.getLogger(__name__)
 
 class VisionWorker:
@@ -59,8 +60,7 @@ class VisionWorker:
         img_base64 = self._image_to_base64(img)
         
         messages = [{"role": "user", "content": prompt, "images": [img_base64]}]
-        response = await asyncio.to_thread(
-            ollama.chat,
+        response = await inference.chat(
             model=self.model,
             messages=messages,
             options={"temperature": 0.2}
@@ -4,7 +4,6 @@ Zero-Drift Constitutional Core - The immutable foundation
 Every decision is logged, auditable, and replayable
 """
 import hashlib
-import json
 import time
 import logging
 from datetime import datetime
@@ -13,6 +12,13 @@ from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
 
+from rule_engine import Rule, RuleEngine, RuleHits
+from ledger_writer import LedgerWriter
+from ruling_store import RulingStore
+from verdict_cache import VerdictCache
+from config import (LEDGER_FSYNC_POLICY, LEDGER_FSYNC_INTERVAL, LEDGER_BATCH_SIZE, LEDGER_MAX_QUEUE, LEDGER_MAX_SPILL,
+                    RULING_BUFFER_SIZE, RULING_SESSION_HISTORY, VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL)
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -50,6 +56,7 @@ class ConstitutionalRuling:
     violations: List[str] = field(default_factory=list)
     processing_time_ms: float = 0
     context: Dict[str, Any] = field(default_factory=dict)
+    cached: bool = False
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -63,7 +70,8 @@ class ConstitutionalRuling:
             "verdict": self.verdict.value,
             "articles_applied": self.articles_applied,
             "violations": self.violations,
-            "processing_time_ms": self.processing_time_ms
+            "processing_time_ms": self.processing_time_ms,
+            "cached": self.cached
         }
 
 @dataclass
@@ -92,6 +100,67 @@ class DriftEvent:
             "healing_action": self.healing_action
         }
 
+# ============================================================================
+# ARTICLE KEYWORDS - compiled once into the rule engine
+# ============================================================================
+
+# Article 1: external URLs / HTTP clients
+EXTERNAL_INDICATORS = [
+    "http://", "https://", "api.", ".com", ".org", ".io",
+    "fetch(", "axios.", "requests.", "urllib", "aiohttp"
+]
+
+# Article 1: cloud model names
+CLOUD_MODELS = ["gpt-", "claude", "gemini-", "bedrock", "sagemaker"]
+
+# Article 4: non-deterministic indicators
+NON_DETERMINISTIC = [
+    "random", "randint", "shuffle", "time(", "datetime",
+    "uuid", "nanoseconds", "timestamp"
+]
+
+# Article 5: harmful operations (matched in upper and lower case)
+HARMFUL_PATTERNS = [
+    # File system destruction
+    "rm -rf", "del /f", "format ", "dd if=", "mkfs",
+    "remove-recursive", "unlink --recursive",
+    
+    # Database destruction
+    "DROP TABLE", "DROP DATABASE", "DELETE FROM", "TRUNCATE",
+    
+    # System commands
+    "shutdown", "reboot", "halt", "poweroff",
+    "taskkill /F", "kill -9", "pkill -f",
+    
+    # Privilege escalation
+    "sudo", "su ", "chmod 777", "chown root"
+]
+
+# Article 6: PII
+PII_PATTERNS = [
+    "email", "phone", "address", "ssn", "credit card", "passport",
+    "driver license", "bank account", "routing number", "dob",
+    "birth date", "social security", "medicare"
+]
+
+# Article 8: recoverability keywords
+RECOVERABILITY_KEYWORDS = ["delete", "overwrite", "backup"]
+
+# Article 9: brain worker file operations / code worker execution
+BRAIN_FILE_OPS = ["list files", "read file", "write file", "delete file"]
+CODE_EXECUTION = ["execute", "run"]
+
+CONSTITUTION_RULES = (
+    [Rule("sovereignty.external", p) for p in EXTERNAL_INDICATORS] +
+    [Rule("sovereignty.cloud", p) for p in CLOUD_MODELS] +
+    [Rule("determinism", p) for p in NON_DETERMINISTIC] +
+    [Rule("safety", p, either_case=True) for p in HARMFUL_PATTERNS] +
+    [Rule("privacy", p) for p in PII_PATTERNS] +
+    [Rule("recoverability", p) for p in RECOVERABILITY_KEYWORDS] +
+    [Rule("boundedness.brain", p) for p in BRAIN_FILE_OPS] +
+    [Rule("boundedness.code", p) for p in CODE_EXECUTION]
+)
+
 # ============================================================================
 # THE CONSTITUTION - 9 ARTICLES OF ZERO-DRIFT SOVEREIGNTY
 # ============================================================================
@@ -99,7 +168,8 @@ class DriftEvent:
 class ZeroDriftConstitution:
     """
     The immutable constitution governing all AI operations.
-    Every article is a function that returns (bool, reason, suggestions)
+    Every article is a function that returns (bool, reason, suggestions).
+    Keyword articles read their matches from a single RuleEngine scan.
     """
     
     def __init__(self):
@@ -132,36 +202,50 @@ class ZeroDriftConstitution:
             "boundedness": self.article_9_boundedness
         }
         
-        # Track rulings for replayability
-        self.rulings: List[ConstitutionalRuling] = []
+        # Compile every article keyword once
+        self.rule_engine = RuleEngine(CONSTITUTION_RULES)
+        
+        # Memoised article evaluations; invalidated when the article set changes
+        self.verdict_cache = VerdictCache(maxsize=VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL)
+        self._articles_fingerprint = None
+        self._version = None
+        
+        # Track rulings for replayability (bounded; older rulings are paged from the ledger)
         self.ledger_path = Path("logs/constitutional_ledger.jsonl")
         self.ledger_path.parent.mkdir(exist_ok=True)
+        self.rulings = RulingStore(
+            self.ledger_path,
+            capacity=RULING_BUFFER_SIZE,
+            per_session=RULING_SESSION_HISTORY
+        )
+        self.ledger_writer = LedgerWriter(
+            self.ledger_path,
+            max_queue=LEDGER_MAX_QUEUE,
+            max_spill=LEDGER_MAX_SPILL,
+            batch_size=LEDGER_BATCH_SIZE,
+            fsync_policy=LEDGER_FSYNC_POLICY,
+            fsync_interval=LEDGER_FSYNC_INTERVAL,
+            on_commit=self.rulings.record_committed
+        )
     
     # ========================================================================
     # ARTICLE 1: SOVEREIGNTY - No external dependencies
     # ========================================================================
-    def article_1_sovereignty(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_1_sovereignty(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         All data must stay within the sovereign system.
         No external API calls, no data leakage to cloud services.
         """
+        hits = hits or self.rule_engine.scan(task)
         violations = []
         
         # Check for external URLs
-        external_indicators = [
-            "http://", "https://", "api.", ".com", ".org", ".io",
-            "fetch(", "axios.", "requests.", "urllib", "aiohttp"
-        ]
-        
-        for indicator in external_indicators:
-            if indicator in task.lower():
-                violations.append(f"External reference detected: {indicator}")
+        for indicator in hits.group("sovereignty.external"):
+            violations.append(f"External reference detected: {indicator}")
         
         # Check for cloud model names
-        cloud_models = ["gpt-", "claude", "gemini-", "bedrock", "sagemaker"]
-        for model in cloud_models:
-            if model in task.lower():
-                violations.append(f"Cloud model reference: {model}")
+        for model in hits.group("sovereignty.cloud"):
+            violations.append(f"Cloud model reference: {model}")
         
         if violations:
             return False, "Data sovereignty violation", violations
@@ -170,7 +254,7 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 2: TRANSPARENCY - All operations explainable
     # ========================================================================
-    def article_2_transparency(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_2_transparency(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         All operations must be transparent and explainable.
         No black-box decisions without audit trail.
@@ -188,7 +272,7 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 3: ACCOUNTABILITY - Every action attributable
     # ========================================================================
-    def article_3_accountability(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_3_accountability(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         Every action must be attributable to a specific session/user.
         """
@@ -201,21 +285,17 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 4: DETERMINISM - Same input = same output
     # ========================================================================
-    def article_4_determinism(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_4_determinism(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         Same input + same context must produce same output.
         Non-deterministic elements must be logged.
         """
-        # Check for non-deterministic indicators
-        non_deterministic = [
-            "random", "randint", "shuffle", "time(", "datetime",
-            "uuid", "nanoseconds", "timestamp"
-        ]
+        hits = hits or self.rule_engine.scan(task)
         
+        # Check for non-deterministic indicators
         violations = []
-        for item in non_deterministic:
-            if item in task.lower():
-                violations.append(f"Potential non-deterministic element: {item}")
+        for item in hits.group("determinism"):
+            violations.append(f"Potential non-deterministic element: {item}")
         
         if violations:
             return False, "Non-deterministic elements detected", violations
@@ -224,30 +304,15 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 5: SAFETY - No harmful operations
     # ========================================================================
-    def article_5_safety(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_5_safety(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         No harmful operations that could damage system or data.
         """
-        harmful_patterns = [
-            # File system destruction
-            "rm -rf", "del /f", "format ", "dd if=", "mkfs",
-            "remove-recursive", "unlink --recursive",
-            
-            # Database destruction
-            "DROP TABLE", "DROP DATABASE", "DELETE FROM", "TRUNCATE",
-            
-            # System commands
-            "shutdown", "reboot", "halt", "poweroff",
-            "taskkill /F", "kill -9", "pkill -f",
-            
-            # Privilege escalation
-            "sudo", "su ", "chmod 777", "chown root"
-        ]
+        hits = hits or self.rule_engine.scan(task)
         
         violations = []
-        for pattern in harmful_patterns:
-            if pattern in task.upper() or pattern in task.lower():
-                violations.append(f"Harmful pattern detected: {pattern}")
+        for pattern in hits.group("safety"):
+            violations.append(f"Harmful pattern detected: {pattern}")
         
         if violations:
             return False, "Safety violation", violations
@@ -256,20 +321,15 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 6: PRIVACY - No PII collection
     # ========================================================================
-    def article_6_privacy(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_6_privacy(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         No PII (Personally Identifiable Information) collection or storage.
         """
-        pii_patterns = [
-            "email", "phone", "address", "ssn", "credit card", "passport",
-            "driver license", "bank account", "routing number", "dob",
-            "birth date", "social security", "medicare"
-        ]
+        hits = hits or self.rule_engine.scan(task)
         
         violations = []
-        for pattern in pii_patterns:
-            if pattern in task.lower():
-                violations.append(f"Potential PII detected: {pattern}")
+        for pattern in hits.group("privacy"):
+            violations.append(f"Potential PII detected: {pattern}")
         
         if violations:
             return False, "Privacy violation - PII detected", violations
@@ -278,7 +338,7 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 7: AUDITABILITY - Full logging required
     # ========================================================================
-    def article_7_auditability(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_7_auditability(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         All operations must be logged for audit.
         """
@@ -288,22 +348,24 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 8: RECOVERABILITY - Can rollback to known state
     # ========================================================================
-    def article_8_recoverability(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_8_recoverability(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         System must be able to rollback to known state.
         Operations should be idempotent or have rollback plans.
         """
         worker = context.get("worker")
+        hits = hits or self.rule_engine.scan(task)
+        keywords = hits.group("recoverability")
         
         # Different workers have different recoverability requirements
         if worker == "files":
             # File operations should be idempotent or have backups
-            if "delete" in task.lower() and "backup" not in task.lower():
+            if "delete" in keywords and "backup" not in keywords:
                 return False, "File deletion without backup", ["Non-recoverable delete"]
         
         elif worker == "code":
             # Code generation should be revertible
-            if "overwrite" in task.lower() and "backup" not in task.lower():
+            if "overwrite" in keywords and "backup" not in keywords:
                 return False, "Code overwrite without backup", ["Non-recoverable overwrite"]
         
         return True, "Operation is recoverable", []
@@ -311,19 +373,18 @@ class ZeroDriftConstitution:
     # ========================================================================
     # ARTICLE 9: BOUNDEDNESS - Operations stay within scope
     # ========================================================================
-    def article_9_boundedness(self, task: str, context: Dict[str, Any]) -> tuple:
+    def article_9_boundedness(self, task: str, context: Dict[str, Any], hits: RuleHits = None) -> tuple:
         """
         Operations must stay within defined scope/worker boundaries.
         """
         worker = context.get("worker")
+        hits = hits or self.rule_engine.scan(task)
         
         # Brain worker - general reasoning, should stay in its lane
         if worker == "brain":
             # Check if trying to do file operations
-            file_ops = ["list files", "read file", "write file", "delete file"]
-            for op in file_ops:
-                if op in task.lower():
-                    return False, "Brain worker attempting file operation", ["Use files worker instead"]
+            if hits.group("boundedness.brain"):
+                return False, "Brain worker attempting file operation", ["Use files worker instead"]
         
         # Files worker - must stay within project directory
         elif worker == "files":
@@ -332,11 +393,35 @@ class ZeroDriftConstitution:
         
         # Code worker - should only generate code, not execute it
         elif worker == "code":
-            if "execute" in task.lower() or "run" in task.lower():
+            if hits.group("boundedness.code"):
                 return False, "Code worker attempting execution", ["Use hands worker for execution"]
         
         return True, "Operation within bounds", []
     
+    # ========================================================================
+    # CONSTITUTION VERSION
+    # ========================================================================
+    @property
+    def version(self) -> str:
+        """
+        Hash of the article set (names, code and keyword rules).
+        Recomputed - and the verdict cache cleared - whenever articles are swapped.
+        """
+        fingerprint = (tuple((name, id(func)) for name, func in self.articles.items()), id(self.rule_engine))
+        if fingerprint != self._articles_fingerprint:
+            h = hashlib.sha256()
+            for name, func in self.articles.items():
+                code = getattr(func, "__code__", None)
+                h.update(name.encode())
+                h.update(code.co_code if code else repr(func).encode())
+                h.update(repr(code.co_consts if code else ()).encode())
+            for rule in self.rule_engine.rules:
+                h.update(f"{rule.group}|{rule.pattern}|{rule.either_case}".encode())
+            self._version = h.hexdigest()[:12]
+            self._articles_fingerprint = fingerprint
+            self.verdict_cache.clear()
+        return self._version
+    
     # ========================================================================
     # MAIN VALIDATION FUNCTION
     # ========================================================================
@@ -344,7 +429,11 @@ class ZeroDriftConstitution:
         """
         Validate a task against all constitutional articles.
         Returns detailed ruling with reasons and suggestions.
+        Repeated (task, worker) pairs are served from the verdict cache but
+        still produce their own ledger record.
+        Raises LedgerBackpressureError (before ruling) while the ledger cannot keep up.
         """
+        self.ledger_writer.check_capacity()
         start_time = time.time()
         
         full_context = {
@@ -355,43 +444,53 @@ class ZeroDriftConstitution:
         if context:
             full_context.update(context)
         
-        results = {}
-        violations = []
-        articles_applied = []
+        task_digest = hashlib.sha256(task.encode()).hexdigest()
+        intent_hash = task_digest[:16]
         
-        # Check each article
-        for article_name, check_func in self.articles.items():
-            passed, reason, article_violations = check_func(task, full_context)
-            results[article_name] = {
-                "passed": passed,
-                "reason": reason,
-                "violations": article_violations
-            }
-            
-            articles_applied.append(article_name)
-            if not passed:
-                violations.extend(article_violations)
+        # Caller-supplied context can change any article's outcome - don't cache it.
+        # Articles 2/3 only look at whether a session id is present.
+        cache_key = None if context else (task_digest, worker, bool(session_id), self.version)
+        cached = self.verdict_cache.get(cache_key) if cache_key else None
         
-        # Determine verdict
-        if not violations:
-            verdict = Verdict.ALLOWED
-            reason = "All constitutional articles satisfied"
+        if cached:
+            verdict, reason, violations, articles_applied = cached
+            violations, articles_applied = list(violations), list(articles_applied)
         else:
-            # Check severity - some violations are warnings, some are blockers
-            critical_violations = [v for v in violations if "delete" in v or "DROP" in v or "rm" in v]
-            if critical_violations:
-                verdict = Verdict.DENIED
-                reason = f"Critical constitutional violations: {', '.join(critical_violations[:3])}"
+            violations = []
+            articles_applied = []
+            
+            # Scan the task once, then check each article against the hits
+            hits = self.rule_engine.scan(task)
+            for article_name, check_func in self.articles.items():
+                passed, reason, article_violations = check_func(task, full_context, hits)
+                
+                articles_applied.append(article_name)
+                if not passed:
+                    violations.extend(article_violations)
+            
+            # Determine verdict
+            if not violations:
+                verdict = Verdict.ALLOWED
+                reason = "All constitutional articles satisfied"
             else:
-                verdict = Verdict.REQUIRES_CONFIRMATION
-                reason = f"Non-critical violations detected: {', '.join(violations[:3])}"
+                # Check severity - some violations are warnings, some are blockers
+                critical_violations = [v for v in violations if "delete" in v or "DROP" in v or "rm" in v]
+                if critical_violations:
+                    verdict = Verdict.DENIED
+                    reason = f"Critical constitutional violations: {', '.join(critical_violations[:3])}"
+                else:
+                    verdict = Verdict.REQUIRES_CONFIRMATION
+                    reason = f"Non-critical violations detected: {', '.join(violations[:3])}"
+            
+            if cache_key:
+                self.verdict_cache.put(cache_key, (verdict, reason, tuple(violations), tuple(articles_applied)))
         
         # Create ruling record
         ruling = ConstitutionalRuling(
-            ruling_id=hashlib.sha256(f"{task}{time.time()}".encode()).hexdigest()[:16],
+            ruling_id=hashlib.sha256(f"{intent_hash}{time.time()}".encode()).hexdigest()[:16],
             timestamp=start_time,
             iso_time=datetime.utcnow().isoformat(),
-            intent_hash=hashlib.sha256(task.encode()).hexdigest()[:16],
+            intent_hash=intent_hash,
             intent_preview=task[:50] + "..." if len(task) > 50 else task,
             worker=worker,
             session_id=session_id,
@@ -399,7 +498,8 @@ class ZeroDriftConstitution:
             articles_applied=articles_applied,
             violations=violations,
             processing_time_ms=(time.time() - start_time) * 1000,
-            context=full_context
+            context=full_context,
+            cached=cached is not None
         )
         
         # Store ruling
@@ -413,24 +513,21 @@ class ZeroDriftConstitution:
             "violations": violations,
             "articles_applied": articles_applied,
             "processing_time_ms": ruling.processing_time_ms,
-            "requires_confirmation": verdict == Verdict.REQUIRES_CONFIRMATION
+            "requires_confirmation": verdict == Verdict.REQUIRES_CONFIRMATION,
+            "cached": ruling.cached
         }
     
     def _append_to_ledger(self, ruling: ConstitutionalRuling):
-        """Append ruling to immutable ledger"""
-        try:
-            with open(self.ledger_path, "a") as f:
-                f.write(json.dumps(ruling.to_dict()) + "\n")
-        except Exception as e:
-            logger.error(f"Failed to write to ledger: {e}")
+        """Queue ruling for the background writer's next group commit"""
+        self.ledger_writer.submit(ruling.to_dict())
     
     def get_ruling_history(self, session_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
         """Get ruling history, optionally filtered by session"""
-        if session_id:
-            filtered = [r for r in self.rulings if r.session_id == session_id][-limit:]
-        else:
-            filtered = self.rulings[-limit:]
-        return [r.to_dict() for r in filtered]
+        return self.rulings.history(session_id or None, limit)
+    
+    def get_rulings_since(self, start_ts: float, end_ts: Optional[float] = None, limit: int = 100) -> List[Dict]:
+        """Get recent rulings in a time window (served from the in-memory time index)"""
+        return self.rulings.since(start_ts, end_ts, limit)
 
 # Global constitution instance
 constitution = ZeroDriftConstitution()
\ No newline at end of file